@@ -0,0 +1,303 @@
+"""
+Versioned JSON API for mobile and partner clients.
+
+Exposes search, seat availability, seat holds, booking, cancellation and
+booking history under /api/v1, next to the HTML views and on top of the same
+data-access functions. Clients authenticate with POST /api/v1/session and
+then send the session cookie.
+
+Responses are compact JSON. Read endpoints carry an ETag computed from the
+body and answer a matching If-None-Match with 304 Not Modified, so a client
+polling a seat map only downloads it when it actually changed. Errors have
+the form {"error": {"code": ..., "message": ...}}.
+"""
+from datetime import datetime
+from functools import wraps
+
+from flask import Blueprint, current_app, request, session
+
+from hashing import HashingBusy
+from routing import SORT_ORDERS
+from models import (db, User, Flight, Booking, BookingOutcome, get_occupied_seats,
+                    get_held_seats, hold_seat, book_seat, release_seat,
+                    find_flights, search_itineraries, get_flight_seating, get_booking_history)
+
+api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+# Number of bookings returned per booking history page
+BOOKINGS_PAGE_SIZE = 50
+
+# HTTP status and message of each failed booking outcome
+BOOKING_ERRORS = {
+    BookingOutcome.SEAT_TAKEN: (409, 'That seat was just booked or held by someone else'),
+    BookingOutcome.SOLD_OUT: (409, 'This flight is fully booked'),
+    BookingOutcome.INVALID_SEAT: (400, 'Unknown or blocked seat'),
+}
+
+
+def json_response(payload, status=200, conditional=False):
+    """
+    Serializes payload without whitespace.
+
+    With conditional, the response gets an ETag and becomes a 304 when the
+    client already holds the same representation.
+    """
+    body = current_app.json.dumps(payload, separators=(',', ':'))
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    if conditional:
+        # Clients may keep a copy but must revalidate it before each use
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
+def error_response(status, code, message):
+    """Builds a JSON error response."""
+    return json_response({'error': {'code': code, 'message': message}}, status)
+
+
+def login_required(view):
+    """Rejects requests without a logged-in session with 401."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if 'email' not in session:
+            return error_response(401, 'unauthorized', 'Log in first')
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@api.errorhandler(404)
+def not_found(error):
+    return error_response(404, 'not_found', 'Resource not found')
+
+
+@api.errorhandler(500)
+def internal_error(error):
+    return error_response(500, 'internal_error', 'Internal server error')
+
+
+def serialize_flight(flight):
+    return {
+        'id': flight.id,
+        'flight_number': flight.flight_number,
+        'departure_airport': flight.departure_airport,
+        'arrival_location': flight.arrival_location,
+        'departure_time': flight.departure_time.isoformat(),
+        'arrival_time': flight.arrival_time.isoformat(),
+        'cost': flight.cost,
+        'seats_available': flight.seats_available,
+    }
+
+
+def serialize_itinerary(itinerary):
+    return {
+        'cost': itinerary.cost,
+        'duration_minutes': int(itinerary.duration.total_seconds() // 60),
+        'stops': itinerary.stops,
+        'legs': [{
+            'id': leg.flight_id,
+            'flight_number': leg.flight_number,
+            'departure_airport': leg.origin,
+            'arrival_location': leg.destination,
+            'departure_time': leg.departure_time.isoformat(),
+            'arrival_time': leg.arrival_time.isoformat(),
+            'cost': leg.cost,
+            'seats_available': leg.seats_available,
+        } for leg in itinerary.legs],
+    }
+
+
+def serialize_booking(booking):
+    return {
+        'id': booking.id,
+        'flight_id': booking.flight_id,
+        'seat': booking.seats,
+        'booked_at': booking.booked_at.isoformat() if booking.booked_at else None,
+    }
+
+
+def requested_seat(layout):
+    """Returns the (row, col) of the seat label in the JSON body, or None."""
+    payload = request.get_json(silent=True) or {}
+    label = payload.get('seat')
+    if not isinstance(label, str):
+        return None
+    position = layout.position(label)
+    if position is None or not layout.is_bookable(*position):
+        return None
+    return position
+
+
+@api.route('/session', methods=['POST'])
+def create_session():
+    """Logs in with {"email", "password"} and starts a session."""
+    payload = request.get_json(silent=True) or {}
+    email = payload.get('email')
+    password = payload.get('password')
+    if not email or not password:
+        return error_response(400, 'invalid_request', 'email and password are required')
+
+    user = User.query.filter_by(email=email).first()
+    try:
+        authenticated = user is not None and user.check_password(password)
+    except HashingBusy:
+        return error_response(503, 'busy', 'The server is busy, please retry shortly')
+    if not authenticated:
+        return error_response(401, 'invalid_credentials', 'Invalid email or password')
+
+    if user in db.session.dirty:
+        # The hash was upgraded; a failed save must not block the login
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+    session['email'] = email
+    return json_response({'email': email})
+
+
+@api.route('/session', methods=['DELETE'])
+def delete_session():
+    """Logs out."""
+    session.pop('email', None)
+    return '', 204
+
+
+@api.route('/flights')
+def search():
+    """
+    Searches flights on a route and day.
+
+    Query parameters: departure_airport, arrival_location, date (YYYY-MM-DD),
+    and optionally max_stops (0-2), sort (cost or duration) and seats_left (1
+    to leave out sold-out flights). Direct searches return "flights";
+    searches allowing stops return "itineraries".
+    """
+    departure_airport = request.args.get('departure_airport')
+    arrival_location = request.args.get('arrival_location')
+    max_stops = request.args.get('max_stops', 0, type=int)
+    sort = request.args.get('sort', 'cost')
+    seats_left = request.args.get('seats_left', '') in ('1', 'true')
+    try:
+        departure_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return error_response(400, 'invalid_request', 'date must be in YYYY-MM-DD format')
+    if not departure_airport or not arrival_location:
+        return error_response(400, 'invalid_request',
+                              'departure_airport and arrival_location are required')
+    if max_stops not in (0, 1, 2) or sort not in SORT_ORDERS:
+        return error_response(400, 'invalid_request', 'Invalid max_stops or sort')
+
+    if max_stops:
+        itineraries = search_itineraries(departure_airport, arrival_location, departure_date,
+                                         max_stops=max_stops, sort=sort,
+                                         seats_left=seats_left)
+        return json_response({'itineraries': [serialize_itinerary(i) for i in itineraries]},
+                             conditional=True)
+
+    flights = find_flights(departure_airport, arrival_location, departure_date,
+                          seats_left=seats_left)
+    return json_response({'flights': [serialize_flight(f) for f in flights]}, conditional=True)
+
+
+@api.route('/flights/<int:flight_id>/seats')
+@login_required
+def seat_map(flight_id):
+    """
+    Returns a flight's seat layout and the seats that cannot be selected.
+
+    The layout is given as rows and seat_letters (a space marks an aisle);
+    every seat not listed as booked, held or blocked is available.
+    """
+    flight = get_flight_seating(flight_id)
+    if flight is None:
+        return error_response(404, 'not_found', 'Resource not found')
+    layout = flight.layout
+    seat_letters = ''.join(
+        (' ' if seat.aisle_before else '') + letter
+        for seat, letter in zip(layout.seat_rows[0], layout.letters)
+    )
+
+    def labels(positions):
+        return sorted((layout.label(row, col) for row, col in positions),
+                      key=layout.position)
+
+    return json_response({
+        'flight_id': flight.id,
+        'rows': layout.rows,
+        'seat_letters': seat_letters,
+        'premium_rows': layout.premium_rows,
+        'seats_available': flight.seats_available,
+        'booked': labels(get_occupied_seats(flight_id)),
+        'held': labels(get_held_seats(flight_id, session['email'])),
+        'blocked': labels(layout.blocked),
+    }, conditional=True)
+
+
+@api.route('/flights/<int:flight_id>/holds', methods=['POST'])
+@login_required
+def create_hold(flight_id):
+    """Holds {"seat": "2B"} for the current user while they pay."""
+    flight = db.get_or_404(Flight, flight_id)
+    position = requested_seat(flight.layout)
+    if position is None:
+        return error_response(400, 'invalid_seat', 'Unknown or blocked seat')
+
+    hold = hold_seat(flight, session['email'], *position)
+    if hold is None:
+        return error_response(409, 'seat_taken', 'That seat is booked or held by someone else')
+    return json_response({
+        'flight_id': flight.id,
+        'seat': flight.layout.label(*position),
+        'expires_at': hold.expires_at.isoformat(),
+    }, 201)
+
+
+@api.route('/flights/<int:flight_id>/bookings', methods=['POST'])
+@login_required
+def create_booking(flight_id):
+    """Books {"seat": "2B"} for the current user."""
+    flight = db.get_or_404(Flight, flight_id)
+    position = requested_seat(flight.layout) or (None, None)
+    result = book_seat(flight, session['email'], *position)
+    if result.outcome is not BookingOutcome.BOOKED:
+        status, message = BOOKING_ERRORS[result.outcome]
+        return error_response(status, result.outcome.value, message)
+    return json_response(serialize_booking(result.booking), 201)
+
+
+@api.route('/bookings')
+@login_required
+def bookings():
+    """
+    Returns the current user's bookings, newest first.
+
+    Pages are keyset-paginated: pass the returned next_before as ?before= to
+    get the next page; it is null on the last page.
+    """
+    before = request.args.get('before', type=int)
+    page, next_before = get_booking_history(session['email'], before, BOOKINGS_PAGE_SIZE)
+    return json_response({
+        'bookings': [dict(serialize_booking(booking), flight=serialize_flight(booking.flight))
+                     for booking in page],
+        'next_before': next_before,
+    }, conditional=True)
+
+
+@api.route('/bookings/<int:booking_id>', methods=['DELETE'])
+@login_required
+def cancel(booking_id):
+    """Cancels one of the current user's bookings and releases the seat."""
+    booking = db.session.get(Booking, booking_id)
+    if booking is None or booking.user_email != session['email']:
+        return error_response(404, 'not_found', 'Booking not found')
+    try:
+        release_seat(booking.flight_id)
+        db.session.delete(booking)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Cancelling booking %s failed', booking_id)
+        return error_response(500, 'internal_error', 'The booking could not be cancelled')
+    return '', 204
@@ -9,121 +9,106 @@ with account creation and password reset options.
 
 Input: 
 - User credentials (email, password)
-- Flight search criteria (departure airport, arrival location, departure date)
+- Flight search criteria (departure airport, arrival location, departure date,
+  optionally allowing 1- or 2-stop connections)
 - Seat selection (row, column)
 
 Output:
 - Flight search results
 - Booking confirmations and history
+- The same operations as a JSON API under /api/v1 (see api.py)
+- Request, SQL and template timings on /metrics (see metrics.py)
 
 Run Instructions:
 1. Ensure Flask and SQLAlchemy are installed.
-2. Run `python app.py` to start the server.
-3. Access the app via `http://127.0.0.1:5000` in a web browser.
+2. Run `flask --app app init-db` once to create the schema and sample data.
+   Run it again after upgrading to bring an existing database up to date.
+3. Run `python app.py` to start the server (or point a WSGI server such as
+   gunicorn at `app:create_app()`).
+4. Access the app via `http://127.0.0.1:5000` in a web browser.
+5. Optionally set DATABASE_URL and the other environment variables described
+   in config.py to change the database and connection pool settings.
 """
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
-from werkzeug.security import generate_password_hash, check_password_hash
+import os
+import click
+from flask import (Blueprint, Flask, Response, abort, current_app, render_template,
+                   stream_template, request, redirect, url_for, session, flash, jsonify)
+from sqlalchemy import event
+from calendar import monthrange
 from datetime import datetime
-from sqlalchemy.ext.mutable import MutableList
-from sqlalchemy.types import JSON
-
-app = Flask(__name__)
-
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.secret_key = 'secret'
-
-# Initialize SQLAlchemy
-db = SQLAlchemy(app)
-
-# User Model
-class User(db.Model):
+import assets
+import metrics
+from api import api
+from hashing import HashingBusy
+from seat_events import event_stream
+from importer import FlightImportError, import_flights
+from config import Config, engine_options, sqlite_pragmas
+from routing import SORT_ORDERS
+from models import (db, User, AircraftConfig, Flight, Booking, BookingOutcome, get_airport_codes,
+                    get_occupied_seats, get_held_seats, hold_seat, sweep_expired_holds,
+                    search_flight_page, search_itineraries, get_price_calendar, book_seat,
+                    release_seat, normalize_airport_code, get_seat_event_broker,
+                    get_search_cache, get_airport_cache, get_calendar_cache, get_flight_seating,
+                    get_booking_history, upgrade_schema)
+
+# Views are registered on this blueprint; CLI commands sit at the top level
+bp = Blueprint('main', __name__, cli_group=None)
+
+# Number of bookings shown per booking history page
+HISTORY_PAGE_SIZE = 20
+
+# Number of direct flights shown per search results page
+RESULTS_PAGE_SIZE = 50
+
+# Length of a price calendar window in days, by default and at most
+CALENDAR_DAYS = 30
+CALENDAR_MAX_DAYS = 62
+
+BUSY_MESSAGE = 'The server is busy right now. Please try again in a moment.'
+
+def create_app(config=None):
     """
-    Represents a user account in the system.
-
-    Attributes:
-    - email: unique identifier for the user.
-    - password: hashed password for secure authentication.
-    - created_at: timestamp of account creation.
-
-    Methods:
-    - set_password: hashes and sets the user's password.
-    - check_password: verifies the provided password.
-    """
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(255), unique=True, nullable=False)
-    password = db.Column(db.String(255), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    def set_password(self, password):
-        """Hashes and sets the password for secure storage."""
-        self.password = generate_password_hash(password)
-
-    def check_password(self, password):
-        """Verifies the provided password against the stored hash."""
-        return check_password_hash(self.password, password)
+    Creates and configures an application instance.
 
-# Flight Model
-class Flight(db.Model):
+    Configuration is loaded from config.Config (i.e. the environment) and then
+    overridden by `config`, a mapping of settings, if given. Creating an app
+    neither touches the schema nor seeds data; run `flask init-db` for that.
     """
-    Represents a flight in the system.
-
-    Attributes:
-    - flight_number: unique identifier for the flight.
-    - departure_airport, arrival_location: location details.
-    - departure_time, arrival_time: scheduling information.
-    - cost: ticket price.
-    - seats: seat availability map.
-    """
-    id = db.Column(db.Integer, primary_key=True)
-    flight_number = db.Column(db.String(50), unique=True, nullable=False)
-    departure_airport = db.Column(db.String(255), nullable=False)
-    arrival_location = db.Column(db.String(255), nullable=False)
-    departure_time = db.Column(db.DateTime, nullable=False)
-    arrival_time = db.Column(db.DateTime, nullable=False)
-    cost = db.Column(db.Float, nullable=False)
-    seats = db.Column(MutableList.as_mutable(JSON), nullable=False)
-
-    def __repr__(self):
-        return f'<Flight {self.flight_number}>'
-
-# Booking Model
-class Booking(db.Model):
-    """
-    Represents a flight booking made by a user.
-
-    Attributes:
-    - user_email: email of the booking user.
-    - flight_id: associated flight ID.
-    - seat_row, seat_col: booked seat location.
-    - booked_at: booking timestamp.
-    - seats: seat label (e.g., 2A).
-    """
-    id = db.Column(db.Integer, primary_key=True)
-    user_email = db.Column(db.String(255), nullable=False)
-    flight_id = db.Column(db.Integer, db.ForeignKey('flight.id'), nullable=False)
-    seat_row = db.Column(db.Integer, nullable=False)
-    seat_col = db.Column(db.Integer, nullable=False)
-    booked_at = db.Column(db.DateTime, default=datetime.utcnow)
-    seats = db.Column(db.String(10), nullable=False)
-
-    def __repr__(self):
-        return f'<Booking {self.id} - Flight {self.flight_id} Seat {self.seats}>'
-    flight = db.relationship('Flight', backref='bookings')
-    
-    __table_args__ = (
-        db.UniqueConstraint('flight_id', 'seat_row', 'seat_col', 
-                          name='unique_seat_booking'),
-    )
-
-def generate_seat_map():
-    """Generates a 5x4 seat availability map for each flight."""
-    return [[0 for _ in range(4)] for _ in range(5)]  # 5x4 grid of available seats
-
-@app.route('/', methods=['GET', 'POST'])
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if config is not None:
+        app.config.update(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS',
+                          engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    db.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            configure_sqlite(db.engine, app.config)
+        if app.config['METRICS_ENABLED']:
+            # Registered first so its timing covers the other response hooks
+            registry = metrics.init_app(app, db.engine)
+            registry.watch_cache('airport_codes', get_airport_cache())
+            registry.watch_cache('price_calendar', get_calendar_cache())
+            registry.watch_cache('flight_search', get_search_cache())
+
+    assets.init_app(app)
+    app.register_blueprint(bp)
+    app.register_blueprint(api)
+    return app
+
+def configure_sqlite(engine, config):
+    """Applies the configured pragmas (WAL, synchronous, busy timeout) to new SQLite connections."""
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+@bp.route('/', methods=['GET', 'POST'])
 def login():
     """Handles user login, verifies credentials, and starts a session."""
     if request.method == 'POST':
@@ -135,16 +120,28 @@ def login():
             return render_template('login.html')
         
         user = User.query.filter_by(email=email).first()
-        if user and user.check_password(password):
+        try:
+            authenticated = user is not None and user.check_password(password)
+        except HashingBusy:
+            flash(BUSY_MESSAGE, 'error')
+            return render_template('login.html'), 503
+
+        if authenticated:
+            if user in db.session.dirty:
+                # The hash was upgraded; a failed save must not block the login
+                try:
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
             session['email'] = email
-            return redirect(url_for('book_flight'))
+            return redirect(url_for('.book_flight'))
         
         flash('Invalid email or password', 'error')
         return render_template('login.html')
             
     return render_template('login.html')
 
-@app.route('/signup', methods=['GET', 'POST'])
+@bp.route('/signup', methods=['GET', 'POST'])
 def signup():
     """Allows new users to register by providing email and password."""
     if request.method == 'POST':
@@ -160,13 +157,17 @@ def signup():
             return render_template('signup.html')
             
         new_user = User(email=email)
-        new_user.set_password(password)
+        try:
+            new_user.set_password(password)
+        except HashingBusy:
+            flash(BUSY_MESSAGE, 'error')
+            return render_template('signup.html'), 503
         
         try:
             db.session.add(new_user)
             db.session.commit()
             flash('Account created successfully', 'success')
-            return redirect(url_for('login'))
+            return redirect(url_for('.login'))
         except Exception as e:
             db.session.rollback()
             flash('An error occurred. Please try again.', 'error')
@@ -174,7 +175,7 @@ def signup():
         
     return render_template('signup.html')
 
-@app.route('/forgot_password', methods=['GET', 'POST'])
+@bp.route('/forgot_password', methods=['GET', 'POST'])
 def forgot_password():
     """Handles user requests to reset their password via email."""
     if request.method == 'POST':
@@ -185,11 +186,11 @@ def forgot_password():
             flash('Email not found', 'error')
             return render_template('forgot_password.html')
 
-        return redirect(url_for('reset_password', email=email))
+        return redirect(url_for('.reset_password', email=email))
 
     return render_template('forgot_password.html')
 
-@app.route('/reset_password/<email>', methods=['GET', 'POST'])
+@bp.route('/reset_password/<email>', methods=['GET', 'POST'])
 def reset_password(email):
     """Resets user password for the provided email address."""
     if request.method == 'POST':
@@ -202,13 +203,18 @@ def reset_password(email):
 
         if not user:
             flash('Invalid reset request', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('.login'))
+
+        try:
+            user.set_password(password)
+        except HashingBusy:
+            flash(BUSY_MESSAGE, 'error')
+            return render_template('reset_password.html', email=email), 503
 
-        user.set_password(password)
         try:
             db.session.commit()
             flash('Password has been reset successfully', 'success')
-            return redirect(url_for('login'))
+            return redirect(url_for('.login'))
         except Exception as e:
             db.session.rollback()
             flash('An error occurred. Please try again.', 'error')
@@ -216,151 +222,287 @@ def reset_password(email):
 
     return render_template('reset_password.html', email=email)
 
-@app.route('/book_flight')
+@bp.route('/book_flight')
 def book_flight():
     """Displays the flight booking page with search options."""
     if 'email' not in session:
         flash('Please login first', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
-    departure_airports = db.session.query(Flight.departure_airport).distinct().all()
-    arrival_airports = db.session.query(Flight.arrival_location).distinct().all()
-    airport_codes = set(code[0] for code in departure_airports + arrival_airports)
+    return render_template('book_flight.html', airport_codes=get_airport_codes())
 
-    return render_template('book_flight.html', airport_codes=airport_codes)
-
-@app.route('/search_flights', methods=['POST'])
+@bp.route('/search_flights', methods=['GET', 'POST'])
 def search_flights():
-    """Searches for flights matching user-provided criteria."""
-    departure_airport = request.form.get('departure_airport')
-    arrival_location = request.form.get('arrival_location')
-    departure_date = request.form.get('departure_date')
+    """
+    Searches for flights matching user-provided criteria.
+
+    The booking form posts the search; the sort and page links of direct
+    results repeat it as a GET with `order` (departure_time or cost) and
+    `after` (the cursor of the page to continue from).
+    """
+    departure_airport = request.values.get('departure_airport')
+    arrival_location = request.values.get('arrival_location')
+    departure_date = request.values.get('departure_date')
 
     if not all([departure_airport, arrival_location, departure_date]):
         flash('Please provide all required information', 'error')
-        return redirect(url_for('book_flight'))
+        return redirect(url_for('.book_flight'))
 
-    matching_flights = Flight.query.filter(
-        Flight.departure_airport.ilike(departure_airport),
-        Flight.arrival_location.ilike(arrival_location),
-        db.func.date(Flight.departure_time) == departure_date
-    ).all()
-
-    if not matching_flights:
+    try:
+        departure_date = datetime.strptime(departure_date, '%Y-%m-%d').date()
+    except ValueError:
+        flash('Please provide a valid departure date', 'error')
+        return redirect(url_for('.book_flight'))
+
+    if request.values.get('flexible'):
+        calendar = get_price_calendar(departure_airport, arrival_location, departure_date,
+                                      CALENDAR_DAYS)
+        if not calendar:
+            flash('No flights match your search criteria', 'error')
+            return redirect(url_for('.book_flight'))
+        return render_template('price_calendar.html', calendar=calendar,
+                               departure_airport=normalize_airport_code(departure_airport),
+                               arrival_location=normalize_airport_code(arrival_location))
+
+    # Connections are searched on the route graph; direct-only searches keep
+    # using the indexed query
+    max_stops = request.values.get('max_stops', 0, type=int)
+    sort = request.values.get('sort', 'cost')
+    seats_left = bool(request.values.get('seats_left'))
+    span = request.values.get('span', 'day')
+    if max_stops not in (0, 1, 2) or sort not in SORT_ORDERS or span not in ('day', 'month'):
+        flash('Invalid search options', 'error')
+        return redirect(url_for('.book_flight'))
+
+    if max_stops:
+        itineraries = search_itineraries(departure_airport, arrival_location, departure_date,
+                                         max_stops=max_stops, sort=sort,
+                                         seats_left=seats_left)
+        if not itineraries:
+            flash('No flights match your search criteria', 'error')
+            return redirect(url_for('.book_flight'))
+        return render_template('flight_results.html', itineraries=itineraries, sort=sort)
+
+    # A month view lists the whole calendar month of the chosen date
+    first_day, days = departure_date, 1
+    if span == 'month':
+        first_day = departure_date.replace(day=1)
+        days = monthrange(first_day.year, first_day.month)[1]
+
+    order = request.values.get('order', 'departure_time')
+    after = request.values.get('after')
+    try:
+        page = search_flight_page(departure_airport, arrival_location, first_day, days,
+                                  order=order, after=after, limit=RESULTS_PAGE_SIZE,
+                                  seats_left=seats_left)
+    except ValueError:
+        flash('Invalid search options', 'error')
+        return redirect(url_for('.book_flight'))
+
+    if not page:
         flash('No flights match your search criteria', 'error')
-        return redirect(url_for('book_flight'))
+        return redirect(url_for('.book_flight'))
+
+    # The parameters the sort and page links repeat
+    search = {
+        'departure_airport': normalize_airport_code(departure_airport),
+        'arrival_location': normalize_airport_code(arrival_location),
+        'departure_date': departure_date.isoformat(),
+        'span': span,
+    }
+    if seats_left:
+        search['seats_left'] = 1
+    context = {'flights': page, 'search': search, 'order': order, 'paged': after is not None}
+    if current_app.config['SEARCH_STREAM_RESULTS']:
+        # Rows are rendered and sent as they are read from the database
+        return stream_template('flight_results.html', **context)
+    return render_template('flight_results.html', **context)
+
+@bp.route('/price_calendar')
+def price_calendar():
+    """
+    Returns the cheapest fare and seats left per day for a route as JSON.
 
-    return render_template('flight_results.html', flights=matching_flights)
+    Query parameters: departure_airport, arrival_location, start (YYYY-MM-DD)
+    and optionally days (default CALENDAR_DAYS, at most CALENDAR_MAX_DAYS).
+    """
+    departure_airport = request.args.get('departure_airport')
+    arrival_location = request.args.get('arrival_location')
+    days = request.args.get('days', CALENDAR_DAYS, type=int)
+    try:
+        start = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify(error='start must be a date in YYYY-MM-DD format'), 400
+    if not departure_airport or not arrival_location:
+        return jsonify(error='departure_airport and arrival_location are required'), 400
+    if not 1 <= days <= CALENDAR_MAX_DAYS:
+        return jsonify(error=f'days must be between 1 and {CALENDAR_MAX_DAYS}'), 400
+
+    calendar = get_price_calendar(departure_airport, arrival_location, start, days)
+    return jsonify(
+        departure_airport=normalize_airport_code(departure_airport),
+        arrival_location=normalize_airport_code(arrival_location),
+        start=start.isoformat(),
+        days=days,
+        calendar=[{
+            'date': entry.day.isoformat(),
+            'min_cost': entry.min_cost,
+            'seats_available': entry.seats_available,
+            'flights': entry.flights,
+        } for entry in calendar],
+    )
 
-@app.route('/payment_method/<int:flight_id>', methods=['GET', 'POST'])
+@bp.route('/payment_method/<int:flight_id>', methods=['GET', 'POST'])
 def payment_method(flight_id):
     """Processes payment and confirms seat booking."""
+    if 'email' not in session:
+        return redirect(url_for('.login'))
+
     if request.method == 'POST':
         # Process payment here
         payment_success = True  # Replace with actual payment confirmation logic
 
         if payment_success:
             # Retrieve seat and flight info from session
-            seat_label = session.get('selected_seat')
             user_email = session.get('email')
-            flight = Flight.query.get_or_404(flight_id)
+            flight = db.get_or_404(Flight, flight_id)
             seat_row = session.get('seat_row')
             seat_col = session.get('seat_col')
 
-
-            # Create a booking record in the database with the seat information
-            new_booking = Booking(
-                user_email=user_email, 
-                flight_id=flight.id, 
-                seats=seat_label,
-                seat_row=seat_row,
-                seat_col=seat_col
-            )
-            flight.seats[seat_row][seat_col] = 1
-            db.session.add(new_booking)
-            db.session.commit()
+            result = book_seat(flight, user_email, seat_row, seat_col)
+            if result.outcome is BookingOutcome.SEAT_TAKEN:
+                flash('Sorry, that seat was just booked by someone else. '
+                      'Please choose another seat.', 'error')
+                return redirect(url_for('.select_seat', flight_id=flight_id))
+            if result.outcome is BookingOutcome.SOLD_OUT:
+                flash('Sorry, this flight is fully booked.', 'error')
+                return redirect(url_for('.book_flight'))
+            if result.outcome is BookingOutcome.INVALID_SEAT:
+                flash('Please select a seat first', 'error')
+                return redirect(url_for('.select_seat', flight_id=flight_id))
 
             # Clear session data after successful booking
             session.pop('selected_seat', None)
             session.pop('flight_id', None)
+            session.pop('seat_row', None)
+            session.pop('seat_col', None)
 
             flash('Payment successful! Your booking has been confirmed.', 'success')
-            return redirect(url_for('booking_history'))
+            return redirect(url_for('.booking_history'))
         else:
             flash('Payment failed. Please try again.', 'error')
 
-        return redirect(url_for('book_flight'))
+        return redirect(url_for('.book_flight'))
 
     return render_template('payment_method.html', flight_id=flight_id)
 
-@app.route('/select_seat/<int:flight_id>', methods=['GET', 'POST'])
+@bp.route('/select_seat/<int:flight_id>', methods=['GET', 'POST'])
 def select_seat(flight_id):
     """Allows user to select available seats for a specific flight."""
     if 'email' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
-    flight = Flight.query.get_or_404(flight_id)
-    
-    current_bookings = Booking.query.filter_by(flight_id=flight_id).all()
-    updated_seats = generate_seat_map()
-    
-    for booking in current_bookings:
-        updated_seats[booking.seat_row][booking.seat_col] = 1
-    
-    flight.seats = updated_seats
-    db.session.commit()
+    flight = get_flight_seating(flight_id)
+    if flight is None:
+        abort(404)
+    layout = flight.layout
 
     if request.method == 'POST':
         selected_seat = request.form.get('seat')
         if not selected_seat:
-            return redirect(url_for('select_seat', flight_id=flight_id))
-            
-        row, col = map(int, selected_seat.split(','))
+            return redirect(url_for('.select_seat', flight_id=flight_id))
+
+        try:
+            row, col = map(int, selected_seat.split(','))
+        except ValueError:
+            row, col = -1, -1
+
+        if not layout.is_bookable(row, col):
+            flash('Invalid seat selection', 'error')
+            return redirect(url_for('.select_seat', flight_id=flight_id))
+
+        # Reserve the seat while the user pays, so a conflict surfaces now
+        if hold_seat(flight, session['email'], row, col) is None:
+            flash('That seat has already been booked or is being held by another traveler. '
+                  'Please choose another seat.', 'error')
+            return redirect(url_for('.select_seat', flight_id=flight_id))
+
         # Convert row and col to seat label (e.g., 2A)
-        seat_label = f"{row + 1}{chr(65 + col)}"
+        seat_label = layout.label(row, col)
 
         # Store selected seat in session temporarily
         session['selected_seat'] = seat_label
         session['flight_id'] = flight.id
         session['seat_row'] = row
         session['seat_col'] = col
-        
-        try:
-            # Check if the seat is already booked
-            return redirect(url_for('payment_method', flight_id=flight_id))
-        except Exception as e:
-            print(e)
-            db.session.rollback()
-            return redirect(url_for('select_seat', flight_id=flight_id))
-
-    return render_template('select_seat.html', flight=flight)
+        return redirect(url_for('.payment_method', flight_id=flight_id))
+
+    # Read before the seats, so the live updates resume from this point and
+    # replay anything booked while the page loads
+    last_event_id = get_seat_event_broker().last_event_id()
+    occupied = get_occupied_seats(flight_id)
+    held = get_held_seats(flight_id, session['email'])
+    return render_template('select_seat.html', flight=flight, layout=layout,
+                           occupied=occupied, held=held, last_event_id=last_event_id)
+
+@bp.route('/select_seat/<int:flight_id>/events')
+def seat_events(flight_id):
+    """
+    Streams a flight's seat changes as Server-Sent Events.
 
-@app.route('/booking_history')
+    Each 'seat' event carries a seat that was just booked or freed; a 'reset'
+    event asks the page to reload because updates were missed. The first
+    connect passes the page's event id as ?last_event_id; reconnects send
+    the Last-Event-ID header, which takes precedence.
+    """
+    if 'email' not in session:
+        return Response(status=401)
+    db.get_or_404(Flight, flight_id)
+
+    # Event ids are never negative; such a Last-Event-ID was not sent by this stream
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', type=int)
+    if last_event_id is not None and last_event_id < 0:
+        return Response(status=400)
+
+    broker = get_seat_event_broker()
+    subscription = broker.subscribe(flight_id, last_event_id)
+    stream = event_stream(broker, subscription,
+                          keepalive=current_app.config['SEAT_EVENTS_KEEPALIVE'],
+                          max_age=current_app.config['SEAT_EVENTS_MAX_AGE'])
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/booking_history')
 def booking_history():
     """Displays booking history for the logged-in user."""
     if 'email' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
-    bookings = Booking.query.filter_by(user_email=session['email']).all()
-    return render_template('booking_history.html', bookings=bookings)
+    # Keyset pagination: each page starts below the last booking id shown
+    before = request.args.get('before', type=int)
+    bookings, next_cursor = get_booking_history(session['email'], before, HISTORY_PAGE_SIZE)
 
-@app.route('/cancel_booking/<int:booking_id>', methods=['POST'])
+    return render_template('booking_history.html', bookings=bookings,
+                           next_cursor=next_cursor, paged=before is not None)
+
+@bp.route('/cancel_booking/<int:booking_id>', methods=['POST'])
 def cancel_booking(booking_id):
     """Allows user to cancel a booking and releases the seat."""
     if 'email' not in session:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
 
     booking = Booking.query.get_or_404(booking_id)
     
     if booking.user_email != session['email']:
         flash('Unauthorized action', 'error')
-        return redirect(url_for('booking_history'))
+        return redirect(url_for('.booking_history'))
     
     try:
-        # Update the flight's seat map
-        flight = Flight.query.get(booking.flight_id)
-        flight.seats[booking.seat_row][booking.seat_col] = 0
-        
+        # Return the seat to the flight's inventory
+        release_seat(booking.flight_id)
+
         # Remove the booking
         db.session.delete(booking)
         db.session.commit()
@@ -369,46 +511,94 @@ def cancel_booking(booking_id):
         db.session.rollback()
         flash('An error occurred', 'error')
     
-    return redirect(url_for('booking_history'))
+    return redirect(url_for('.booking_history'))
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     """Logs out the user and clears session data."""
     session.pop('email', None)
     flash('You have been logged out', 'success')
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
+
+@bp.cli.command('sweep-holds')
+def sweep_holds_command():
+    """Deletes expired seat holds."""
+    print(f'Removed {sweep_expired_holds()} expired seat holds')
+
+@bp.cli.command('import-flights')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']),
+              help='File format; inferred from the file extension by default.')
+@click.option('--chunk-size', default=5000, show_default=True,
+              help='Number of flights written per INSERT batch.')
+@click.option('--skip-invalid', is_flag=True, help='Skip invalid records instead of stopping.')
+def import_flights_command(path, file_format, chunk_size, skip_invalid):
+    """Upserts flights from a CSV or JSON-lines schedule file."""
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        file_format = 'jsonl' if extension in ('.jsonl', '.ndjson', '.json') else 'csv'
+    with open(path, newline='', encoding='utf-8') as stream:
+        try:
+            stats = import_flights(stream, file_format, chunk_size, skip_invalid)
+        except FlightImportError as e:
+            raise click.ClickException(str(e))
+    rate = stats.rows / stats.seconds if stats.seconds else 0
+    print(f'Imported {stats.rows} flights in {stats.seconds:.2f}s '
+          f'({rate:.0f} rows/s), skipped {stats.skipped}')
 
 def init_db():
-    """Initializes the database and adds sample flight data."""
-    with app.app_context():
-        db.create_all()
+    """
+    Creates the schema and adds sample data in the current application context.
+    A database created by an earlier version is upgraded in place first.
+    """
+    db.create_all()
+    upgrade_schema()
+    
+    # sample aircraft configurations
+    if AircraftConfig.query.count() == 0:
+        db.session.add_all([
+            AircraftConfig(name="Regional-20", rows=5, seat_letters="AB CD"),
+            AircraftConfig(name="A320-178", rows=30, seat_letters="ABC DEF",
+                           blocked_seats="1A,1F", premium_rows=4),
+        ])
+        db.session.commit()
+
+    # sample flights
+    if Flight.query.count() == 0:
+        regional = AircraftConfig.query.filter_by(name="Regional-20").first()
+        a320 = AircraftConfig.query.filter_by(name="A320-178").first()
+        flights = [
+            Flight(
+                flight_number="AB123",
+                departure_airport="JFK",
+                arrival_location="LAX",
+                departure_time=datetime(2024, 11, 5, 14, 0),
+                arrival_time=datetime(2024, 11, 5, 17, 30),
+                cost=299.99,
+                aircraft_config=regional
+            ),
+            Flight(
+                flight_number="CD456",
+                departure_airport="JFK",
+                arrival_location="SFO",
+                departure_time=datetime(2024, 11, 6, 16, 0),
+                arrival_time=datetime(2024, 11, 6, 19, 45),
+                cost=349.99,
+                aircraft_config=a320
+            )
+        ]
         
-        # sample flights
-        if Flight.query.count() == 0:
-            flights = [
-                Flight(
-                    flight_number="AB123",
-                    departure_airport="JFK",
-                    arrival_location="LAX",
-                    departure_time=datetime(2024, 11, 5, 14, 0),
-                    arrival_time=datetime(2024, 11, 5, 17, 30),
-                    cost=299.99,
-                    seats=generate_seat_map()
-                ),
-                Flight(
-                    flight_number="CD456",
-                    departure_airport="JFK",
-                    arrival_location="SFO",
-                    departure_time=datetime(2024, 11, 6, 16, 0),
-                    arrival_time=datetime(2024, 11, 6, 19, 45),
-                    cost=349.99,
-                    seats=generate_seat_map()
-                )
-            ]
-            
-            db.session.bulk_save_objects(flights)
-            db.session.commit()
+        db.session.add_all(flights)
+        db.session.commit()
 
-if __name__ == '__main__':
+@bp.cli.command('init-db')
+def init_db_command():
+    """Creates or upgrades the database schema and adds sample data."""
     init_db()
-    app.run(debug=True)
\ No newline at end of file
+    print('Initialized the database')
+
+# Default application, used by `flask --app app` and `python app.py`
+app = create_app()
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,215 @@
+"""
+Static asset fingerprinting and response compression.
+
+Templates link static files through asset_url(), which adds a fingerprint of
+the file's content to the URL (e.g. /static/css/base.css?v=3f2a9c1b0d4e).
+Requests carrying the current fingerprint are served with a far-future,
+immutable Cache-Control header: browsers keep the file until it changes, and
+a changed file gets a new URL. Static files requested without a fingerprint
+keep Flask's default of revalidating with the server.
+
+Stylesheets are served with their relative url() references fingerprinted
+as well (url("../background.png") becomes url("../background.png?v=...")),
+so images linked from CSS are cached the same way. A stylesheet's own
+fingerprint covers the files it references, so changing an image gives
+the stylesheets that use it new URLs too.
+
+HTML, JSON and other text responses are compressed with brotli (when the
+optional brotli package is installed) or gzip, following the client's
+Accept-Encoding. Static text files are compressed once per fingerprint and
+kept in memory.
+"""
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+import threading
+
+from flask import current_app, request, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# url(...) references in a stylesheet: (quote, target)
+CSS_URL = re.compile(rb'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+})
+
+
+def compress(data, encoding, best=False):
+    """Compresses data with 'br' or 'gzip'; best trades speed for size."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, compresslevel=9 if best else 6)
+
+
+class StaticAssets:
+    """
+    Fingerprints and caches the compressed static files of one application.
+
+    Attributes:
+    - folder: the application's static folder.
+
+    Methods:
+    - fingerprint: returns the content hash of a static file.
+    - rewritten: returns a stylesheet with its url() references fingerprinted.
+    - compressed: returns a static file compressed with an encoding.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        # filename -> (file version, (referenced file, fingerprint) pairs,
+        #              rewritten content or None, fingerprint)
+        self._files = {}
+        self._compressed = {}
+        self._lock = threading.Lock()
+
+    def _path(self, filename):
+        path = safe_join(self.folder, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        return path
+
+    def _load(self, filename):
+        """Returns the cache entry of a static file, or None if it does not exist."""
+        path = self._path(filename)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._files.get(filename)
+        if cached is not None and cached[0] == version and all(
+                self.fingerprint(target) == digest for target, digest in cached[1]):
+            return cached
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        references, rewritten = (), None
+        if filename.endswith('.css'):
+            references, rewritten = self._fingerprint_urls(filename, data)
+            data = rewritten
+        entry = (version, references, rewritten, hashlib.sha256(data).hexdigest()[:12])
+        with self._lock:
+            self._files[filename] = entry
+        return entry
+
+    def _fingerprint_urls(self, filename, data):
+        """Adds fingerprints to the relative url() references of a stylesheet."""
+        references = []
+
+        def fingerprinted(match):
+            quote, target = match.group(1), match.group(2).decode()
+            # Leave absolute, data: and already versioned URLs alone
+            if target.startswith(('/', '#')) or ':' in target or '?' in target:
+                return match.group(0)
+            resolved = posixpath.normpath(posixpath.join(posixpath.dirname(filename), target))
+            digest = self.fingerprint(resolved)
+            if digest is None:
+                return match.group(0)
+            references.append((resolved, digest))
+            return b'url(%s%s?v=%s%s)' % (quote, target.encode(), digest.encode(), quote)
+
+        rewritten = CSS_URL.sub(fingerprinted, data)
+        return tuple(references), rewritten
+
+    def fingerprint(self, filename):
+        """Returns a short hash of a static file's content, or None if it does not exist."""
+        entry = self._load(filename)
+        return entry[3] if entry is not None else None
+
+    def rewritten(self, filename):
+        """Returns the content served for a stylesheet, or None for other files."""
+        entry = self._load(filename)
+        return entry[2] if entry is not None else None
+
+    def compressed(self, filename, encoding):
+        """Returns the content of a static file compressed with encoding."""
+        key = (filename, self.fingerprint(filename), encoding)
+        with self._lock:
+            data = self._compressed.get(key)
+        if data is None:
+            data = self.rewritten(filename)
+            if data is None:
+                with open(self._path(filename), 'rb') as f:
+                    data = f.read()
+            data = compress(data, encoding, best=True)
+            with self._lock:
+                self._compressed[key] = data
+        return data
+
+
+def init_app(app):
+    """Registers asset_url() for templates and the response post-processing."""
+    app.extensions['static_assets'] = StaticAssets(app.static_folder)
+    app.add_template_global(asset_url)
+    app.after_request(cache_and_compress)
+
+
+def asset_url(filename):
+    """Returns the fingerprinted URL of a file in the static folder."""
+    assets = current_app.extensions['static_assets']
+    return url_for('static', filename=filename, v=assets.fingerprint(filename))
+
+
+def cache_and_compress(response):
+    """Sets static asset caching headers and compresses text responses."""
+    assets = current_app.extensions['static_assets']
+    static_file = None
+    if request.endpoint == 'static':
+        static_file = request.view_args['filename']
+        version = request.args.get('v')
+        if version is not None and version == assets.fingerprint(static_file):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config['STATIC_ASSET_MAX_AGE']
+            response.cache_control.immutable = True
+
+        rewritten = assets.rewritten(static_file)
+        if rewritten is not None and response.status_code in (200, 304):
+            # The served stylesheet differs from the file on disk, so its
+            # validators come from the rewritten content
+            response.close()
+            response.direct_passthrough = False
+            response.status_code = 200
+            response.set_data(rewritten)
+            response.set_etag(assets.fingerprint(static_file))
+            response.headers.pop('Last-Modified', None)
+            response.make_conditional(request)
+
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+    if encoding is None:
+        return response
+
+    if static_file is not None:
+        data = assets.compressed(static_file, encoding)
+        response.close()
+        response.direct_passthrough = False
+    elif response.is_streamed:
+        # Streamed bodies are sent as they are produced
+        return response
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+            return response
+        data = compress(data, encoding)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # The representation changed, so only a weak validator still holds; a
+    # client revalidating with it still gets a 304
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the flight booking system.
+
+Each benchmark is a standalone script; run it from the repository root, e.g.
+`python -m benchmarks.bench_search`.
+"""
@@ -0,0 +1,335 @@
+"""
+End-to-end booking flow load test.
+
+Seeds an on-disk SQLite database with N flights, M users and K bookings, then
+has simulated travelers log in, search, open a seat map, select a seat, pay
+and view their booking history. Each step is timed per request, either
+through the Flask test client (no network, measures the application alone)
+or against a local multi-threaded HTTP server (adds the WSGI server and
+socket round trips). The report is JSON with throughput and p50/p95/p99
+latency per route, so two releases can be compared by diffing their reports.
+A request counts as an error unless it returns the expected status and, for
+a redirect, leads to the next step of the flow: a taken seat or a failed
+payment redirects back to the seat map.
+
+Every driver runs against a freshly seeded copy of the same data, and the
+travelers' choices come from a seeded random generator, so runs with the same
+arguments do the same work.
+
+Usage:
+    python -m benchmarks.bench_booking_flow [--flights 2000] [--users 200] [--bookings 5000]
+        [--flows 200] [--threads 4] [--drivers client,http] [--output report.json]
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.cookies import SimpleCookie
+from importlib.metadata import version
+from urllib.parse import urlencode, urlsplit
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+
+from app import create_app, db, AircraftConfig, Booking, Flight, User
+
+AIRPORTS = ['ATL', 'BOS', 'DEN', 'DFW', 'JFK', 'LAS', 'LAX', 'MIA', 'ORD', 'SEA', 'SFO', 'YYZ']
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 30
+PASSWORD = 'benchmark password'
+CHUNK_SIZE = 10000
+
+# Steps of one traveler's visit: (route name, expected status, expected
+# redirect path). Failed seat selections and payments redirect as well, back
+# to the seat map, so a redirect only succeeds if it goes to the next step.
+STEPS = [
+    ('login', 302, '/book_flight'),
+    ('search', 200, None),
+    ('seat_map', 200, None),
+    ('select_seat', 302, '/payment_method/{flight_id}'),
+    ('payment', 302, '/booking_history'),
+    ('history', 200, None),
+]
+
+
+def seed(app, args):
+    """
+    Creates the schema and inserts the flights, users and bookings.
+
+    Returns the flights as (id, origin, destination, day) tuples, the bookable
+    (row, col) seats they share and the users' emails.
+    """
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        aircraft = AircraftConfig(name='A320-178', rows=30, seat_letters='ABC DEF',
+                                  blocked_seats='1A,1F', premium_rows=4)
+        db.session.add(aircraft)
+        db.session.commit()
+        layout = aircraft.layout
+        seats = [(row, col) for row in range(layout.rows) for col in range(layout.columns)
+                 if layout.is_bookable(row, col)]
+
+        flights = []
+        for flight_id in range(1, args.flights + 1):
+            origin, destination = rng.sample(AIRPORTS, 2)
+            departure = datetime.combine(FIRST_DAY, datetime.min.time()) + timedelta(
+                days=rng.randrange(DAYS), minutes=rng.randrange(24 * 60))
+            flights.append((flight_id, origin, destination, departure))
+
+        booked = {}
+        emails = [f'traveler{number}@example.com' for number in range(args.users)]
+        bookings = []
+        while len(bookings) < args.bookings:
+            flight_id = rng.randrange(1, args.flights + 1)
+            row, col = rng.choice(seats)
+            if (row, col) in booked.setdefault(flight_id, set()):
+                continue
+            booked[flight_id].add((row, col))
+            bookings.append({'user_email': rng.choice(emails), 'flight_id': flight_id,
+                             'seat_row': row, 'seat_col': col, 'seats': layout.label(row, col)})
+
+        # Every traveler shares one hash: hashing M passwords would only slow seeding
+        password = generate_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+        rows = {
+            Flight: [{
+                'id': flight_id, 'flight_number': f'BF{flight_id}',
+                'departure_airport': origin, 'arrival_location': destination,
+                'departure_time': departure, 'arrival_time': departure + timedelta(hours=3),
+                'cost': round(rng.uniform(80, 900), 2), 'aircraft_config_id': aircraft.id,
+                'seats_available': layout.capacity - len(booked.get(flight_id, ())),
+            } for flight_id, origin, destination, departure in flights],
+            User: [{'email': email, 'password': password} for email in emails],
+            Booking: bookings,
+        }
+        for model, values in rows.items():
+            for start in range(0, len(values), CHUNK_SIZE):
+                db.session.execute(insert(model), values[start:start + CHUNK_SIZE])
+        db.session.commit()
+        db.session.remove()
+
+    seeded = [(flight_id, origin, destination, departure.date())
+              for flight_id, origin, destination, departure in flights]
+    return seeded, seats, emails
+
+
+class ClientSession:
+    """A traveler's cookie session, sent through the Flask test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, form=None):
+        response = self.client.open(path, method=method, data=form)
+        response.close()
+        return response.status_code, response.headers.get('Location')
+
+
+class HttpSession:
+    """A traveler's cookie session over a keep-alive connection to a live server."""
+
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+        self.cookies = SimpleCookie()
+
+    def request(self, method, path, form=None):
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={morsel.value}'
+                                          for name, morsel in self.cookies.items())
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        response.read()
+        for cookie in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(cookie)
+        return response.status, response.headers.get('Location')
+
+    def close(self):
+        self.connection.close()
+
+
+def visit(session, rng, flights, seats, emails, record):
+    """Runs one traveler's visit, from login to booking history."""
+    flight_id, origin, destination, day = rng.choice(flights)
+    row, col = rng.choice(seats)
+    requests = [
+        ('POST', '/', {'email': rng.choice(emails), 'password': PASSWORD}),
+        ('POST', '/search_flights', {'departure_airport': origin, 'arrival_location': destination,
+                                     'departure_date': day.isoformat()}),
+        ('GET', f'/select_seat/{flight_id}', None),
+        ('POST', f'/select_seat/{flight_id}', {'seat': f'{row},{col}'}),
+        ('POST', f'/payment_method/{flight_id}', {}),
+        ('GET', '/booking_history', None),
+    ]
+    for (route, expected, target), (method, path, form) in zip(STEPS, requests):
+        started = time.perf_counter()
+        status, location = session.request(method, path, form)
+        elapsed = time.perf_counter() - started
+        ok = status == expected and (
+            target is None or urlsplit(location or '').path == target.format(flight_id=flight_id))
+        record(route, elapsed, ok)
+
+
+def run_driver(open_session, flows, threads, warmup, seed_value, data):
+    """
+    Runs `flows` visits spread over `threads` threads.
+
+    Returns (elapsed seconds, {route: [(seconds, ok), ...]}).
+    """
+    samples = {route: [] for route, _, _ in STEPS}
+    lock = threading.Lock()
+
+    def record(route, seconds, ok):
+        with lock:
+            samples[route].append((seconds, ok))
+
+    # Warm the template, statement and route graph caches outside the timing
+    warm_rng = random.Random(seed_value - 1)
+    for _ in range(warmup):
+        session = open_session()
+        visit(session, warm_rng, *data, lambda *sample: None)
+        getattr(session, 'close', lambda: None)()
+
+    def worker(index):
+        rng = random.Random(seed_value + index)
+        for _ in range(flows // threads + (index < flows % threads)):
+            session = open_session()
+            visit(session, rng, *data, record)
+            getattr(session, 'close', lambda: None)()
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started, samples
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def summarize(elapsed, samples):
+    """Builds the per-route and overall throughput and latency figures."""
+    routes = {}
+    for route, values in samples.items():
+        latencies = sorted(seconds * 1000 for seconds, _ in values)
+        if not latencies:
+            continue
+        routes[route] = {
+            'requests': len(latencies),
+            'errors': sum(not ok for _, ok in values),
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+        }
+    total = sum(route['requests'] for route in routes.values())
+    return {
+        'elapsed_seconds': round(elapsed, 3),
+        'requests': total,
+        'errors': sum(route['errors'] for route in routes.values()),
+        'throughput_rps': round(total / elapsed, 2),
+        'routes': routes,
+    }
+
+
+def benchmark(driver, args, workdir):
+    """Seeds a fresh database and measures one driver against it."""
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, f'{driver}.db')}",
+        'PASSWORD_HASH_METHOD': args.hash_method,
+        'METRICS_ENABLED': args.metrics,
+    })
+    data = seed(app, args)
+
+    if driver == 'client':
+        elapsed, samples = run_driver(lambda: ClientSession(app), args.flows, args.threads,
+                                      args.warmup, args.seed, data)
+        return summarize(elapsed, samples)
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no per-request access log
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.start()
+    try:
+        elapsed, samples = run_driver(lambda: HttpSession('127.0.0.1', server.server_port),
+                                      args.flows, args.threads, args.warmup, args.seed, data)
+    finally:
+        server.shutdown()
+        server_thread.join()
+        server.server_close()
+    return summarize(elapsed, samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--flights', type=int, default=2000, help='number of flights to seed')
+    parser.add_argument('--users', type=int, default=200, help='number of users to seed')
+    parser.add_argument('--bookings', type=int, default=5000, help='number of bookings to seed')
+    parser.add_argument('--flows', type=int, default=200,
+                        help='number of timed visits (login to booking history) per driver')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent travelers')
+    parser.add_argument('--warmup', type=int, default=5,
+                        help='untimed visits run before each measurement')
+    parser.add_argument('--drivers', default='client,http',
+                        help='comma-separated drivers to run (client, http)')
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:600000',
+                        help='PASSWORD_HASH_METHOD used for the seeded users')
+    parser.add_argument('--no-metrics', dest='metrics', action='store_false',
+                        help='turn off the /metrics instrumentation while measuring')
+    parser.add_argument('--seed', type=int, default=20, help='random seed for data and travelers')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    drivers = args.drivers.split(',')
+    if set(drivers) - {'client', 'http'}:
+        parser.error('--drivers accepts client and http')
+    if min(args.flights, args.users, args.flows, args.threads) < 1:
+        parser.error('--flights, --users, --flows and --threads must be positive')
+    # Seats are drawn at random, so leave plenty free on every flight
+    if args.bookings > args.flights * 80:
+        parser.error('--bookings may be at most 80 per flight')
+
+    report = {
+        'benchmark': 'booking_flow',
+        'parameters': {name: value for name, value in vars(args).items() if name != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'flask': version('flask'),
+            'sqlalchemy': version('sqlalchemy'),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'drivers': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for driver in drivers:
+            report['drivers'][driver] = benchmark(driver, args, workdir)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
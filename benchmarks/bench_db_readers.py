@@ -0,0 +1,150 @@
+"""
+Database read-scaling load test.
+
+Runs N reader processes against an on-disk SQLite database while one writer
+process keeps booking and cancelling seats, and reports total read
+throughput for each worker count. With the rollback journal every commit
+locks readers out, so throughput flatlines (and readers hit "database is
+locked"); with WAL readers proceed alongside the writer and throughput
+scales with the number of workers.
+
+Usage:
+    python -m benchmarks.bench_db_readers [--workers 1,2,4,8] [--seconds 3] [--journal delete,wal]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, event, insert, select
+from sqlalchemy.exc import OperationalError
+
+from app import db, Flight, Booking
+from config import engine_options, sqlite_pragmas
+
+FLIGHTS = 200
+SEATS_PER_FLIGHT = 20
+
+
+def make_engine(url, journal):
+    """Creates an engine configured the way the application configures its own."""
+    engine = create_engine(url, **engine_options(url))
+    pragmas = sqlite_pragmas({
+        'SQLITE_BUSY_TIMEOUT_MS': 5000,
+        'SQLITE_WAL': journal == 'wal',
+        'SQLITE_SYNCHRONOUS': 'NORMAL' if journal == 'wal' else 'FULL',
+    })
+    if journal != 'wal':
+        pragmas.append('PRAGMA journal_mode = DELETE')
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+def seed(url, journal):
+    """Creates the schema and the flights the workers read."""
+    engine = make_engine(url, journal)
+    db.metadata.create_all(engine)
+    start = datetime(2025, 1, 1, 8, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(Flight.__table__), [{
+            'flight_number': f'LT{number}',
+            'departure_airport': 'JFK',
+            'arrival_location': 'LAX',
+            'departure_time': start + timedelta(hours=number),
+            'arrival_time': start + timedelta(hours=number + 3),
+            'cost': 199.99,
+            'seats_available': SEATS_PER_FLIGHT,
+        } for number in range(FLIGHTS)])
+    engine.dispose()
+
+
+def reader(url, journal, seconds, results):
+    """Reads seat maps of random flights until time is up."""
+    engine = make_engine(url, journal)
+    rng = random.Random(os.getpid())
+    reads = errors = 0
+    deadline = time.perf_counter() + seconds
+    with engine.connect() as conn:
+        while time.perf_counter() < deadline:
+            flight_id = rng.randrange(1, FLIGHTS + 1)
+            try:
+                conn.execute(select(Booking.seat_row, Booking.seat_col)
+                             .where(Booking.flight_id == flight_id)).all()
+                conn.rollback()
+                reads += 1
+            except OperationalError:
+                conn.rollback()
+                errors += 1
+    results.put((reads, errors))
+    engine.dispose()
+
+
+def writer(url, journal, stop):
+    """Books and cancels seats continuously, one short transaction each."""
+    engine = make_engine(url, journal)
+    rng = random.Random(0)
+    while not stop.is_set():
+        flight_id = rng.randrange(1, FLIGHTS + 1)
+        row, col = divmod(rng.randrange(SEATS_PER_FLIGHT), 4)
+        seat = (Booking.flight_id == flight_id, Booking.seat_row == row, Booking.seat_col == col)
+        try:
+            with engine.begin() as conn:
+                if conn.execute(delete(Booking).where(*seat)).rowcount == 0:
+                    conn.execute(insert(Booking.__table__).values(
+                        user_email='load@example.com', flight_id=flight_id,
+                        seat_row=row, seat_col=col, seats=f'{row + 1}{"ABCD"[col]}'))
+        except OperationalError:
+            pass
+    engine.dispose()
+
+
+def run(url, journal, workers, seconds):
+    """Returns (reads per second, locked errors) for one worker count."""
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    write_process = multiprocessing.Process(target=writer, args=(url, journal, stop))
+    write_process.start()
+    readers = [multiprocessing.Process(target=reader, args=(url, journal, seconds, results))
+               for _ in range(workers)]
+    for process in readers:
+        process.start()
+    totals = [results.get() for _ in readers]
+    for process in readers:
+        process.join()
+    stop.set()
+    write_process.join()
+    return sum(reads for reads, _ in totals) / seconds, sum(errors for _, errors in totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', default='1,2,4,8',
+                        help='comma-separated reader process counts')
+    parser.add_argument('--seconds', type=float, default=3.0,
+                        help='duration of each run')
+    parser.add_argument('--journal', default='delete,wal',
+                        help='comma-separated journal modes to compare (delete, wal)')
+    args = parser.parse_args()
+
+    print(f"{'journal':<8} {'workers':>7} {'reads/s':>10} {'locked':>7}")
+    for journal in args.journal.split(','):
+        with tempfile.TemporaryDirectory() as workdir:
+            url = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+            seed(url, journal)
+            for workers in (int(count) for count in args.workers.split(',')):
+                rate, errors = run(url, journal, workers, args.seconds)
+                print(f'{journal:<8} {workers:>7} {rate:>10.0f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
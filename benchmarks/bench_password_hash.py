@@ -0,0 +1,52 @@
+"""
+Password hashing cost benchmark.
+
+Measures how many password checks (logins) per second a single core can
+verify for each candidate PASSWORD_HASH_METHOD, to help choose a cost that
+balances brute-force resistance against login throughput.
+
+Usage:
+    python -m benchmarks.bench_password_hash [--seconds 2] [--methods scrypt,pbkdf2:sha256:600000]
+"""
+import argparse
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHODS = [
+    'scrypt:32768:8:1',
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:310000',
+    'pbkdf2:sha256:100000',
+]
+
+
+def logins_per_second(method, seconds):
+    """Verifies one password hash repeatedly for `seconds` and returns the rate."""
+    stored = generate_password_hash('correct horse battery staple', method)
+    checks = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline or checks == 0:
+        check_password_hash(stored, 'correct horse battery staple')
+        checks += 1
+    return checks / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=2.0,
+                        help='time spent measuring each method')
+    parser.add_argument('--methods', default=','.join(DEFAULT_METHODS),
+                        help='comma-separated werkzeug hash methods to compare')
+    args = parser.parse_args()
+
+    print(f"{'method':<24} {'logins/s/core':>14} {'ms/login':>9}")
+    for method in args.methods.split(','):
+        rate = logins_per_second(method, args.seconds)
+        print(f'{method:<24} {rate:>14.1f} {1000 / rate:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Read model benchmark.
+
+Seeds an on-disk SQLite database with flights and bookings and reads large
+result sets two ways: as ORM instances (Flight, and Booking with its Flight
+joined-loaded), tracked by the session's identity map, and as the immutable
+FlightSummary/BookingSummary rows the display pages now use. Reports rows per
+second and the peak memory (tracemalloc) of holding each result set.
+
+Usage:
+    python -m benchmarks.bench_read_models [--sizes 1000,10000,100000] [--repeat 3]
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app import db, Booking, Flight
+from models import BookingSummary, FlightSummary, flight_summary_columns
+
+AIRPORTS = ['ATL', 'BOS', 'DEN', 'DFW', 'JFK', 'LAS', 'LAX', 'MIA', 'ORD', 'SEA', 'SFO', 'YYZ']
+CHUNK_SIZE = 50000
+
+
+def seed(engine, size, rng):
+    """Inserts `size` flights and one booking on each."""
+    db.metadata.create_all(engine)
+    first = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        for start in range(0, size, CHUNK_SIZE):
+            flights, bookings = [], []
+            for number in range(start + 1, min(start + CHUNK_SIZE, size) + 1):
+                origin, destination = rng.sample(AIRPORTS, 2)
+                departure = first + timedelta(minutes=rng.randrange(365 * 24 * 60))
+                flights.append({
+                    'id': number, 'flight_number': f'RM{number}',
+                    'departure_airport': origin, 'arrival_location': destination,
+                    'departure_time': departure, 'arrival_time': departure + timedelta(hours=3),
+                    'cost': round(rng.uniform(80, 900), 2), 'seats_available': 19,
+                })
+                bookings.append({'user_email': 'reader@example.com', 'flight_id': number,
+                                 'seat_row': 0, 'seat_col': 0, 'seats': '1A',
+                                 'booked_at': departure - timedelta(days=30)})
+            conn.execute(insert(Flight.__table__), flights)
+            conn.execute(insert(Booking.__table__), bookings)
+
+
+def orm_flights(session, size):
+    return session.execute(select(Flight).limit(size)).scalars().all()
+
+
+def summary_flights(session, size):
+    return [FlightSummary(*row)
+            for row in session.execute(select(*flight_summary_columns()).limit(size))]
+
+
+def orm_bookings(session, size):
+    return session.execute(
+        select(Booking).options(joinedload(Booking.flight))
+        .order_by(Booking.id.desc()).limit(size)
+    ).scalars().all()
+
+
+def summary_bookings(session, size):
+    statement = (
+        select(Booking.id, Booking.flight_id, Booking.seats, Booking.booked_at,
+               *flight_summary_columns())
+        .join(Flight, Booking.flight_id == Flight.id)
+        .order_by(Booking.id.desc()).limit(size)
+    )
+    return [BookingSummary(*row[:4], FlightSummary(*row[4:]))
+            for row in session.execute(statement)]
+
+
+def measure(engine, read, size, repeat):
+    """Returns (best rows per second, peak MiB) of reading `size` rows."""
+    best = 0.0
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            rows = read(session, size)
+            best = max(best, len(rows) / (time.perf_counter() - started))
+        del rows
+    gc.collect()
+    with Session(engine) as session:
+        tracemalloc.start()
+        rows = read(session, size)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del rows
+    return best, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma-separated result set sizes to read')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed reads per size and approach (the best is reported)')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    readers = [('flights', orm_flights, summary_flights),
+               ('bookings', orm_bookings, summary_bookings)]
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'reads.db')}")
+        seed(engine, sizes[-1], random.Random(24))
+
+        print(f"{'result':<9} {'rows':>7} {'orm rows/s':>11} {'dto rows/s':>11} "
+              f"{'orm MiB':>8} {'dto MiB':>8}")
+        for name, orm_read, summary_read in readers:
+            for size in sizes:
+                orm_rate, orm_peak = measure(engine, orm_read, size, args.repeat)
+                dto_rate, dto_peak = measure(engine, summary_read, size, args.repeat)
+                print(f'{name:<9} {size:>7} {orm_rate:>11.0f} {dto_rate:>11.0f} '
+                      f'{orm_peak:>8.1f} {dto_peak:>8.1f}')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
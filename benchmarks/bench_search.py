@@ -0,0 +1,122 @@
+"""
+Flight search latency benchmark.
+
+Seeds an on-disk SQLite database with a growing number of flights and times
+the search query used by `search_flights()` at each size. With the route index
+the latency should stay flat as the table grows; the legacy `ilike`/`func.date`
+predicate is timed alongside for comparison (it scans the whole table).
+
+Usage:
+    python -m benchmarks.bench_search [--sizes 10000,100000,1000000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app import db, Flight
+from models import flight_search_statement
+
+AIRPORTS = ['ATL', 'BOS', 'DEN', 'DFW', 'JFK', 'LAS', 'LAX', 'MIA', 'ORD', 'SEA', 'SFO', 'YYZ']
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 365
+CHUNK_SIZE = 50000
+
+
+def seed(engine, start, stop, rng):
+    """Inserts flights numbered [start, stop) with random routes and times."""
+    with engine.begin() as conn:
+        for chunk_start in range(start, stop, CHUNK_SIZE):
+            rows = []
+            for number in range(chunk_start, min(chunk_start + CHUNK_SIZE, stop)):
+                origin, destination = rng.sample(AIRPORTS, 2)
+                departure = datetime.combine(FIRST_DAY, datetime.min.time()) + timedelta(
+                    days=rng.randrange(DAYS), minutes=rng.randrange(24 * 60))
+                rows.append({
+                    'flight_number': f'BM{number}',
+                    'departure_airport': origin,
+                    'arrival_location': destination,
+                    'departure_time': departure,
+                    'arrival_time': departure + timedelta(hours=3),
+                    'cost': round(rng.uniform(80, 900), 2),
+                    'seats_available': 20,
+                })
+            conn.execute(insert(Flight.__table__), rows)
+
+
+def legacy_statement(departure_airport, arrival_location, departure_date):
+    """The pre-index search predicate, kept here for comparison only."""
+    return db.select(Flight).where(
+        Flight.departure_airport.ilike(departure_airport),
+        Flight.arrival_location.ilike(arrival_location),
+        db.func.date(Flight.departure_time) == departure_date.isoformat(),
+    )
+
+
+def time_queries(engine, build_statement, searches):
+    """Returns per-query latencies in milliseconds."""
+    latencies = []
+    with Session(engine) as session:
+        for origin, destination, day in searches:
+            started = time.perf_counter()
+            session.execute(build_statement(origin, destination, day)).scalars().all()
+            latencies.append((time.perf_counter() - started) * 1000)
+            session.expunge_all()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma-separated flight table sizes to measure')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='number of searches timed at each size')
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='do not time the legacy full-scan predicate')
+    args = parser.parse_args()
+
+    rng = random.Random(327)
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    searches = [
+        (*rng.sample(AIRPORTS, 2), FIRST_DAY + timedelta(days=rng.randrange(DAYS)))
+        for _ in range(args.queries)
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        db.metadata.create_all(engine)
+
+        with engine.connect() as conn:
+            plan = conn.execute(
+                text('EXPLAIN QUERY PLAN ' + str(flight_search_statement('JFK', 'LAX', FIRST_DAY)
+                                                 .compile(engine, compile_kwargs={'literal_binds': True})))
+            ).all()
+        print('Query plan:', '; '.join(row[-1] for row in plan))
+
+        print(f"{'flights':>10} {'p50 ms':>8} {'p95 ms':>8} {'legacy p50 ms':>14}")
+        seeded = 0
+        for size in sizes:
+            seed(engine, seeded, size, rng)
+            seeded = size
+            with engine.begin() as conn:
+                conn.execute(text('ANALYZE'))
+
+            latencies = sorted(time_queries(engine, flight_search_statement, searches))
+            p50 = statistics.median(latencies)
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            legacy = ''
+            if not args.skip_legacy:
+                legacy_latencies = time_queries(engine, legacy_statement, searches[:20])
+                legacy = f'{statistics.median(legacy_latencies):.2f}'
+            print(f'{size:>10} {p50:>8.3f} {p95:>8.3f} {legacy:>14}')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
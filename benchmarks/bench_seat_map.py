@@ -0,0 +1,117 @@
+"""
+Seat occupancy read benchmark.
+
+Seeds an on-disk SQLite database with flights of an A320 layout (178
+bookable seats) filled to a given number of bookings each, and times the
+read behind every seat map view: the projected (row, col) query served from
+the unique_seat_booking covering index, against the previous approach of
+loading full Booking objects and picking their coordinates.
+
+Usage:
+    python -m benchmarks.bench_seat_map [--bookings 20,100,178] [--flights 200] [--queries 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app import db, Booking, Flight
+from models import occupied_seats_statement
+
+ROWS = 30
+LETTERS = 'ABCDEF'
+BLOCKED = {(0, 0), (0, 5)}
+SEATS = [(row, col) for row in range(ROWS) for col in range(len(LETTERS))
+         if (row, col) not in BLOCKED]
+CHUNK_SIZE = 50000
+
+
+def seed(engine, flights, bookings_per_flight, rng):
+    """Creates the schema and fills every flight with the same number of bookings."""
+    db.metadata.create_all(engine)
+    departure = datetime(2025, 1, 1, 8, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(Flight.__table__), [{
+            'id': flight_id, 'flight_number': f'SM{flight_id}',
+            'departure_airport': 'JFK', 'arrival_location': 'LAX',
+            'departure_time': departure, 'arrival_time': departure + timedelta(hours=6),
+            'cost': 200.0, 'seats_available': len(SEATS) - bookings_per_flight,
+        } for flight_id in range(1, flights + 1)])
+        rows = []
+        for flight_id in range(1, flights + 1):
+            for row, col in rng.sample(SEATS, bookings_per_flight):
+                rows.append({'user_email': f'traveler{rng.randrange(1000)}@example.com',
+                             'flight_id': flight_id, 'seat_row': row, 'seat_col': col,
+                             'seats': f'{row + 1}{LETTERS[col]}', 'booked_at': departure})
+        for start in range(0, len(rows), CHUNK_SIZE):
+            conn.execute(insert(Booking.__table__), rows[start:start + CHUNK_SIZE])
+
+
+def orm_occupied_seats(session, flight_id):
+    """The previous read: full Booking objects, then their coordinates."""
+    return {
+        (booking.seat_row, booking.seat_col)
+        for booking in session.query(Booking).filter_by(flight_id=flight_id).all()
+    }
+
+
+def projected_occupied_seats(session, flight_id):
+    """The current read: (row, col) tuples only."""
+    return set(session.execute(occupied_seats_statement(flight_id)).tuples())
+
+
+def time_reads(engine, read, flight_ids):
+    """Returns per-read latencies in milliseconds."""
+    latencies = []
+    with Session(engine) as session:
+        for flight_id in flight_ids:
+            started = time.perf_counter()
+            read(session, flight_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+            # Each view runs in a fresh request session
+            session.expunge_all()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bookings', default='20,100,178',
+                        help='comma-separated bookings per flight to measure')
+    parser.add_argument('--flights', type=int, default=200,
+                        help='number of flights seeded at each size')
+    parser.add_argument('--queries', type=int, default=500,
+                        help='number of seat map reads timed per approach')
+    args = parser.parse_args()
+
+    rng = random.Random(21)
+    sizes = [int(size) for size in args.bookings.split(',')]
+    if max(sizes) > len(SEATS):
+        parser.error(f'at most {len(SEATS)} bookings fit on a flight')
+    flight_ids = [rng.randrange(1, args.flights + 1) for _ in range(args.queries)]
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = create_engine(f"sqlite:///{os.path.join(workdir, 'seats.db')}")
+            seed(engine, args.flights, size, rng)
+            if size == sizes[0]:
+                with engine.connect() as conn:
+                    plan = conn.execute(text('EXPLAIN QUERY PLAN ' + str(
+                        occupied_seats_statement(1).compile(
+                            engine, compile_kwargs={'literal_binds': True})))).all()
+                print('Query plan:', '; '.join(row[-1] for row in plan))
+                print(f"{'bookings':>8} {'orm p50 ms':>11} {'proj p50 ms':>12} {'speedup':>8}")
+
+            orm = statistics.median(time_reads(engine, orm_occupied_seats, flight_ids))
+            projected = statistics.median(time_reads(engine, projected_occupied_seats, flight_ids))
+            print(f'{size:>8} {orm:>11.3f} {projected:>12.3f} {orm / projected:>7.1f}x')
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
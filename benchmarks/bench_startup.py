@@ -0,0 +1,69 @@
+"""
+Worker startup-time benchmark.
+
+Measures, in fresh interpreter processes, how long a worker takes to become
+ready to serve: importing the application and calling create_app(), and
+calling create_app() again once the code is imported (a prefork worker of a
+preloading server). For comparison it also times create_app() followed by the
+schema creation and seeding that every process used to run at startup.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app, db, init_db
+config = {"SQLALCHEMY_DATABASE_URI": "sqlite:///" + sys.argv[1]}
+app = create_app(config)
+cold = time.perf_counter() - started
+
+started = time.perf_counter()
+create_app(config)
+warm = time.perf_counter() - started
+
+started = time.perf_counter()
+with create_app(config).app_context():
+    init_db()
+with_ddl = time.perf_counter() - started
+print(json.dumps({"cold": cold, "warm": warm, "with_ddl": with_ddl}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='number of fresh processes to measure')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for run in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            output = subprocess.run(
+                [sys.executable, '-c', PROBE, os.path.join(workdir, f'startup{run}.db')],
+                cwd=root, check=True, capture_output=True, text=True
+            ).stdout
+            samples.append(json.loads(output))
+
+    labels = {
+        'cold': 'import + create_app()',
+        'warm': 'create_app() (preloaded code)',
+        'with_ddl': 'create_app() + create_all/seed',
+    }
+    print(f"{'startup step':<32} {'median ms':>10} {'max ms':>8}")
+    for key, label in labels.items():
+        values = [sample[key] * 1000 for sample in samples]
+        print(f'{label:<32} {statistics.median(values):>10.2f} {max(values):>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+In-process caching helpers.
+
+TTLCache keeps computed values for a bounded time and can be invalidated
+explicitly when the underlying data changes. It counts hits, misses and
+evictions so the effectiveness of each cache can be monitored.
+
+Entries can be tagged (for example with the ids of the rows a value was built
+from) so that a change to one row drops exactly the entries that contain it.
+With a maxsize, the least recently used entry is evicted to make room.
+
+Every cache lives in the memory of one process. With several worker
+processes, each keeps its own entries and only drops them for changes it
+committed itself, so an entry may be stale in the other workers for up to
+the cache's ttl.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe key/value cache whose entries expire after a fixed time.
+
+    Attributes:
+    - ttl: lifetime of an entry in seconds.
+    - maxsize: number of entries kept before the least recently used one is
+      evicted; None for no limit.
+    - hits, misses, evictions: counters since the cache was created.
+
+    Methods:
+    - get_or_load: returns the cached value for a key, loading it on a miss.
+    - invalidate: drops one key, or every key when called without one.
+    - invalidate_tags: drops every entry carrying any of the given tags.
+    - stats: returns the counters as a dictionary.
+    """
+
+    def __init__(self, ttl, maxsize=None, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        # key -> (expiry time, value, tags), least recently used first
+        self._entries = OrderedDict()
+        self._tagged = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader, tags=None):
+        """
+        Returns the value cached under key, calling loader() to fill a miss.
+
+        tags, if given, is called with a loaded value and returns the tags to
+        file the new entry under.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        # Load outside the lock so a slow loader does not block other keys
+        value = loader()
+        entry_tags = frozenset(tags(value)) if tags is not None else frozenset()
+        with self._lock:
+            # Don't store a value that was loaded before an invalidation
+            if generation == self._generation:
+                self._store(key, (now + self.ttl, value, entry_tags))
+        return value
+
+    def _store(self, key, entry):
+        self._drop(key)
+        self._entries[key] = entry
+        for tag in entry[2]:
+            self._tagged.setdefault(tag, set()).add(key)
+        if self.maxsize is not None:
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def invalidate(self, key=None):
+        """Drops the entry for key, or all entries if key is None."""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+                self._tagged.clear()
+            else:
+                self._drop(key)
+
+    def invalidate_tags(self, tags):
+        """Drops every entry filed under any of the given tags."""
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._tagged.get(tag, ())):
+                    self._drop(key)
+
+    def stats(self):
+        """Returns the counters, the hit ratio and the current number of entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+            }
@@ -0,0 +1,126 @@
+"""
+Application configuration.
+
+Settings are read from the environment when this module is imported, so each
+deployment can point the application at its own database and tune the
+connection pool without code changes:
+
+- DATABASE_URL: SQLAlchemy database URL (default: sqlite:///users.db).
+- DB_POOL_SIZE, DB_MAX_OVERFLOW: connections kept open / allowed on top.
+- DB_POOL_PRE_PING: check connections before use (default: on).
+- DB_POOL_RECYCLE: seconds after which pooled connections are replaced.
+- SQLITE_WAL, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS: SQLite connection
+  pragmas applied at connect time (default: WAL, NORMAL, 5000 ms).
+- SECRET_KEY: session signing key.
+"""
+import os
+
+from sqlalchemy.engine import make_url
+
+
+def env_int(name, default, environ=os.environ):
+    """Reads an integer setting from the environment."""
+    value = environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def env_bool(name, default, environ=os.environ):
+    """Reads a boolean setting from the environment (1/true/yes/on)."""
+    value = environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_sqlite_memory(url):
+    """Checks if a database URL points at an in-memory SQLite database."""
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(url, environ=os.environ):
+    """
+    Builds SQLAlchemy engine options for a database URL from the environment.
+
+    Pool sizing does not apply to in-memory SQLite, which always uses a
+    single shared connection.
+    """
+    options = {'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True, environ)}
+    if not is_sqlite_memory(url):
+        options['pool_size'] = env_int('DB_POOL_SIZE', 10, environ)
+        options['max_overflow'] = env_int('DB_MAX_OVERFLOW', 20, environ)
+        recycle = env_int('DB_POOL_RECYCLE', -1, environ)
+        if recycle > 0:
+            options['pool_recycle'] = recycle
+    return options
+
+
+def sqlite_pragmas(config):
+    """Returns the PRAGMA statements to run on each new SQLite connection."""
+    pragmas = [f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}"]
+    if config['SQLITE_WAL']:
+        pragmas.append('PRAGMA journal_mode = WAL')
+    pragmas.append(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    return pragmas
+
+
+class Config:
+    """Default configuration, overridable through environment variables."""
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'secret')
+
+    # Database configuration
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///users.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLALCHEMY_ENGINE_OPTIONS defaults to engine_options() for the final URI,
+    # computed in create_app() once any overrides have been applied
+    SQLITE_WAL = env_bool('SQLITE_WAL', True)
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)
+
+    # werkzeug hash method and cost, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    # Worker processes for password hashing (0 hashes inline), and how many hashes
+    # may wait for a worker, for up to PASSWORD_HASH_QUEUE_TIMEOUT seconds
+    PASSWORD_HASH_WORKERS = env_int('PASSWORD_HASH_WORKERS', 0)
+    PASSWORD_HASH_QUEUE_SIZE = env_int('PASSWORD_HASH_QUEUE_SIZE', 32)
+    PASSWORD_HASH_QUEUE_TIMEOUT = 2.0
+
+    # How long a selected seat stays reserved for the user while they pay
+    SEAT_HOLD_SECONDS = env_int('SEAT_HOLD_SECONDS', 600)
+
+    # Live seat maps: seconds between keepalive comments on an idle event
+    # stream, and lifetime of a stream before the browser reconnects
+    SEAT_EVENTS_KEEPALIVE = 15
+    SEAT_EVENTS_MAX_AGE = 300
+
+    # Connecting-flight search: allowed layover window, number of itineraries
+    # returned, and how often the in-memory route graph is fully rebuilt
+    ROUTE_MIN_LAYOVER_MINUTES = env_int('ROUTE_MIN_LAYOVER_MINUTES', 45)
+    ROUTE_MAX_LAYOVER_HOURS = env_int('ROUTE_MAX_LAYOVER_HOURS', 12)
+    ROUTE_SEARCH_LIMIT = 10
+    ROUTE_GRAPH_MAX_AGE = env_int('ROUTE_GRAPH_MAX_AGE', 300)
+
+    # Airport codes of the booking page and price calendars by route and date
+    # window are cached: lifetime in seconds, and calendars kept
+    AIRPORT_CACHE_TTL = env_int('AIRPORT_CACHE_TTL', 300)
+    CALENDAR_CACHE_TTL = env_int('CALENDAR_CACHE_TTL', 300)
+    CALENDAR_CACHE_SIZE = env_int('CALENDAR_CACHE_SIZE', 1000)
+
+    # Direct flight search results cached per route and day, in each worker
+    # process: lifetime in seconds (the longest another worker's entry can be
+    # stale) and entries kept
+    SEARCH_CACHE_TTL = env_int('SEARCH_CACHE_TTL', 300)
+    SEARCH_CACHE_SIZE = env_int('SEARCH_CACHE_SIZE', 10000)
+
+    # Stream search results pages, sending each flight as it is read. Streamed
+    # pages are sent uncompressed, and a page holds at most RESULTS_PAGE_SIZE
+    # flights, so this is off unless pages get slow to read
+    SEARCH_STREAM_RESULTS = env_bool('SEARCH_STREAM_RESULTS', False)
+
+    # Request, SQL and template timings, served on /metrics
+    METRICS_ENABLED = env_bool('METRICS_ENABLED', True)
+
+    # Cache lifetime of fingerprinted static files (asset_url() links), and the
+    # smallest response body worth compressing, in bytes
+    STATIC_ASSET_MAX_AGE = 365 * 24 * 3600
+    COMPRESS_MIN_SIZE = 500
@@ -0,0 +1,75 @@
+"""
+Password hashing service.
+
+Password hashing is deliberately CPU-expensive. PasswordHasher can run it on a
+process pool so request threads are not pinned for the whole computation, and
+bounds the number of hashes waiting for a worker: when the queue is full, new
+requests wait briefly and then fail with HashingBusy instead of piling up
+behind a login storm and starving the rest of the application.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when no hashing slot frees up within the queue timeout."""
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords, inline or on a process pool.
+
+    Attributes:
+    - workers: number of worker processes, typically os.cpu_count();
+      0 hashes inline in the calling thread, without queueing.
+    - queue_size: number of hashes allowed to wait for a free worker.
+    - queue_timeout: seconds to wait for a slot before raising HashingBusy.
+
+    Methods:
+    - generate: returns a new hash of a password.
+    - check: verifies a password against a stored hash.
+    - shutdown: stops the worker processes.
+    """
+
+    def __init__(self, workers=0, queue_size=0, queue_timeout=1.0):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + queue_size) if workers else None
+
+    def generate(self, password, method):
+        """Returns the hash of password using the werkzeug method."""
+        return self._run(generate_password_hash, password, method)
+
+    def check(self, pwhash, password):
+        """Checks password against a stored werkzeug hash."""
+        return self._run(check_password_hash, pwhash, password)
+
+    def shutdown(self):
+        """Stops the worker processes, waiting for running hashes."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _run(self, function, *args):
+        if self._slots is None:
+            return function(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy('Too many password hashes are already queued')
+        try:
+            return self._get_pool().submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_pool(self):
+        # Created on first use so each forked server process starts its own pool
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
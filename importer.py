@@ -0,0 +1,152 @@
+"""
+Bulk flight schedule importer.
+
+Streams flights from a CSV or JSON-lines file and upserts them on
+flight_number in fixed-size chunks, each written with a single executemany
+INSERT ... ON CONFLICT DO UPDATE. Only one chunk is held in memory at a time,
+so memory use does not depend on the size of the file.
+
+Each record needs flight_number, departure_airport, arrival_location,
+departure_time, arrival_time (ISO 8601) and cost; an optional aircraft field
+names an AircraftConfig. Existing flights get their schedule and cost
+updated; their aircraft and seat inventory are left alone so bookings stay
+consistent.
+"""
+import csv
+import json
+import time
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import (db, AircraftConfig, Flight, DEFAULT_LAYOUT, flights_changed,
+                    normalize_airport_code)
+
+FIELDS = ('flight_number', 'departure_airport', 'arrival_location',
+          'departure_time', 'arrival_time', 'cost')
+
+# Columns refreshed when a flight_number already exists
+UPDATED_COLUMNS = ('departure_airport', 'arrival_location', 'departure_time',
+                   'arrival_time', 'cost')
+
+ImportStats = namedtuple('ImportStats', ['rows', 'skipped', 'seconds'])
+
+
+class FlightImportError(ValueError):
+    """Raised for a record that cannot be imported."""
+
+    def __init__(self, line, message):
+        super().__init__(f'Line {line}: {message}')
+        self.line = line
+
+
+def read_records(stream, file_format):
+    """
+    Yields (line number, record) pairs from a CSV or JSON-lines stream.
+
+    A JSON line that does not parse is yielded as a None record.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif file_format == 'jsonl':
+        for line, text in enumerate(stream, start=1):
+            if text.strip():
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError:
+                    record = None
+                yield line, record
+    else:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+def parse_record(line, record, capacities):
+    """Converts a raw record into column values for the flight table."""
+    if not isinstance(record, dict):
+        raise FlightImportError(line, 'not a JSON object')
+    missing = [field for field in FIELDS if record.get(field) in (None, '')]
+    if missing:
+        raise FlightImportError(line, f"missing {', '.join(missing)}")
+
+    aircraft = record.get('aircraft') or None
+    if aircraft is not None and aircraft not in capacities:
+        raise FlightImportError(line, f'unknown aircraft configuration {aircraft!r}')
+    config_id, capacity = capacities.get(aircraft, (None, DEFAULT_LAYOUT.capacity))
+    try:
+        values = {
+            'flight_number': str(record['flight_number']).strip(),
+            'departure_airport': normalize_airport_code(record['departure_airport']),
+            'arrival_location': normalize_airport_code(record['arrival_location']),
+            'departure_time': datetime.fromisoformat(record['departure_time']),
+            'arrival_time': datetime.fromisoformat(record['arrival_time']),
+            'cost': float(record['cost']),
+            'aircraft_config_id': config_id,
+            'seats_available': capacity,
+        }
+    except (TypeError, ValueError) as e:
+        raise FlightImportError(line, str(e))
+    if values['arrival_time'] <= values['departure_time']:
+        raise FlightImportError(line, 'arrival_time must be after departure_time')
+    return values
+
+
+def upsert_statement(dialect_name):
+    """Builds the INSERT ... ON CONFLICT (flight_number) DO UPDATE statement."""
+    dialects = {'sqlite': sqlite, 'postgresql': postgresql}
+    if dialect_name not in dialects:
+        raise ValueError(f'Flight import does not support the {dialect_name} dialect')
+    statement = dialects[dialect_name].insert(Flight.__table__)
+    return statement.on_conflict_do_update(
+        index_elements=['flight_number'],
+        set_={column: statement.excluded[column] for column in UPDATED_COLUMNS},
+    )
+
+
+def import_flights(stream, file_format, chunk_size=5000, skip_invalid=False):
+    """
+    Upserts every flight in stream and returns ImportStats.
+
+    Each chunk is committed on its own. Invalid records raise
+    FlightImportError, or are counted and skipped with skip_invalid.
+    """
+    started = time.perf_counter()
+    capacities = {
+        config.name: (config.id, config.layout.capacity)
+        for config in AircraftConfig.query.all()
+    }
+    statement = upsert_statement(db.engine.dialect.name)
+    rows = skipped = 0
+
+    def parsed():
+        nonlocal skipped
+        for line, record in read_records(stream, file_format):
+            try:
+                yield parse_record(line, record, capacities)
+            except FlightImportError:
+                if not skip_invalid:
+                    raise
+                skipped += 1
+
+    records = parsed()
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            db.session.execute(statement, chunk)
+            db.session.commit()
+            rows += len(chunk)
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if rows:
+            # Bulk statements bypass the ORM change tracking, so announce them
+            # here; the changed ids are unknown, so caches reload everything
+            flights_changed.send(current_app._get_current_object(), flight_ids=None)
+    return ImportStats(rows, skipped, time.perf_counter() - started)
@@ -0,0 +1,233 @@
+"""
+Request-level instrumentation.
+
+Records, per endpoint, how long requests take, how many SQL statements they
+run and how long those take, and how long each template takes to render.
+The numbers are kept in process as Prometheus-style histograms and served in
+the Prometheus text format on /metrics, without any external service or
+client library. Every response also carries a Server-Timing header with the
+same breakdown, so a single slow request can be read in the browser's
+developer tools. A streamed template finishes rendering after its headers
+are sent, so its time is recorded in the histogram but not in Server-Timing.
+
+A jump in db_statements_per_request for an endpoint is the signature of a
+new N+1 query pattern.
+
+The hit, miss and eviction counters of the application's caches are served
+alongside, read from each cache when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'http_request_duration_seconds': (
+        'histogram', 'Time spent handling a request.', LATENCY_BUCKETS),
+    'http_requests_total': (
+        'counter', 'Requests handled, by response status.', None),
+    'db_statements_per_request': (
+        'histogram', 'SQL statements executed while handling a request.', STATEMENT_BUCKETS),
+    'db_duration_seconds_per_request': (
+        'histogram', 'Time spent executing SQL while handling a request.', LATENCY_BUCKETS),
+    'template_render_seconds': (
+        'histogram', 'Time spent rendering a template.', LATENCY_BUCKETS),
+}
+
+# Series read from each watched cache's stats(): (stats key, type, description)
+CACHE_METRICS = {
+    'cache_hits_total': ('hits', 'counter', 'Lookups answered from the cache.'),
+    'cache_misses_total': ('misses', 'counter', 'Lookups that had to load the value.'),
+    'cache_evictions_total': ('evictions', 'counter', 'Entries evicted to stay within the size limit.'),
+    'cache_hit_ratio': ('hit_ratio', 'gauge', 'Share of lookups answered from the cache.'),
+    'cache_entries': ('size', 'gauge', 'Entries currently cached.'),
+}
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, with their sum and count."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yields (upper bound, observations <= bound) pairs, ending with +Inf."""
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of the application's histograms and counters.
+
+    Methods:
+    - observe: records a value in a labelled histogram.
+    - increment: adds one to a labelled counter.
+    - watch_cache: adds a cache's counters to the rendered metrics.
+    - render: returns everything in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._series = {name: {} for name in METRICS}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._series[name].get(key)
+            if histogram is None:
+                histogram = self._series[name][key] = Histogram(METRICS[name][2])
+            histogram.observe(value)
+
+    def increment(self, name, labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[name][key] = self._series[name].get(key, 0) + 1
+
+    def watch_cache(self, name, cache):
+        """Reports a cache's stats() under the label cache=name."""
+        with self._lock:
+            self._caches[name] = cache
+
+    def render(self):
+        lines = []
+        with self._lock:
+            caches = sorted(self._caches.items())
+            stats = [(name, cache.stats()) for name, cache in caches]
+            for metric, (key, kind, description) in CACHE_METRICS.items():
+                lines.append(f'# HELP {metric} {description}')
+                lines.append(f'# TYPE {metric} {kind}')
+                for name, values in stats:
+                    lines.append(f'{metric}{format_labels((("cache", name),))} {values[key]!r}')
+            for name, (kind, description, _) in METRICS.items():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} {kind}')
+                for key, value in sorted(self._series[name].items()):
+                    if kind == 'counter':
+                        lines.append(f'{name}{format_labels(key)} {value}')
+                        continue
+                    for bound, count in value.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{format_labels(key + (("le", le),))} {count}')
+                    lines.append(f'{name}_sum{format_labels(key)} {value.sum!r}')
+                    lines.append(f'{name}_count{format_labels(key)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(pairs):
+    """Formats label pairs as {name="value",...}, escaping the values."""
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def init_app(app, engine):
+    """
+    Instruments an application and its database engine and adds /metrics.
+
+    Returns the MetricsRegistry, on which caches can be watched.
+    """
+    registry = app.extensions['metrics'] = MetricsRegistry()
+
+    @app.before_request
+    def start_timer():
+        g.metrics = {'start': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0,
+                     'render_time': 0.0, 'renders': []}
+
+    @app.after_request
+    def record_request(response):
+        stats = g.pop('metrics', None)
+        if stats is not None:
+            if stats['renders']:
+                # A streamed template renders after the response is returned;
+                # keep its start so the render time is recorded when it ends
+                g.metrics_streamed = stats
+            record(stats, response.status_code)
+            response.headers['Server-Timing'] = (
+                f'db;dur={stats["sql_time"] * 1000:.1f};desc="{stats["sql_count"]} statements", '
+                f'render;dur={stats["render_time"] * 1000:.1f}, '
+                f'total;dur={(time.perf_counter() - stats["start"]) * 1000:.1f}'
+            )
+        return response
+
+    @app.teardown_request
+    def record_failure(error):
+        # Requests that raised never reach after_request
+        stats = g.pop('metrics', None)
+        if stats is not None:
+            record(stats, 500)
+
+    def record(stats, status):
+        endpoint = request.endpoint or 'unmatched'
+        labels = {'endpoint': endpoint, 'method': request.method}
+        registry.observe('http_request_duration_seconds', labels,
+                         time.perf_counter() - stats['start'])
+        registry.increment('http_requests_total', dict(labels, status=status))
+        registry.observe('db_statements_per_request', labels, stats['sql_count'])
+        registry.observe('db_duration_seconds_per_request', labels, stats['sql_time'])
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def finish_statement(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_start'].pop()
+        stats = g.get('metrics') if has_request_context() else None
+        if stats is not None:
+            stats['sql_count'] += 1
+            stats['sql_time'] += elapsed
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_statement(context):
+        if context.connection is not None:
+            starts = context.connection.info.get('metrics_start')
+            if starts:
+                starts.pop()
+
+    def start_render(sender, template, context, **extra):
+        stats = g.get('metrics') if has_request_context() else None
+        if stats is not None:
+            stats['renders'].append(time.perf_counter())
+
+    def finish_render(sender, template, context, **extra):
+        stats = None
+        if has_request_context():
+            stats = g.get('metrics') or g.get('metrics_streamed')
+        if stats is not None and stats['renders']:
+            elapsed = time.perf_counter() - stats['renders'].pop()
+            stats['render_time'] += elapsed
+            registry.observe('template_render_seconds', {'template': template.name}, elapsed)
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
+
+    def metrics():
+        """Serves the collected metrics in the Prometheus text format."""
+        return app.response_class(registry.render(),
+                                  mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return registry
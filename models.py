@@ -0,0 +1,924 @@
+"""
+Data model of the Flight Ticket Booking System.
+
+Defines the SQLAlchemy models (users, aircraft configurations, flights,
+bookings and seat holds) together with the data-access operations the views
+build on: flight search, seat availability, holds and atomic booking. The
+`db` extension is bound to an application by `create_app()` in app.py.
+"""
+from flask import current_app
+from flask_sqlalchemy import SQLAlchemy
+from blinker import Namespace
+from sqlalchemy import event, inspect, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import validates
+from werkzeug.security import generate_password_hash
+from collections import namedtuple
+from datetime import datetime, timedelta
+from enum import Enum
+from functools import lru_cache
+from seating import get_layout
+from caching import TTLCache
+from hashing import PasswordHasher
+from routing import Leg, RouteGraph
+from seat_events import SeatEventBroker, SeatUpdate
+
+# Initialize SQLAlchemy; bound to the application in create_app()
+db = SQLAlchemy()
+
+# Seat layout used by flights without an aircraft configuration
+DEFAULT_LAYOUT = get_layout(5, 'AB CD')
+
+# Signals sent after a commit that changed data other components cache
+signals = Namespace()
+flights_changed = signals.signal('flights-changed')
+seats_changed = signals.signal('seats-changed')
+
+def get_airport_cache():
+    """
+    Returns the application's cache of the airport codes offered on the
+    booking page, creating it on first use. It holds the one code list for
+    AIRPORT_CACHE_TTL seconds and is refreshed when flights change.
+    """
+    cache = current_app.extensions.get('airport_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('airport_cache', TTLCache(
+            ttl=current_app.config['AIRPORT_CACHE_TTL'], maxsize=1))
+    return cache
+
+def get_calendar_cache():
+    """
+    Returns the application's price calendar cache, creating it on first use.
+
+    Calendars are cached by route and date window for CALENDAR_CACHE_TTL
+    seconds, at most CALENDAR_CACHE_SIZE of them, and are refreshed when
+    flights or seat inventory change.
+    """
+    cache = current_app.extensions.get('calendar_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('calendar_cache', TTLCache(
+            ttl=current_app.config['CALENDAR_CACHE_TTL'],
+            maxsize=current_app.config['CALENDAR_CACHE_SIZE']))
+    return cache
+
+def get_search_cache():
+    """
+    Returns the application's flight search cache, creating it on first use.
+
+    Entries live SEARCH_CACHE_TTL seconds and at most SEARCH_CACHE_SIZE of them
+    are kept, in this process.
+    """
+    cache = current_app.extensions.get('search_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('search_cache', TTLCache(
+            ttl=current_app.config['SEARCH_CACHE_TTL'],
+            maxsize=current_app.config['SEARCH_CACHE_SIZE']))
+    return cache
+
+def get_password_hasher():
+    """Returns the application's password hashing service, creating it on first use."""
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None:
+        hasher = current_app.extensions.setdefault('password_hasher', PasswordHasher(
+            workers=current_app.config['PASSWORD_HASH_WORKERS'],
+            queue_size=current_app.config['PASSWORD_HASH_QUEUE_SIZE'],
+            queue_timeout=current_app.config['PASSWORD_HASH_QUEUE_TIMEOUT'],
+        ))
+    return hasher
+
+# User Model
+class User(db.Model):
+    """
+    Represents a user account in the system.
+
+    Attributes:
+    - email: unique identifier for the user.
+    - password: hashed password for secure authentication.
+    - created_at: timestamp of account creation.
+
+    Methods:
+    - set_password: hashes and sets the user's password.
+    - check_password: verifies the provided password, upgrading outdated hashes.
+    - password_needs_rehash: checks if the hash uses outdated parameters.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(255), unique=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def set_password(self, password):
+        """
+        Hashes and sets the password for secure storage.
+
+        Raises HashingBusy if the hashing service is saturated.
+        """
+        self.password = get_password_hasher().generate(
+            password, current_app.config['PASSWORD_HASH_METHOD'])
+
+    def check_password(self, password):
+        """
+        Verifies the provided password against the stored hash.
+
+        When the password is correct but was hashed with outdated parameters,
+        it is rehashed with the configured method; the caller commits.
+        Raises HashingBusy if the hashing service is saturated.
+        """
+        if not get_password_hasher().check(self.password, password):
+            return False
+        if self.password_needs_rehash():
+            self.set_password(password)
+        return True
+
+    def password_needs_rehash(self):
+        """Checks if the stored hash differs from the configured method and cost."""
+        method = self.password.split('$', 1)[0]
+        return method != password_hash_parameters(current_app.config['PASSWORD_HASH_METHOD'])
+
+@lru_cache(maxsize=8)
+def password_hash_parameters(method):
+    """Returns the fully expanded parameters werkzeug records for a hash method."""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+# Aircraft Configuration Model
+class AircraftConfig(db.Model):
+    """
+    Represents the cabin layout of an aircraft type.
+
+    Attributes:
+    - name: unique configuration name (e.g., A320-180).
+    - rows: number of seat rows.
+    - seat_letters: seat letters of a row, with spaces for aisles (e.g., "ABC DEF").
+    - blocked_seats: comma-separated labels of seats that cannot be sold.
+    - premium_rows: number of premium rows at the front of the cabin.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    rows = db.Column(db.Integer, nullable=False)
+    seat_letters = db.Column(db.String(20), nullable=False)
+    blocked_seats = db.Column(db.String(255), nullable=False, default='')
+    premium_rows = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def layout(self):
+        """The shared, precomputed seat layout for this configuration."""
+        return get_layout(self.rows, self.seat_letters, self.blocked_seats or '',
+                          self.premium_rows or 0)
+
+    def __repr__(self):
+        return f'<AircraftConfig {self.name}>'
+
+# Flight Model
+class Flight(db.Model):
+    """
+    Represents a flight in the system.
+
+    Attributes:
+    - flight_number: unique identifier for the flight.
+    - departure_airport, arrival_location: location details.
+    - departure_time, arrival_time: scheduling information.
+    - cost: ticket price.
+    - aircraft_config: cabin layout flown (the default 5x4 layout if unset).
+    - seats_available: number of unbooked seats, kept in step with Booking.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    flight_number = db.Column(db.String(50), unique=True, nullable=False)
+    departure_airport = db.Column(db.String(255), nullable=False)
+    arrival_location = db.Column(db.String(255), nullable=False)
+    departure_time = db.Column(db.DateTime, nullable=False)
+    arrival_time = db.Column(db.DateTime, nullable=False)
+    cost = db.Column(db.Float, nullable=False)
+    aircraft_config_id = db.Column(db.Integer, db.ForeignKey('aircraft_config.id'))
+    seats_available = db.Column(db.Integer, nullable=False)
+
+    aircraft_config = db.relationship('AircraftConfig')
+
+    # Serves route searches: equality on both airports plus a departure range
+    __table_args__ = (
+        db.Index('ix_flight_route_departure',
+                 'departure_airport', 'arrival_location', 'departure_time'),
+    )
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.aircraft_config is None and self.aircraft_config_id is not None:
+            self.aircraft_config = db.session.get(AircraftConfig, self.aircraft_config_id)
+        if self.seats_available is None:
+            self.seats_available = self.layout.capacity
+
+    @validates('departure_airport', 'arrival_location')
+    def validate_airport(self, key, code):
+        """Stores airport codes normalized so searches can match them exactly."""
+        return normalize_airport_code(code)
+
+    @property
+    def layout(self):
+        """The seat layout of the aircraft flying this flight."""
+        if self.aircraft_config is None:
+            return DEFAULT_LAYOUT
+        return self.aircraft_config.layout
+
+    def __repr__(self):
+        return f'<Flight {self.flight_number}>'
+
+def normalize_airport_code(code):
+    """Normalizes an airport code to its canonical uppercase form."""
+    return code.strip().upper() if code else code
+
+# Booking Model
+class Booking(db.Model):
+    """
+    Represents a flight booking made by a user.
+
+    Attributes:
+    - user_email: email of the booking user.
+    - flight_id: associated flight ID.
+    - seat_row, seat_col: booked seat location.
+    - booked_at: booking timestamp.
+    - seats: seat label (e.g., 2A).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_email = db.Column(db.String(255), nullable=False)
+    flight_id = db.Column(db.Integer, db.ForeignKey('flight.id'), nullable=False)
+    seat_row = db.Column(db.Integer, nullable=False)
+    seat_col = db.Column(db.Integer, nullable=False)
+    booked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    seats = db.Column(db.String(10), nullable=False)
+
+    def __repr__(self):
+        return f'<Booking {self.id} - Flight {self.flight_id} Seat {self.seats}>'
+    flight = db.relationship('Flight', backref='bookings')
+    
+    __table_args__ = (
+        # Also the covering index of the seat map's occupancy read
+        db.UniqueConstraint('flight_id', 'seat_row', 'seat_col', 
+                          name='unique_seat_booking'),
+        # Serves a user's booking history, newest first, page by page
+        db.Index('ix_booking_user_email_id', 'user_email', 'id'),
+    )
+
+# Seat Hold Model
+class SeatHold(db.Model):
+    """
+    Represents a short-lived reservation of a seat between selection and payment.
+
+    Attributes:
+    - flight_id: associated flight ID.
+    - seat_row, seat_col: held seat location.
+    - user_email: email of the user holding the seat.
+    - expires_at: time after which the hold no longer reserves the seat.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    flight_id = db.Column(db.Integer, db.ForeignKey('flight.id'), nullable=False)
+    seat_row = db.Column(db.Integer, nullable=False)
+    seat_col = db.Column(db.Integer, nullable=False)
+    user_email = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('flight_id', 'seat_row', 'seat_col',
+                            name='unique_seat_hold'),
+    )
+
+    def __repr__(self):
+        return f'<SeatHold Flight {self.flight_id} Seat {self.seat_row},{self.seat_col}>'
+
+def upgrade_schema():
+    """
+    Brings a database created by an earlier version up to the current schema.
+
+    db.create_all() only creates missing tables. For a flight table from before
+    seat inventories and aircraft configurations, this adds aircraft_config_id
+    and seats_available, with the seats left set to the default layout's
+    capacity minus the flight's bookings, and drops the old JSON seats map.
+    The flight and booking indexes are created if they are missing.
+    """
+    columns = {column['name'] for column in inspect(db.engine).get_columns('flight')}
+    with db.engine.begin() as conn:
+        if 'aircraft_config_id' not in columns:
+            conn.execute(db.text('ALTER TABLE flight ADD COLUMN aircraft_config_id INTEGER '
+                                 'REFERENCES aircraft_config (id)'))
+        if 'seats_available' not in columns:
+            conn.execute(db.text('ALTER TABLE flight ADD COLUMN seats_available INTEGER '
+                                 'NOT NULL DEFAULT 0'))
+            booked = (db.select(db.func.count(Booking.id))
+                      .where(Booking.flight_id == Flight.id).scalar_subquery())
+            conn.execute(db.update(Flight).values(
+                seats_available=DEFAULT_LAYOUT.capacity - booked))
+        if 'seats' in columns:
+            conn.execute(db.text('ALTER TABLE flight DROP COLUMN seats'))
+        for table in (Flight.__table__, Booking.__table__):
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+@event.listens_for(db.session, 'after_flush')
+def track_flight_changes(session, flush_context):
+    """Remembers which Flight rows, and which routes and days, a flush touched."""
+    changed = [obj for obj in (*session.new, *session.dirty, *session.deleted)
+               if isinstance(obj, Flight)]
+    if changed:
+        session.info.setdefault('flights_changed', set()).update(obj.id for obj in changed)
+        routes = session.info.setdefault('routes_changed', set())
+        for obj in changed:
+            routes.update(flight_route_days(obj))
+
+def flight_route_days(flight):
+    """
+    Returns the (departure airport, arrival location, day) search keys of a
+    flight, both as it is now and as it was before the pending changes.
+    """
+    attrs = inspect(flight).attrs
+    values = [
+        [value for value in (*history.unchanged, *history.added, *history.deleted)
+         if value is not None]
+        for history in (attrs.departure_airport.history, attrs.arrival_location.history,
+                        attrs.departure_time.history)
+    ]
+    return {(origin, destination, departure.date())
+            for origin in values[0] for destination in values[1] for departure in values[2]}
+
+@event.listens_for(db.session, 'after_flush')
+def track_booking_changes(session, flush_context):
+    """Records the seats that a flush booked or freed, for live seat maps."""
+    updates = [
+        SeatUpdate(obj.flight_id, obj.seat_row, obj.seat_col, obj.seats, status)
+        for objects, status in ((session.new, 'booked'), (session.deleted, 'available'))
+        for obj in objects if isinstance(obj, Booking)
+    ]
+    if updates:
+        session.info.setdefault('seat_updates', []).extend(updates)
+
+@event.listens_for(db.session, 'after_commit')
+def announce_flight_changes(session):
+    """
+    Sends flights_changed once the flight changes are committed.
+
+    Receivers get the ids of the changed flights as flight_ids, and the
+    (departure airport, arrival location, day) keys they were or are now
+    listed under as routes; senders that cannot tell which flights changed
+    (such as bulk imports) pass flight_ids=None.
+    """
+    changed = session.info.pop('flights_changed', None)
+    routes = session.info.pop('routes_changed', set())
+    if changed:
+        flights_changed.send(current_app._get_current_object(), flight_ids=frozenset(changed),
+                             routes=frozenset(routes))
+    changed = session.info.pop('seats_changed', set())
+    updates = tuple(session.info.pop('seat_updates', ()))
+    if changed or updates:
+        changed |= {update.flight_id for update in updates}
+        seats_changed.send(current_app._get_current_object(), flight_ids=frozenset(changed),
+                           updates=updates)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_flight_changes(session):
+    """Forgets flight and seat inventory changes that were rolled back."""
+    session.info.pop('flights_changed', None)
+    session.info.pop('routes_changed', None)
+    session.info.pop('seats_changed', None)
+    session.info.pop('seat_updates', None)
+
+def track_seat_changes(flight_id):
+    """Remembers that the current transaction changed a flight's seat inventory."""
+    db.session.info.setdefault('seats_changed', set()).add(flight_id)
+
+@flights_changed.connect
+def invalidate_airport_codes(sender, **extra):
+    """Drops the cached airport codes so the next page view reloads them."""
+    cache = sender.extensions.get('airport_cache')
+    if cache is not None:
+        cache.invalidate()
+
+@flights_changed.connect
+@seats_changed.connect
+def invalidate_price_calendars(sender, flight_ids=None, routes=(), **extra):
+    """
+    Drops the cached price calendars a change affects: those counting a
+    changed flight, and those whose window covers a route and day a flight
+    moved to or from.
+    """
+    cache = sender.extensions.get('calendar_cache')
+    if cache is None:
+        return
+    if flight_ids is None:
+        cache.invalidate()
+        return
+    cache.invalidate_tags(flight_ids)
+    cache.invalidate_tags(routes)
+
+@flights_changed.connect
+@seats_changed.connect
+def invalidate_flight_searches(sender, flight_ids=None, routes=(), **extra):
+    """
+    Drops the cached searches a change affects: those listing a changed
+    flight, and those of the routes and days a flight moved to or from.
+    """
+    cache = sender.extensions.get('search_cache')
+    if cache is None:
+        return
+    if flight_ids is None:
+        cache.invalidate()
+        return
+    cache.invalidate_tags(flight_ids)
+    for route in routes:
+        cache.invalidate(route)
+
+@seats_changed.connect
+def publish_seat_updates(sender, updates=(), **extra):
+    """Pushes committed seat updates to the clients watching each flight."""
+    broker = sender.extensions.get('seat_events')
+    if broker is not None:
+        for update in updates:
+            broker.publish(update)
+
+def get_seat_event_broker():
+    """Returns the application's live seat update broker, creating it on first use."""
+    broker = current_app.extensions.get('seat_events')
+    if broker is None:
+        broker = current_app.extensions.setdefault('seat_events', SeatEventBroker())
+    return broker
+
+@flights_changed.connect
+@seats_changed.connect
+def queue_route_changes(sender, flight_ids=None, **extra):
+    """
+    Queues changed flights for reloading into the application's route graph.
+
+    Seat inventory changes are queued too, so the legs' seat counts stay current.
+    """
+    graph = sender.extensions.get('route_graph')
+    if graph is not None:
+        graph.mark_changed(flight_ids)
+
+def load_airport_codes():
+    """Returns the sorted airport codes served by any flight."""
+    departures = db.select(Flight.departure_airport)
+    arrivals = db.select(Flight.arrival_location)
+    codes = db.session.execute(departures.union(arrivals)).scalars()
+    return tuple(sorted(codes))
+
+def get_airport_codes():
+    """Returns the airport codes from the catalogue cache."""
+    return get_airport_cache().get_or_load('codes', load_airport_codes)
+
+def load_route_legs(flight_ids=None):
+    """Returns the route graph legs of the given flights, or of every flight."""
+    statement = db.select(Flight.id, Flight.flight_number, Flight.departure_airport,
+                          Flight.arrival_location, Flight.departure_time,
+                          Flight.arrival_time, Flight.cost, Flight.seats_available)
+    if flight_ids is not None:
+        statement = statement.where(Flight.id.in_(flight_ids))
+    return [Leg(*row) for row in db.session.execute(statement)]
+
+def get_route_graph():
+    """Returns the application's route graph, brought up to date with the schedule."""
+    graph = current_app.extensions.get('route_graph')
+    if graph is None:
+        graph = current_app.extensions.setdefault(
+            'route_graph', RouteGraph(max_age=current_app.config['ROUTE_GRAPH_MAX_AGE']))
+    graph.refresh(load_route_legs)
+    return graph
+
+def search_itineraries(departure_airport, arrival_location, departure_date,
+                       max_stops=2, sort='cost', seats_left=False):
+    """
+    Finds direct and connecting itineraries departing on a given day.
+
+    Connections must leave between ROUTE_MIN_LAYOVER_MINUTES and
+    ROUTE_MAX_LAYOVER_HOURS after the previous leg lands. Returns up to
+    ROUTE_SEARCH_LIMIT itineraries ranked by total cost or duration. With
+    seats_left, only itineraries whose every leg has a seat left are returned.
+    """
+    day_start = datetime.combine(departure_date, datetime.min.time())
+    config = current_app.config
+    return get_route_graph().search(
+        normalize_airport_code(departure_airport),
+        normalize_airport_code(arrival_location),
+        day_start, day_start + timedelta(days=1),
+        max_stops=max_stops,
+        min_layover=timedelta(minutes=config['ROUTE_MIN_LAYOVER_MINUTES']),
+        max_layover=timedelta(hours=config['ROUTE_MAX_LAYOVER_HOURS']),
+        sort=sort,
+        limit=config['ROUTE_SEARCH_LIMIT'],
+        seats_left=seats_left,
+    )
+
+def occupied_seats_statement(flight_id):
+    """
+    Builds the query for the booked (row, col) positions of a flight.
+
+    Only the coordinates are selected, so the query is answered from the
+    unique_seat_booking index alone (flight_id, seat_row, seat_col) without
+    reading the booking rows.
+    """
+    return db.select(Booking.seat_row, Booking.seat_col).where(Booking.flight_id == flight_id)
+
+def get_occupied_seats(flight_id):
+    """
+    Returns the set of (row, col) positions already booked on a flight.
+
+    The positions come back as plain tuples, not Booking objects, so no
+    identity map or attribute state is built for them. This is a read-only
+    view: rendering the seat map never opens a write transaction.
+    """
+    return set(db.session.execute(occupied_seats_statement(flight_id)).tuples())
+
+def get_held_seats(flight_id, user_email=None):
+    """
+    Returns the set of (row, col) positions held by other users on a flight.
+
+    Expired holds are ignored rather than deleted, so this stays read-only;
+    they are removed when the seat is next held or booked, or by the sweeper.
+    """
+    query = db.session.query(SeatHold.seat_row, SeatHold.seat_col).filter(
+        SeatHold.flight_id == flight_id,
+        SeatHold.expires_at > datetime.utcnow()
+    )
+    if user_email is not None:
+        query = query.filter(SeatHold.user_email != user_email)
+    return {(row, col) for row, col in query}
+
+def hold_seat(flight, user_email, seat_row, seat_col):
+    """
+    Holds a seat for a user for SEAT_HOLD_SECONDS.
+
+    Any other hold the user has on the flight is released, so each user holds
+    at most one seat per flight. Returns the new SeatHold, or None if the seat
+    is booked or actively held by someone else.
+    """
+    now = datetime.utcnow()
+    seat = (SeatHold.flight_id == flight.id, SeatHold.seat_row == seat_row,
+            SeatHold.seat_col == seat_col)
+    db.session.execute(db.delete(SeatHold).where(
+        SeatHold.flight_id == flight.id, SeatHold.user_email == user_email))
+    db.session.execute(db.delete(SeatHold).where(*seat, SeatHold.expires_at <= now))
+
+    if db.session.execute(db.select(Booking.id).filter_by(
+            flight_id=flight.id, seat_row=seat_row, seat_col=seat_col)).first():
+        db.session.rollback()
+        return None
+
+    hold = SeatHold(
+        flight_id=flight.id,
+        seat_row=seat_row,
+        seat_col=seat_col,
+        user_email=user_email,
+        expires_at=now + timedelta(seconds=current_app.config['SEAT_HOLD_SECONDS'])
+    )
+    try:
+        db.session.add(hold)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None
+    return hold
+
+def sweep_expired_holds():
+    """Deletes every expired seat hold and returns how many were removed."""
+    result = db.session.execute(
+        db.delete(SeatHold).where(SeatHold.expires_at <= datetime.utcnow()))
+    db.session.commit()
+    return result.rowcount
+
+def flight_search_statement(departure_airport, arrival_location, departure_date,
+                            seats_left=False):
+    """
+    Builds the query for flights on a route departing on a given day.
+
+    Airport codes are compared for equality against their normalized form and
+    the day is expressed as a half-open departure_time range, so the query is
+    answered from ix_flight_route_departure instead of scanning the table.
+    With seats_left, sold-out flights are filtered on the seats_available
+    counter, without reading any bookings.
+    """
+    day_start = datetime.combine(departure_date, datetime.min.time())
+    statement = (
+        db.select(Flight)
+        .where(
+            Flight.departure_airport == normalize_airport_code(departure_airport),
+            Flight.arrival_location == normalize_airport_code(arrival_location),
+            Flight.departure_time >= day_start,
+            Flight.departure_time < day_start + timedelta(days=1),
+        )
+        .order_by(Flight.departure_time)
+    )
+    if seats_left:
+        statement = statement.where(Flight.seats_available > 0)
+    return statement
+
+# Read models: immutable rows selected with Core for pages that only display
+# data, so no identity map entries or change tracking are built for them
+FlightSummary = namedtuple('FlightSummary', [
+    'id', 'flight_number', 'departure_airport', 'arrival_location',
+    'departure_time', 'arrival_time', 'cost', 'seats_available',
+])
+BookingSummary = namedtuple('BookingSummary', ['id', 'flight_id', 'seats', 'booked_at', 'flight'])
+FlightSeating = namedtuple('FlightSeating', ['id', 'flight_number', 'seats_available', 'layout'])
+
+def flight_summary_columns():
+    """Returns the Flight columns of a FlightSummary, in field order."""
+    return [getattr(Flight, field) for field in FlightSummary._fields]
+
+def find_flights(departure_airport, arrival_location, departure_date, seats_left=False):
+    """
+    Returns the FlightSummary rows of the flights on a route and day.
+
+    Results are cached per normalized (departure airport, arrival location,
+    day) and dropped when a flight on that route and day is added, changed
+    or removed, or its seat inventory changes. With seats_left, sold-out
+    flights are left out of the cached list.
+    """
+    key = (normalize_airport_code(departure_airport), normalize_airport_code(arrival_location),
+           departure_date)
+
+    def load():
+        statement = flight_search_statement(*key).with_only_columns(*flight_summary_columns())
+        return tuple(FlightSummary(*row) for row in db.session.execute(statement))
+
+    flights = get_search_cache().get_or_load(
+        key, load, tags=lambda rows: (row.id for row in rows))
+    if seats_left:
+        return [flight for flight in flights if flight.seats_available > 0]
+    return list(flights)
+
+# Orders of direct search results; ties are broken by flight id
+RESULT_ORDERS = {
+    'departure_time': lambda flight: (flight.departure_time, flight.id),
+    'cost': lambda flight: (flight.cost, flight.id),
+}
+
+class FlightPage:
+    """
+    One page of FlightSummary search results, produced lazily.
+
+    Iterating yields the page's rows as they are read, so a streamed results
+    page can send each one as soon as it arrives. The rows source holds at
+    most limit + 1 rows; the extra one only tells that another page follows,
+    and next_cursor is set once iteration reaches it.
+    """
+
+    def __init__(self, rows, limit, order):
+        self.limit = limit
+        self.order = order
+        self.next_cursor = None
+        self._rows = iter(rows)
+        self._first = next(self._rows, None)
+
+    def __bool__(self):
+        return self._first is not None
+
+    def __iter__(self):
+        if self._first is None:
+            return
+        previous = self._first
+        yield previous
+        for index, flight in enumerate(self._rows, 1):
+            if index < self.limit:
+                yield flight
+                previous = flight
+            else:
+                self.next_cursor = encode_result_cursor(previous, self.order)
+
+def encode_result_cursor(flight, order):
+    """Returns the cursor of the page that starts after flight."""
+    value = flight.departure_time.isoformat() if order == 'departure_time' else repr(flight.cost)
+    return f'{value}_{flight.id}'
+
+def decode_result_cursor(cursor, order):
+    """Returns the (sort value, id) key of a cursor; raises ValueError if it is malformed."""
+    value, flight_id = cursor.rsplit('_', 1)
+    if order == 'departure_time':
+        value = datetime.fromisoformat(value)
+        # Departure times are stored naive and cannot be compared with an offset
+        if value.tzinfo is not None:
+            raise ValueError(f'Unexpected timezone in cursor: {cursor!r}')
+        return value, int(flight_id)
+    return float(value), int(flight_id)
+
+def search_flight_page(departure_airport, arrival_location, first_day, days=1,
+                       order='departure_time', after=None, limit=50, seats_left=False):
+    """
+    Returns a FlightPage of the direct flights on a route over `days` days.
+
+    Pages are keyset-paginated on (order column, id): `after` is the
+    next_cursor of the previous page. One-day searches are served from the
+    cached find_flights() list; longer ones, such as a month view, query
+    ix_flight_route_departure for just the rows of the page. Raises
+    ValueError for an unknown order or a malformed cursor.
+    """
+    if order not in RESULT_ORDERS:
+        raise ValueError(f'Unsupported result order: {order}')
+    key = decode_result_cursor(after, order) if after else None
+
+    if days == 1:
+        flights = sorted(find_flights(departure_airport, arrival_location, first_day,
+                                      seats_left=seats_left), key=RESULT_ORDERS[order])
+        if key is not None:
+            flights = [flight for flight in flights if RESULT_ORDERS[order](flight) > key]
+        return FlightPage(flights[:limit + 1], limit, order)
+
+    day_start = datetime.combine(first_day, datetime.min.time())
+    order_column = getattr(Flight, order)
+    statement = (
+        db.select(*flight_summary_columns())
+        .where(
+            Flight.departure_airport == normalize_airport_code(departure_airport),
+            Flight.arrival_location == normalize_airport_code(arrival_location),
+            Flight.departure_time >= day_start,
+            Flight.departure_time < day_start + timedelta(days=days),
+        )
+        .order_by(order_column, Flight.id)
+        .limit(limit + 1)
+    )
+    if seats_left:
+        statement = statement.where(Flight.seats_available > 0)
+    if key is not None:
+        statement = statement.where(tuple_(order_column, Flight.id) > tuple_(*key))
+    rows = db.session.execute(statement)
+    return FlightPage((FlightSummary(*row) for row in rows), limit, order)
+
+def get_flight_seating(flight_id):
+    """
+    Returns the FlightSeating of a flight, with its seat layout, or None if
+    there is no such flight. The flight and its aircraft configuration are
+    read in one query.
+    """
+    row = db.session.execute(
+        db.select(Flight.id, Flight.flight_number, Flight.seats_available,
+                  AircraftConfig.rows, AircraftConfig.seat_letters,
+                  AircraftConfig.blocked_seats, AircraftConfig.premium_rows)
+        .outerjoin(AircraftConfig, Flight.aircraft_config_id == AircraftConfig.id)
+        .where(Flight.id == flight_id)
+    ).first()
+    if row is None:
+        return None
+    layout = DEFAULT_LAYOUT
+    if row.rows is not None:
+        layout = get_layout(row.rows, row.seat_letters, row.blocked_seats or '',
+                            row.premium_rows or 0)
+    return FlightSeating(row.id, row.flight_number, row.seats_available, layout)
+
+def get_booking_history(user_email, before=None, limit=20):
+    """
+    Returns a page of a user's bookings, newest first, and the cursor of the next page.
+
+    Keyset pagination: a page holds the `limit` bookings with ids below
+    `before` (or the newest ones), read together with their flights in one
+    query on ix_booking_user_email_id. The cursor is None on the last page.
+    """
+    statement = (
+        db.select(Booking.id, Booking.flight_id, Booking.seats, Booking.booked_at,
+                  *flight_summary_columns())
+        .join(Flight, Booking.flight_id == Flight.id)
+        .where(Booking.user_email == user_email)
+        .order_by(Booking.id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        statement = statement.where(Booking.id < before)
+    bookings = [BookingSummary(*row[:4], FlightSummary(*row[4:]))
+                for row in db.session.execute(statement)]
+
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        return bookings, bookings[-1].id
+    return bookings, None
+
+CalendarDay = namedtuple('CalendarDay', ['day', 'min_cost', 'seats_available', 'flights'])
+
+def price_calendar_statement(departure_airport, arrival_location, start_date, days):
+    """
+    Builds the grouped query behind a route's price calendar.
+
+    One row per departure day in [start_date, start_date + days) that has
+    flights: the lowest cost among flights with seats left (NULL when the day
+    is sold out), the seats left across the day and the number of flights.
+    The route and date range are answered from ix_flight_route_departure.
+    """
+    day = db.func.date(Flight.departure_time, type_=db.Date).label('day')
+    return (
+        db.select(
+            day,
+            db.func.min(db.case((Flight.seats_available > 0, Flight.cost))),
+            db.func.sum(Flight.seats_available),
+            db.func.count(Flight.id),
+        )
+        .where(*route_window(departure_airport, arrival_location, start_date, days))
+        .group_by(day)
+        .order_by(day)
+    )
+
+def route_window(departure_airport, arrival_location, start_date, days):
+    """Returns the conditions selecting a route's flights in [start_date, start_date + days)."""
+    window_start = datetime.combine(start_date, datetime.min.time())
+    return (
+        Flight.departure_airport == normalize_airport_code(departure_airport),
+        Flight.arrival_location == normalize_airport_code(arrival_location),
+        Flight.departure_time >= window_start,
+        Flight.departure_time < window_start + timedelta(days=days),
+    )
+
+def get_price_calendar(departure_airport, arrival_location, start_date, days):
+    """
+    Returns the CalendarDay rows of a route and window, from the calendar cache.
+
+    Each calendar is tagged with the ids of the flights it counts and with the
+    (departure airport, arrival location, day) keys of its window, so a
+    booking or a flight change only drops the calendars that include it.
+    """
+    key = (normalize_airport_code(departure_airport), normalize_airport_code(arrival_location),
+           start_date, days)
+    flight_ids = []
+
+    def load():
+        flight_ids.extend(db.session.execute(db.select(Flight.id).where(*route_window(*key)))
+                          .scalars())
+        statement = price_calendar_statement(*key)
+        return tuple(CalendarDay(*row) for row in db.session.execute(statement))
+
+    def tags(calendar):
+        route_days = (key[:2] + (start_date + timedelta(days=offset),) for offset in range(days))
+        return (*flight_ids, *route_days)
+
+    return get_calendar_cache().get_or_load(key, load, tags=tags)
+
+def reserve_seat(flight_id):
+    """
+    Takes one seat out of a flight's inventory.
+
+    The counter is decremented in place with a single conditional UPDATE, so
+    the write does not depend on the size of the aircraft. Returns False if
+    the flight has no seats left. The caller commits together with the
+    Booking insert, keeping both in the same transaction.
+    """
+    result = db.session.execute(
+        db.update(Flight)
+        .where(Flight.id == flight_id, Flight.seats_available > 0)
+        .values(seats_available=Flight.seats_available - 1)
+    )
+    if result.rowcount != 1:
+        return False
+    track_seat_changes(flight_id)
+    return True
+
+class BookingOutcome(Enum):
+    """Result of an attempt to book a seat."""
+    BOOKED = 'booked'
+    SEAT_TAKEN = 'seat_taken'
+    SOLD_OUT = 'sold_out'
+    INVALID_SEAT = 'invalid_seat'
+
+BookingResult = namedtuple('BookingResult', ['outcome', 'booking'])
+
+def book_seat(flight, user_email, seat_row, seat_col):
+    """
+    Books a seat on a flight as one atomic transaction.
+
+    The Booking insert and the inventory decrement either both commit or
+    both roll back. A seat that is already taken is detected by the
+    unique_seat_booking constraint at insert time rather than by a separate
+    read, so concurrent attempts on the same seat fail fast instead of
+    racing. The user's own hold on the seat is consumed, while an active
+    hold by someone else makes the seat count as taken. Returns a
+    BookingResult whose outcome the caller can render.
+    """
+    layout = flight.layout
+    if seat_row is None or seat_col is None or not layout.is_bookable(seat_row, seat_col):
+        return BookingResult(BookingOutcome.INVALID_SEAT, None)
+
+    booking = Booking(
+        user_email=user_email,
+        flight_id=flight.id,
+        seats=layout.label(seat_row, seat_col),
+        seat_row=seat_row,
+        seat_col=seat_col
+    )
+    seat = (SeatHold.flight_id == flight.id, SeatHold.seat_row == seat_row,
+            SeatHold.seat_col == seat_col)
+    try:
+        db.session.execute(db.delete(SeatHold).where(
+            *seat,
+            (SeatHold.user_email == user_email) | (SeatHold.expires_at <= datetime.utcnow())
+        ))
+        if db.session.query(SeatHold.id).filter(*seat).first() is not None:
+            db.session.rollback()
+            return BookingResult(BookingOutcome.SEAT_TAKEN, None)
+
+        db.session.add(booking)
+        db.session.flush()
+        if not reserve_seat(flight.id):
+            db.session.rollback()
+            return BookingResult(BookingOutcome.SOLD_OUT, None)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return BookingResult(BookingOutcome.SEAT_TAKEN, None)
+    return BookingResult(BookingOutcome.BOOKED, booking)
+
+def release_seat(flight_id):
+    """Returns one seat to a flight's inventory; the caller commits."""
+    db.session.execute(
+        db.update(Flight)
+        .where(Flight.id == flight_id)
+        .values(seats_available=Flight.seats_available + 1)
+    )
+    track_seat_changes(flight_id)
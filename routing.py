@@ -0,0 +1,229 @@
+"""
+Connecting-flight itinerary search.
+
+RouteGraph keeps the flight schedule in memory as an adjacency index: for
+every airport, the flights departing from it sorted by departure time. A
+search expands partial itineraries best-first (cheapest or shortest so far),
+taking at each airport only the flights that depart within the allowed
+layover window (found by bisection) and never revisiting an airport. The last
+allowed leg is looked up on a per-route index, and the search stops once the
+k best itineraries have reached the destination, so queries stay in the
+milliseconds even for large schedules.
+
+The graph is updated incrementally: changed flights are queued with
+mark_changed() and reloaded on the next refresh() without rebuilding the
+index. A full rebuild only happens on first use, after bulk changes, or when
+the graph is older than its max age (so changes made by other server
+processes are picked up eventually).
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from itertools import count
+from datetime import timedelta
+
+# seats_available is None when the seat inventory is not known
+Leg = namedtuple('Leg', ['flight_id', 'flight_number', 'origin', 'destination',
+                         'departure_time', 'arrival_time', 'cost', 'seats_available'],
+                 defaults=(None,))
+
+
+class Itinerary(namedtuple('Itinerary', ['legs', 'cost', 'duration'])):
+    """A sequence of connecting legs with its total cost and travel time."""
+    __slots__ = ()
+
+    @property
+    def stops(self):
+        return len(self.legs) - 1
+
+    @property
+    def departure_time(self):
+        return self.legs[0].departure_time
+
+    @property
+    def arrival_time(self):
+        return self.legs[-1].arrival_time
+
+    @property
+    def layovers(self):
+        """Time spent on the ground between consecutive legs."""
+        return [nxt.departure_time - leg.arrival_time
+                for leg, nxt in zip(self.legs, self.legs[1:])]
+
+
+# Itinerary rankings supported by RouteGraph.search()
+SORT_ORDERS = ('cost', 'duration')
+
+
+class RouteGraph:
+    """
+    In-memory index of flights by departure airport and time.
+
+    Attributes:
+    - max_age: seconds after which refresh() rebuilds the whole graph;
+      None keeps it until it is marked stale.
+
+    Methods:
+    - add: inserts or replaces a leg.
+    - remove: drops a leg by flight id.
+    - mark_changed: queues flights to reload, or the whole graph.
+    - refresh: applies queued changes using a loader function.
+    - search: finds ranked itineraries between two airports.
+    """
+
+    def __init__(self, legs=(), max_age=None, clock=time.monotonic):
+        self.max_age = max_age
+        self._clock = clock
+        self._legs = {}
+        # airport -> sorted list of (departure_time, flight_id)
+        self._departures = defaultdict(list)
+        # (origin, destination) -> sorted list of (departure_time, flight_id)
+        self._routes = defaultdict(list)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._built_at = None
+        for leg in legs:
+            self.add(leg)
+
+    def __len__(self):
+        return len(self._legs)
+
+    def add(self, leg):
+        """Inserts a leg, replacing any previous version of the same flight."""
+        self.remove(leg.flight_id)
+        self._legs[leg.flight_id] = leg
+        entry = (leg.departure_time, leg.flight_id)
+        insort(self._departures[leg.origin], entry)
+        insort(self._routes[leg.origin, leg.destination], entry)
+
+    def remove(self, flight_id):
+        """Removes the leg of a flight, if present."""
+        leg = self._legs.pop(flight_id, None)
+        if leg is None:
+            return
+        entry = (leg.departure_time, flight_id)
+        for departures in (self._departures[leg.origin],
+                           self._routes[leg.origin, leg.destination]):
+            del departures[bisect_left(departures, entry)]
+
+    def mark_changed(self, flight_ids=None):
+        """Queues flights to reload on the next refresh; None reloads everything."""
+        with self._lock:
+            if flight_ids is None:
+                self._built_at = None
+            else:
+                self._pending.update(flight_ids)
+
+    def refresh(self, loader):
+        """
+        Brings the graph up to date.
+
+        loader(flight_ids) returns the current legs of the given flights, or of
+        every flight when flight_ids is None. Flights it does not return for an
+        id have been deleted.
+        """
+        with self._lock:
+            now = self._clock()
+            expired = (self._built_at is None or
+                       (self.max_age is not None and now - self._built_at >= self.max_age))
+            if expired:
+                self._pending.clear()
+                self._legs.clear()
+                self._departures.clear()
+                self._routes.clear()
+                for leg in loader(None):
+                    self.add(leg)
+                self._built_at = now
+            elif self._pending:
+                changed, self._pending = self._pending, set()
+                for flight_id in changed:
+                    self.remove(flight_id)
+                for leg in loader(changed):
+                    self.add(leg)
+
+    def _departing(self, airport, earliest, latest, destination=None, seats_left=False):
+        """
+        Yields the legs leaving airport with earliest <= departure < latest,
+        optionally only those flying to destination or not sold out.
+        """
+        if destination is None:
+            departures = self._departures.get(airport)
+        else:
+            departures = self._routes.get((airport, destination))
+        if not departures:
+            return
+        start = bisect_left(departures, (earliest,))
+        for departure_time, flight_id in departures[start:]:
+            if departure_time >= latest:
+                break
+            leg = self._legs[flight_id]
+            if not (seats_left and leg.seats_available == 0):
+                yield leg
+
+    def _has_departure(self, airport, destination, earliest):
+        """Checks for any flight from airport to destination leaving at or after earliest."""
+        departures = self._routes.get((airport, destination))
+        return bool(departures) and departures[-1][0] >= earliest
+
+    def search(self, origin, destination, earliest, latest, max_stops=2,
+               min_layover=timedelta(minutes=45), max_layover=timedelta(hours=12),
+               sort='cost', limit=10, seats_left=False):
+        """
+        Returns up to `limit` itineraries from origin to destination, best first.
+
+        The first leg departs in [earliest, latest); each connection leaves
+        between min_layover and max_layover after the previous leg lands.
+        Itineraries are ranked by total cost or by total duration. With
+        seats_left, legs with no seats available are skipped.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f'Unsupported sort order: {sort}')
+        with self._lock:
+            return self._search(origin, destination, earliest, latest, max_stops,
+                                min_layover, max_layover, sort, limit, seats_left)
+
+    def _search(self, origin, destination, earliest, latest, max_stops,
+                min_layover, max_layover, sort, limit, seats_left):
+        by_cost = sort == 'cost'
+        order = count()
+        frontier = []
+
+        def push(path, cost):
+            duration = path[-1].arrival_time - path[0].departure_time
+            rank = (cost, duration) if by_cost else (duration, cost)
+            heapq.heappush(frontier, (rank, next(order), path, cost))
+
+        # The last allowed leg must land at the destination, so it is looked up
+        # on the (origin, destination) index instead of every departure
+        final = destination if max_stops == 0 else None
+        for leg in self._departing(origin, earliest, latest, final, seats_left):
+            if leg.destination != origin:
+                push((leg,), leg.cost)
+
+        # Best-first: cost and duration only grow as legs are added, so
+        # itineraries reach the destination in rank order and the search can
+        # stop as soon as `limit` of them have been found
+        results = []
+        while frontier and len(results) < limit:
+            _, _, path, cost = heapq.heappop(frontier)
+            last = path[-1]
+            if last.destination == destination:
+                duration = last.arrival_time - path[0].departure_time
+                results.append(Itinerary(path, round(cost, 2), duration))
+                continue
+            visited = {origin, *(leg.destination for leg in path)}
+            final = destination if len(path) == max_stops else None
+            # One leg before the last, skip airports with no later flight on
+            # to the destination
+            penultimate = len(path) == max_stops - 1
+            for leg in self._departing(last.destination, last.arrival_time + min_layover,
+                                       last.arrival_time + max_layover, final, seats_left):
+                if leg.destination in visited:
+                    continue
+                if penultimate and leg.destination != destination and not self._has_departure(
+                        leg.destination, destination, leg.arrival_time + min_layover):
+                    continue
+                push(path + (leg,), cost + leg.cost)
+        return results
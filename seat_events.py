@@ -0,0 +1,192 @@
+"""
+Live seat-map updates.
+
+When a booking is made or cancelled, the committed change is published to a
+SeatEventBroker as a SeatUpdate. The broker fans every update out to the
+queues of the clients watching that flight, so hundreds of open seat maps
+cost one publish per change instead of one database query per client. The
+select_seat page receives the updates as a Server-Sent Events stream.
+
+Updates are numbered by one counter for the whole broker, and each flight
+keeps its most recent ones, so a client that reconnects with Last-Event-ID
+gets what it missed. The seat map page carries the id current when its
+seats were read and sends it on the first connect, so updates committed in
+between are replayed too. If the gap is too old, or its queue overflowed,
+the client is told to reload instead.
+
+The broker lives in the server process: with several worker processes, each
+one only sees the bookings it committed itself, and clients fall back to
+reloading to see the others.
+"""
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+SeatUpdate = namedtuple('SeatUpdate', ['flight_id', 'row', 'col', 'seat', 'status'])
+
+# Sent when a client cannot be brought up to date with updates alone
+RESET = object()
+
+
+class Subscription:
+    """A client's queue of (event id, SeatUpdate) pairs for one flight."""
+
+    def __init__(self, flight_id, queue_size):
+        self.flight_id = flight_id
+        self._queue = queue.Queue(queue_size)
+        self._reset = False
+
+    def put(self, item):
+        if self._reset:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # The client is not keeping up; make it reload instead
+            self.reset()
+
+    def reset(self):
+        """Tells the client to reload; queued updates are discarded."""
+        self._reset = True
+        try:
+            self._queue.put_nowait(None)  # wakes up a waiting reader
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        """Returns the next item, RESET, or None if nothing arrived in time."""
+        if not self._reset:
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if not self._reset:
+                return item
+        return RESET
+
+
+class SeatEventBroker:
+    """
+    Thread-safe publish/subscribe hub for seat updates, keyed by flight.
+
+    Attributes:
+    - history: number of recent updates kept per flight for reconnects.
+    - max_flights: number of flights whose recent updates are kept.
+    - queue_size: updates a subscriber may fall behind before it is reset.
+
+    Methods:
+    - last_event_id: returns the id of the latest update of any flight.
+    - subscribe: registers a client, replaying updates it missed.
+    - unsubscribe: removes a client.
+    - publish: delivers an update to every client watching its flight.
+    """
+
+    def __init__(self, history=100, max_flights=1000, queue_size=64):
+        self.history = history
+        self.max_flights = max_flights
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._last_id = 0
+        # flight_id -> [highest event id no longer kept, deque of recent
+        # (event id, update)]
+        self._recent = OrderedDict()
+        # Highest event id among the histories of evicted flights
+        self._evicted_id = 0
+        self._lock = threading.Lock()
+
+    def last_event_id(self):
+        """Returns the id of the latest update published for any flight."""
+        with self._lock:
+            return self._last_id
+
+    def subscribe(self, flight_id, last_event_id=None):
+        """
+        Returns a Subscription for a flight.
+
+        With last_event_id, the updates published since are queued first, or
+        RESET if they are no longer all available.
+        """
+        subscription = Subscription(flight_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(flight_id, set()).add(subscription)
+            if last_event_id is not None:
+                # A flight without history may have lost its updates to
+                # eviction, so it is only complete from the evicted ids on
+                forgotten, recent = self._recent.get(flight_id, (self._evicted_id, ()))
+                missed = [item for item in recent if item[0] > last_event_id]
+                complete = forgotten <= last_event_id <= self._last_id
+                if not complete:
+                    subscription.reset()
+                else:
+                    for item in missed:
+                        subscription.put(item)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.flight_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.flight_id]
+
+    def subscriber_count(self, flight_id):
+        with self._lock:
+            return len(self._subscribers.get(flight_id, ()))
+
+    def publish(self, update):
+        """Numbers an update, remembers it and queues it for the flight's clients."""
+        with self._lock:
+            self._last_id += 1
+            item = (self._last_id, update)
+            entry = self._recent.pop(update.flight_id, None)
+            if entry is None:
+                entry = [self._evicted_id, deque(maxlen=self.history)]
+            recent = entry[1]
+            if len(recent) == recent.maxlen:
+                entry[0] = recent[0][0]
+            recent.append(item)
+            self._recent[update.flight_id] = entry
+            if len(self._recent) > self.max_flights:
+                _, (_, evicted) = self._recent.popitem(last=False)
+                self._evicted_id = max(self._evicted_id, evicted[-1][0])
+            subscribers = list(self._subscribers.get(update.flight_id, ()))
+        for subscription in subscribers:
+            subscription.put(item)
+
+
+def format_event(event, data, event_id=None):
+    """Formats one Server-Sent Events message."""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def event_stream(broker, subscription, keepalive=15, max_age=300, clock=time.monotonic):
+    """
+    Yields the Server-Sent Events of a subscription.
+
+    A comment line is sent after keepalive seconds without updates so proxies
+    keep the connection open. After max_age seconds the stream ends and the
+    browser reconnects, resuming from the last event id it received.
+    """
+    deadline = clock() + max_age
+    try:
+        yield 'retry: 3000\n\n'
+        while clock() < deadline:
+            item = subscription.get(timeout=min(keepalive, max(deadline - clock(), 0)))
+            if item is None:
+                yield ': keepalive\n\n'
+            elif item is RESET:
+                yield format_event('reset', {})
+                return
+            else:
+                event_id, update = item
+                yield format_event('seat', {
+                    'seat': update.seat, 'row': update.row, 'col': update.col,
+                    'status': update.status,
+                }, event_id)
+    finally:
+        broker.unsubscribe(subscription)
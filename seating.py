@@ -0,0 +1,106 @@
+"""
+Aircraft seat layouts.
+
+A layout describes the seat grid of an aircraft configuration: how many rows
+it has, which seat letters make up a row (and where the aisles fall), which
+seats are blocked and which rows are premium. Layouts are immutable and
+precompute a two-way index between seat labels (e.g. 12C) and grid positions,
+so validating or rendering a seat is a constant-time lookup.
+
+Layouts are cached per configuration, so every flight flown with the same
+configuration shares a single layout object and its seat-map payload.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+# One cell of the seat map payload
+Seat = namedtuple('Seat', ['row', 'col', 'label', 'premium', 'blocked', 'aisle_before'])
+
+AISLE = ' '
+
+
+class SeatLayout:
+    """
+    Immutable seat grid for one aircraft configuration.
+
+    Attributes:
+    - rows: number of seat rows.
+    - letters: seat letters of a row, in column order (aisles removed).
+    - seat_rows: the seat-map payload, a tuple of rows of Seat cells.
+    - capacity: number of bookable (non-blocked) seats.
+
+    Methods:
+    - label: converts a (row, col) position to a seat label.
+    - position: converts a seat label to a (row, col) position.
+    - is_bookable: checks that a position exists and is not blocked.
+    """
+
+    def __init__(self, rows, seat_letters, blocked_seats=(), premium_rows=0):
+        if rows < 1:
+            raise ValueError('An aircraft needs at least one row of seats')
+        letters = seat_letters.replace(AISLE, '')
+        if not letters or len(set(letters)) != len(letters):
+            raise ValueError(f'Invalid seat letters: {seat_letters!r}')
+
+        # Columns that have an aisle immediately to their left
+        aisles = set()
+        col = 0
+        for char in seat_letters.strip():
+            if char == AISLE:
+                aisles.add(col)
+            else:
+                col += 1
+
+        self.rows = rows
+        self.letters = letters
+        self.premium_rows = premium_rows
+        self._positions = {}
+        self._labels = []
+        for row in range(rows):
+            row_labels = tuple(f"{row + 1}{letter}" for letter in letters)
+            for col, label in enumerate(row_labels):
+                self._positions[label] = (row, col)
+            self._labels.append(row_labels)
+
+        self.blocked = frozenset(self.position(label) for label in blocked_seats)
+        if None in self.blocked:
+            raise ValueError(f'Blocked seats outside the layout: {blocked_seats!r}')
+
+        self.seat_rows = tuple(
+            tuple(
+                Seat(row, col, self._labels[row][col], row < premium_rows,
+                     (row, col) in self.blocked, col in aisles)
+                for col in range(len(letters))
+            )
+            for row in range(rows)
+        )
+        self.capacity = rows * len(letters) - len(self.blocked)
+
+    @property
+    def columns(self):
+        return len(self.letters)
+
+    def label(self, row, col):
+        """Returns the label of the seat at (row, col), or None if out of range."""
+        if 0 <= row < self.rows and 0 <= col < self.columns:
+            return self._labels[row][col]
+        return None
+
+    def position(self, label):
+        """Returns the (row, col) position of a seat label, or None if unknown."""
+        return self._positions.get(label.strip().upper())
+
+    def is_bookable(self, row, col):
+        """Checks that (row, col) is a seat on this aircraft and is not blocked."""
+        return self.label(row, col) is not None and (row, col) not in self.blocked
+
+
+@lru_cache(maxsize=64)
+def get_layout(rows, seat_letters, blocked_seats='', premium_rows=0):
+    """
+    Returns the shared layout for a configuration.
+
+    blocked_seats is a comma-separated list of seat labels (e.g. "1A,1D").
+    """
+    blocked = tuple(label for label in blocked_seats.split(',') if label.strip())
+    return SeatLayout(rows, seat_letters, blocked, premium_rows)
@@ -0,0 +1,149 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from app import create_app, db
+from models import AircraftConfig, Booking, Flight, SeatHold, User
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+
+class JsonApiTests(unittest.TestCase):
+    """Unit tests for the versioned JSON API."""
+
+    def setUp(self):
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            for email in ('api@example.com', 'other@example.com'):
+                user = User(email=email)
+                user.set_password('password123')
+                db.session.add(user)
+            config = AircraftConfig(name="Small", rows=2, seat_letters="AB CD",
+                                    blocked_seats="1D", premium_rows=1)
+            db.session.add(config)
+            db.session.flush()
+            flight = Flight(flight_number="API1", departure_airport="JFK",
+                            arrival_location="LAX",
+                            departure_time=datetime(2025, 3, 1, 8, 0),
+                            arrival_time=datetime(2025, 3, 1, 11, 30),
+                            cost=199.0, aircraft_config_id=config.id)
+            db.session.add(flight)
+            db.session.commit()
+            self.flight_id = flight.id
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+        app.extensions.pop('route_graph', None)
+        app.extensions['search_cache'].invalidate()
+
+    def login(self, client=None, email='api@example.com'):
+        client = client or self.client
+        response = client.post('/api/v1/session',
+                               json={'email': email, 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        return client
+
+    def test_login(self):
+        """Test session creation and the JSON error format."""
+        response = self.client.post('/api/v1/session',
+                                    json={'email': 'api@example.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.get_json()['error']['code'], 'invalid_credentials')
+        self.assertEqual(self.client.get(f'/api/v1/flights/{self.flight_id}/seats').status_code,
+                         401)
+        self.login()
+        self.assertEqual(self.client.get(f'/api/v1/flights/{self.flight_id}/seats').status_code,
+                         200)
+        self.assertEqual(self.client.delete('/api/v1/session').status_code, 204)
+        self.assertEqual(self.client.get('/api/v1/bookings').status_code, 401)
+
+    def test_search(self):
+        """Test direct and connecting searches in compact JSON."""
+        url = '/api/v1/flights?departure_airport=jfk&arrival_location=LAX&date=2025-03-01'
+        response = self.client.get(url)
+        self.assertNotIn(b': ', response.data)
+        flights = response.get_json()['flights']
+        self.assertEqual([f['flight_number'] for f in flights], ['API1'])
+        self.assertEqual(flights[0]['seats_available'], 7)
+
+        itineraries = self.client.get(url + '&max_stops=1&sort=duration').get_json()['itineraries']
+        self.assertEqual(itineraries[0]['stops'], 0)
+        self.assertEqual(itineraries[0]['duration_minutes'], 210)
+        self.assertEqual(self.client.get(url + '&max_stops=3').status_code, 400)
+        self.assertEqual(self.client.get(url.replace('2025-03-01', 'x')).status_code, 400)
+
+    def test_seat_map_conditional_get(self):
+        """Test that an unchanged seat map is answered with 304 Not Modified."""
+        self.login()
+        url = f'/api/v1/flights/{self.flight_id}/seats'
+        response = self.client.get(url)
+        seats = response.get_json()
+        self.assertEqual((seats['rows'], seats['seat_letters']), (2, 'AB CD'))
+        self.assertEqual((seats['booked'], seats['held'], seats['blocked']), ([], [], ['1D']))
+        etag = response.headers['ETag']
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        # Another traveler's hold changes the representation
+        other = self.login(app.test_client(), 'other@example.com')
+        self.assertEqual(other.post(f'/api/v1/flights/{self.flight_id}/holds',
+                                    json={'seat': '2a'}).status_code, 201)
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['held'], ['2A'])
+        self.assertEqual(self.client.get('/api/v1/flights/999/seats').status_code, 404)
+
+    def test_hold_book_cancel(self):
+        """Test the hold, book, history and cancel flow with typed errors."""
+        self.login()
+        holds = f'/api/v1/flights/{self.flight_id}/holds'
+        bookings = f'/api/v1/flights/{self.flight_id}/bookings'
+        self.assertEqual(self.client.post(holds, json={'seat': '1D'}).status_code, 400)
+        response = self.client.post(holds, json={'seat': '1A'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['seat'], '1A')
+
+        response = self.client.post(bookings, json={'seat': '1A'})
+        self.assertEqual(response.status_code, 201)
+        booking_id = response.get_json()['id']
+
+        other = self.login(app.test_client(), 'other@example.com')
+        response = other.post(bookings, json={'seat': '1A'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['error']['code'], 'seat_taken')
+        self.assertEqual(other.delete(f'/api/v1/bookings/{booking_id}').status_code, 404)
+
+        history = self.client.get('/api/v1/bookings').get_json()
+        self.assertEqual([b['seat'] for b in history['bookings']], ['1A'])
+        self.assertEqual(history['bookings'][0]['flight']['flight_number'], 'API1')
+        self.assertIsNone(history['next_before'])
+
+        self.assertEqual(self.client.delete(f'/api/v1/bookings/{booking_id}').status_code, 204)
+        with app.app_context():
+            self.assertEqual(Booking.query.count(), 0)
+            self.assertEqual(SeatHold.query.count(), 0)
+            self.assertEqual(db.session.get(Flight, self.flight_id).seats_available, 7)
+
+    def test_cancel_failure_is_json(self):
+        """Test that a failed cancellation is rolled back and reported as a JSON error."""
+        self.login()
+        response = self.client.post(f'/api/v1/flights/{self.flight_id}/bookings',
+                                    json={'seat': '1A'})
+        booking_id = response.get_json()['id']
+        with patch('api.release_seat', side_effect=RuntimeError('database is locked')), \
+                self.assertLogs(app.logger, 'ERROR'):
+            response = self.client.delete(f'/api/v1/bookings/{booking_id}')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()['error']['code'], 'internal_error')
+        with app.app_context():
+            self.assertEqual(Booking.query.count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
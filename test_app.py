@@ -1,9 +1,25 @@
+import gzip
+import json
+import os
+import re
+import sqlite3
+import tempfile
 import unittest
 from unittest.mock import patch
-from flask import Flask
-from app import app, db, init_db, User, Flight, Booking, generate_seat_map
+from sqlalchemy import event
+from app import create_app, db, init_db, HISTORY_PAGE_SIZE
+from models import (User, Flight, Booking, AircraftConfig, SeatHold, BookingOutcome,
+                    flight_search_statement, get_airport_cache, book_seat, sweep_expired_holds,
+                    get_calendar_cache, get_price_calendar, price_calendar_statement,
+                    get_seat_event_broker, get_occupied_seats, occupied_seats_statement,
+                    get_search_cache, get_booking_history, get_flight_seating)
+from hashing import HashingBusy
 from werkzeug.security import generate_password_hash
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from urllib.parse import urlencode
+
+# Each test gets a fresh schema in an in-memory database
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
 
 class FlaskAuthTests(unittest.TestCase):
     """
@@ -42,8 +58,7 @@ class FlaskAuthTests(unittest.TestCase):
                 arrival_location="LAX",
                 departure_time=datetime(2024, 11, 5, 14, 0),
                 arrival_time=datetime(2024, 11, 5, 17, 30),
-                cost=299.99,
-                seats=generate_seat_map()
+                cost=299.99
             )
             db.session.add(test_flight)
             db.session.commit()
@@ -59,6 +74,10 @@ class FlaskAuthTests(unittest.TestCase):
         with app.app_context():
             db.session.remove()
             db.drop_all()
+        # The route graph and search cache outlive the dropped tables, so start
+        # each test afresh
+        app.extensions.pop('route_graph', None)
+        app.extensions['search_cache'].invalidate()
 
     def test_01_login_valid_credentials(self):
         """Test login with valid credentials."""
@@ -468,10 +487,11 @@ class FlaskAuthTests(unittest.TestCase):
             # Verify sample flights were created
             flights = Flight.query.all()
             self.assertTrue(len(flights) > 0)
-            # Verify seat maps were generated correctly
+            # Verify seat inventories were initialized from the aircraft layout
             for flight in flights:
-                self.assertEqual(len(flight.seats), 5)  # 5 rows
-                self.assertEqual(len(flight.seats[0]), 4)  # 4 columns
+                self.assertIsNotNone(flight.aircraft_config)
+                self.assertEqual(flight.seats_available, flight.layout.capacity)
+            self.assertEqual(Flight.query.filter_by(flight_number="AB123").one().seats_available, 20)
         print("init_db test completed successfully")
 
     def test_31_select_seat_invalid_seat(self):
@@ -538,6 +558,896 @@ class FlaskAuthTests(unittest.TestCase):
         }, follow_redirects=True)
         self.assertIn(b'Email not found', response.data)
         print("Forgot password edge cases test completed successfully")
+
+    def test_34_select_seat_get_is_read_only(self):
+        """Test that viewing the seat map never commits to the database."""
+        print("Running select seat read-only test")
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+        with app.app_context():
+            db.session.add(Booking(
+                user_email=self.test_email,
+                flight_id=self.test_flight.id,
+                seats="2B",
+                seat_row=1,
+                seat_col=1
+            ))
+            db.session.commit()
+
+        with patch('app.db.session.commit') as mock_commit:
+            response = self.app.get(f'/select_seat/{self.test_flight.id}')
+            self.assertEqual(response.status_code, 200)
+            mock_commit.assert_not_called()
+        # The booked seat is rendered as occupied, the rest as available
+        self.assertEqual(response.data.count(b'class="seat occupied"'), 1)
+        self.assertEqual(response.data.count(b'class="seat available"'), 19)
+        print("Select seat read-only test completed successfully")
+
+    def test_35_seat_inventory_follows_bookings(self):
+        """Test that booking and canceling keep the seat counter in sync."""
+        print("Running seat inventory test")
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+            session['selected_seat'] = "2B"
+            session['seat_row'] = 1
+            session['seat_col'] = 1
+        self.app.post(f'/payment_method/{self.test_flight.id}', follow_redirects=True)
+        with app.app_context():
+            self.assertEqual(db.session.get(Flight, self.test_flight.id).seats_available, 19)
+            booking_id = Booking.query.filter_by(flight_id=self.test_flight.id).one().id
+
+        self.app.post(f'/cancel_booking/{booking_id}', follow_redirects=True)
+        with app.app_context():
+            self.assertEqual(db.session.get(Flight, self.test_flight.id).seats_available, 20)
+            self.assertEqual(Booking.query.count(), 0)
+        print("Seat inventory test completed successfully")
+
+    def test_36_payment_sold_out_flight(self):
+        """Test that a flight with no seats left cannot be booked."""
+        print("Running sold out flight test")
+        with app.app_context():
+            db.session.get(Flight, self.test_flight.id).seats_available = 0
+            db.session.commit()
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+            session['selected_seat'] = "2B"
+            session['seat_row'] = 1
+            session['seat_col'] = 1
+        response = self.app.post(f'/payment_method/{self.test_flight.id}', follow_redirects=True)
+        self.assertIn(b'fully booked', response.data)
+        with app.app_context():
+            self.assertEqual(Booking.query.count(), 0)
+        print("Sold out flight test completed successfully")
+
+    def test_37_select_seat_validation(self):
+        """Test that invalid, blocked and booked seats are rejected."""
+        print("Running select seat validation test")
+        with app.app_context():
+            config = AircraftConfig(name="A320-test", rows=30, seat_letters="ABC DEF",
+                                    blocked_seats="1A", premium_rows=2)
+            flight = Flight(
+                flight_number="EF789",
+                departure_airport="JFK",
+                arrival_location="LAX",
+                departure_time=datetime(2024, 11, 5, 18, 0),
+                arrival_time=datetime(2024, 11, 5, 21, 30),
+                cost=199.99,
+                aircraft_config=config
+            )
+            db.session.add(flight)
+            db.session.add(Booking(user_email=self.test_email, flight=flight,
+                                   seats="12C", seat_row=11, seat_col=2))
+            db.session.commit()
+            flight_id = flight.id
+            self.assertEqual(flight.seats_available, 179)
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+
+        for seat in ['40,0', '0,0', 'not-a-seat']:
+            response = self.app.post(f'/select_seat/{flight_id}', data={'seat': seat},
+                                     follow_redirects=True)
+            self.assertIn(b'Invalid seat selection', response.data)
+        response = self.app.post(f'/select_seat/{flight_id}', data={'seat': '11,2'},
+                                 follow_redirects=True)
+        self.assertIn(b'That seat has already been booked', response.data)
+
+        response = self.app.post(f'/select_seat/{flight_id}', data={'seat': '29,5'})
+        self.assertIn(f'/payment_method/{flight_id}', response.location)
+        with self.app.session_transaction() as session:
+            self.assertEqual(session['selected_seat'], '30F')
+        print("Select seat validation test completed successfully")
+
+    def test_38_search_flights_normalized_codes(self):
+        """Test that airport codes are matched case-insensitively via the route index."""
+        print("Running normalized search test")
+        response = self.app.post('/search_flights', data={
+            'departure_airport': ' jfk ',
+            'arrival_location': 'lax',
+            'departure_date': '2024-11-05'
+        }, follow_redirects=True)
+        self.assertIn(b'AB123', response.data)
+
+        response = self.app.post('/search_flights', data={
+            'departure_airport': 'JFK',
+            'arrival_location': 'LAX',
+            'departure_date': 'November 5th'
+        }, follow_redirects=True)
+        self.assertIn(b'Please provide a valid departure date', response.data)
+
+        with app.app_context():
+            statement = flight_search_statement('JFK', 'LAX', date(2024, 11, 5))
+            compiled = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+            plan = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+            self.assertIn('USING INDEX ix_flight_route_departure', plan[0][-1])
+        print("Normalized search test completed successfully")
+
+    def test_39_airport_codes_cached(self):
+        """Test that airport codes are cached and refreshed when flights change."""
+        print("Running airport code cache test")
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+        self.app.get('/book_flight')
+        with app.app_context():
+            airport_cache = get_airport_cache()
+        stats = airport_cache.stats()
+        response = self.app.get('/book_flight')
+        self.assertIn(b'LAX', response.data)
+        self.assertEqual(airport_cache.hits, stats['hits'] + 1)
+        self.assertEqual(airport_cache.misses, stats['misses'])
+
+        with app.app_context():
+            db.session.add(Flight(
+                flight_number="GH012",
+                departure_airport="YYZ",
+                arrival_location="LAX",
+                departure_time=datetime(2024, 11, 7, 9, 0),
+                arrival_time=datetime(2024, 11, 7, 12, 0),
+                cost=259.99
+            ))
+            db.session.commit()
+        response = self.app.get('/book_flight')
+        self.assertIn(b'YYZ', response.data)
+        self.assertEqual(airport_cache.misses, stats['misses'] + 1)
+        print("Airport code cache test completed successfully")
+
+    def test_40_booking_history_single_query_pagination(self):
+        """Test that booking history loads flights eagerly and pages by cursor."""
+        print("Running booking history pagination test")
+        total = HISTORY_PAGE_SIZE + 5
+        with app.app_context():
+            for number in range(total):
+                flight = Flight(
+                    flight_number=f"PG{number:03d}",
+                    departure_airport="JFK",
+                    arrival_location="LAX",
+                    departure_time=datetime(2024, 12, 1, 8, 0),
+                    arrival_time=datetime(2024, 12, 1, 11, 0),
+                    cost=199.99
+                )
+                db.session.add(Booking(user_email=self.test_email, flight=flight,
+                                       seats="1A", seat_row=0, seat_col=0))
+            db.session.commit()
+            engine = db.engine
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+
+        statements = []
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', count_statement)
+        try:
+            response = self.app.get('/booking_history')
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_statement)
+
+        # One joined query, no matter how many bookings are on the page
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(response.data.count(b'class="booking-card"'), HISTORY_PAGE_SIZE)
+        self.assertIn(f'PG{total - 1:03d}'.encode(), response.data)
+        self.assertIn(b'Older bookings', response.data)
+
+        with app.app_context():
+            cursor = Booking.query.order_by(Booking.id.desc()).all()[HISTORY_PAGE_SIZE - 1].id
+        response = self.app.get(f'/booking_history?before={cursor}')
+        self.assertEqual(response.data.count(b'class="booking-card"'), 5)
+        self.assertIn(b'PG000', response.data)
+        self.assertNotIn(b'Older bookings', response.data)
+        self.assertIn(b'Newest bookings', response.data)
+        print("Booking history pagination test completed successfully")
+
+    def test_41_password_rehashed_on_login(self):
+        """Test that a hash with outdated parameters is upgraded on login."""
+        print("Running password rehash test")
+        with app.app_context():
+            user = User.query.filter_by(email=self.test_email).first()
+            user.password = generate_password_hash(self.test_password, 'pbkdf2:sha256:1000')
+            db.session.commit()
+            self.assertTrue(user.password_needs_rehash())
+
+        response = self.app.post('/', data={
+            'email': self.test_email,
+            'password': self.test_password
+        })
+        self.assertIn('/book_flight', response.location)
+        with app.app_context():
+            user = User.query.filter_by(email=self.test_email).first()
+            self.assertTrue(user.password.startswith('scrypt:'))
+            self.assertFalse(user.password_needs_rehash())
+            self.assertTrue(user.check_password(self.test_password))
+            self.assertFalse(user.check_password('wrongpassword'))
+        print("Password rehash test completed successfully")
+
+    def test_42_password_hash_method_configurable(self):
+        """Test that new hashes use the configured method and cost."""
+        print("Running configurable password hash test")
+        with patch.dict(app.config, {'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'}):
+            with app.app_context():
+                user = User(email='cheap@example.com')
+                user.set_password('password123')
+                self.assertTrue(user.password.startswith('pbkdf2:sha256:1000$'))
+                self.assertFalse(user.password_needs_rehash())
+                # The default scrypt hash of the test user is now outdated
+                test_user = User.query.filter_by(email=self.test_email).first()
+                self.assertTrue(test_user.password_needs_rehash())
+        print("Configurable password hash test completed successfully")
+
+    def test_43_login_when_hashing_saturated(self):
+        """Test that a saturated hashing service degrades to a busy response."""
+        print("Running saturated hashing test")
+        with patch.object(User, 'check_password', side_effect=HashingBusy):
+            response = self.app.post('/', data={
+                'email': self.test_email,
+                'password': self.test_password
+            })
+        self.assertEqual(response.status_code, 503)
+        self.assertIn(b'The server is busy right now', response.data)
+        with patch.object(User, 'set_password', side_effect=HashingBusy):
+            response = self.app.post('/signup', data={
+                'email': 'newuser@example.com',
+                'password': 'newpassword123'
+            })
+        self.assertEqual(response.status_code, 503)
+        with app.app_context():
+            self.assertIsNone(User.query.filter_by(email='newuser@example.com').first())
+        print("Saturated hashing test completed successfully")
+
+    def test_44_book_seat_outcomes(self):
+        """Test the typed outcomes of an atomic seat booking."""
+        print("Running book seat outcomes test")
+        with app.app_context():
+            flight = db.session.get(Flight, self.test_flight.id)
+            result = book_seat(flight, self.test_email, 1, 1)
+            self.assertIs(result.outcome, BookingOutcome.BOOKED)
+            self.assertEqual(result.booking.seats, '2B')
+
+            result = book_seat(flight, 'otheruser@example.com', 1, 1)
+            self.assertIs(result.outcome, BookingOutcome.SEAT_TAKEN)
+            self.assertIs(book_seat(flight, self.test_email, 9, 9).outcome,
+                          BookingOutcome.INVALID_SEAT)
+            self.assertIs(book_seat(flight, self.test_email, None, None).outcome,
+                          BookingOutcome.INVALID_SEAT)
+            # The failed attempts left the inventory untouched
+            self.assertEqual(db.session.get(Flight, self.test_flight.id).seats_available, 19)
+            self.assertEqual(Booking.query.count(), 1)
+
+        with self.app.session_transaction() as session:
+            session['email'] = 'otheruser@example.com'
+            session['selected_seat'] = "2B"
+            session['seat_row'] = 1
+            session['seat_col'] = 1
+        response = self.app.post(f'/payment_method/{self.test_flight.id}', follow_redirects=True)
+        self.assertIn(b'that seat was just booked by someone else', response.data)
+        print("Book seat outcomes test completed successfully")
+
+    def test_45_seat_hold_blocks_other_users(self):
+        """Test that a selected seat is held for its user until it expires."""
+        print("Running seat hold test")
+        flight_url = f'/select_seat/{self.test_flight.id}'
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+        self.app.post(flight_url, data={'seat': '1,1'})
+        # Re-selecting moves the user's hold instead of holding two seats
+        self.app.post(flight_url, data={'seat': '0,0'})
+        with app.app_context():
+            hold = SeatHold.query.one()
+            self.assertEqual((hold.seat_row, hold.seat_col), (0, 0))
+            self.assertGreater(hold.expires_at, datetime.utcnow())
+
+        other = app.test_client()
+        with other.session_transaction() as session:
+            session['email'] = 'otheruser@example.com'
+            session['seat_row'] = 0
+            session['seat_col'] = 0
+        response = other.get(flight_url)
+        self.assertEqual(response.data.count(b'class="seat held"'), 1)
+        response = other.post(flight_url, data={'seat': '0,0'}, follow_redirects=True)
+        self.assertIn(b'being held by another traveler', response.data)
+        response = other.post(f'/payment_method/{self.test_flight.id}', follow_redirects=True)
+        self.assertIn(b'that seat was just booked by someone else', response.data)
+
+        # Once the hold expires the seat is free again
+        with app.app_context():
+            SeatHold.query.update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+            db.session.commit()
+        response = other.get(flight_url)
+        self.assertEqual(response.data.count(b'class="seat held"'), 0)
+        response = other.post(flight_url, data={'seat': '0,0'})
+        self.assertIn('/payment_method/', response.location)
+        response = other.post(f'/payment_method/{self.test_flight.id}', follow_redirects=True)
+        self.assertIn(b'Payment successful!', response.data)
+        with app.app_context():
+            self.assertEqual(SeatHold.query.count(), 0)
+        print("Seat hold test completed successfully")
+
+    def test_46_sweep_expired_holds(self):
+        """Test that the sweeper removes only expired holds."""
+        print("Running sweep expired holds test")
+        with app.app_context():
+            now = datetime.utcnow()
+            db.session.add_all([
+                SeatHold(flight_id=self.test_flight.id, seat_row=0, seat_col=0,
+                         user_email='a@example.com', expires_at=now - timedelta(minutes=1)),
+                SeatHold(flight_id=self.test_flight.id, seat_row=0, seat_col=1,
+                         user_email='b@example.com', expires_at=now + timedelta(minutes=5)),
+            ])
+            db.session.commit()
+            self.assertEqual(sweep_expired_holds(), 1)
+            self.assertEqual(SeatHold.query.one().user_email, 'b@example.com')
+        print("Sweep expired holds test completed successfully")
+
+    def test_47_create_app_runs_no_ddl(self):
+        """Test that creating an app leaves the schema to the init-db command."""
+        print("Running application factory test")
+        fresh_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.assertIsNot(fresh_app, app)
+        with fresh_app.app_context():
+            self.assertEqual(db.inspect(db.engine).get_table_names(), [])
+
+        result = fresh_app.test_cli_runner().invoke(args=['init-db'])
+        self.assertIn('Initialized the database', result.output)
+        with fresh_app.app_context():
+            self.assertIn('flight', db.inspect(db.engine).get_table_names())
+            self.assertEqual(Flight.query.count(), 2)
+            db.drop_all()
+        print("Application factory test completed successfully")
+
+    def test_48_search_connecting_flights(self):
+        """Test that connections are found and ranked when stops are allowed."""
+        print("Running connecting flight search test")
+        with app.app_context():
+            db.session.add_all([
+                Flight(flight_number="CX100", departure_airport="JFK", arrival_location="ORD",
+                       departure_time=datetime(2024, 11, 5, 7, 0),
+                       arrival_time=datetime(2024, 11, 5, 9, 0), cost=80.0),
+                Flight(flight_number="CX200", departure_airport="ORD", arrival_location="LAX",
+                       departure_time=datetime(2024, 11, 5, 10, 0),
+                       arrival_time=datetime(2024, 11, 5, 14, 0), cost=120.0),
+            ])
+            db.session.commit()
+
+        search = {'departure_airport': 'jfk', 'arrival_location': 'LAX',
+                  'departure_date': '2024-11-05'}
+        response = self.app.post('/search_flights', data=search)
+        self.assertNotIn(b'CX100', response.data)
+
+        response = self.app.post('/search_flights', data=dict(search, max_stops='1'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'1 stop', response.data)
+        self.assertIn(b'Layover in ORD: 1h 0m', response.data)
+        self.assertLess(response.data.index(b'CX100'), response.data.index(b'AB123'))
+
+        response = self.app.post('/search_flights', data=dict(search, max_stops='1',
+                                                              sort='duration'))
+        self.assertLess(response.data.index(b'AB123'), response.data.index(b'CX100'))
+
+        response = self.app.post('/search_flights', data=dict(search, max_stops='5'),
+                                 follow_redirects=True)
+        self.assertIn(b'Invalid search options', response.data)
+        print("Connecting flight search test completed successfully")
+
+    def test_49_route_graph_follows_flight_changes(self):
+        """Test that committed flight changes reach the cached route graph."""
+        print("Running route graph update test")
+        search = {'departure_airport': 'JFK', 'arrival_location': 'LAX',
+                  'departure_date': '2024-11-05', 'max_stops': '2'}
+        response = self.app.post('/search_flights', data=search)
+        self.assertIn(b'AB123', response.data)
+
+        with app.app_context():
+            flight = db.session.get(Flight, self.test_flight.id)
+            flight.cost = 199.5
+            db.session.add(Flight(flight_number="EF789", departure_airport="JFK",
+                                  arrival_location="LAX",
+                                  departure_time=datetime(2024, 11, 5, 18, 0),
+                                  arrival_time=datetime(2024, 11, 5, 21, 0), cost=99.0))
+            db.session.commit()
+
+        response = self.app.post('/search_flights', data=search)
+        self.assertIn(b'$199.5', response.data)
+        self.assertLess(response.data.index(b'EF789'), response.data.index(b'AB123'))
+
+        with app.app_context():
+            db.session.delete(db.session.get(Flight, self.test_flight.id))
+            db.session.commit()
+        response = self.app.post('/search_flights', data=search)
+        self.assertNotIn(b'AB123', response.data)
+        print("Route graph update test completed successfully")
+
+    def test_50_price_calendar(self):
+        """Test the per-day price calendar and its cache invalidation."""
+        print("Running price calendar test")
+        with app.app_context():
+            db.session.add_all([
+                Flight(flight_number="PC1", departure_airport="JFK", arrival_location="LAX",
+                       departure_time=datetime(2024, 11, 5, 20, 0),
+                       arrival_time=datetime(2024, 11, 5, 23, 0), cost=149.0),
+                Flight(flight_number="PC2", departure_airport="JFK", arrival_location="LAX",
+                       departure_time=datetime(2024, 11, 7, 9, 0),
+                       arrival_time=datetime(2024, 11, 7, 12, 0), cost=99.0,
+                       seats_available=0),
+                Flight(flight_number="PC3", departure_airport="JFK", arrival_location="SFO",
+                       departure_time=datetime(2024, 11, 6, 9, 0),
+                       arrival_time=datetime(2024, 11, 6, 12, 0), cost=10.0),
+            ])
+            db.session.commit()
+            # One grouped query over the route's departure index
+            plan = ' '.join(str(row) for row in db.session.execute(db.text(
+                'EXPLAIN QUERY PLAN ' + str(price_calendar_statement('JFK', 'LAX', date(2024, 11, 1), 30)
+                                            .compile(compile_kwargs={'literal_binds': True})))))
+            self.assertIn('ix_flight_route_departure', plan)
+
+        url = '/price_calendar?departure_airport=jfk&arrival_location=LAX&start=2024-11-01'
+        data = self.app.get(url).get_json()
+        self.assertEqual(data['days'], 30)
+        self.assertEqual(data['calendar'], [
+            {'date': '2024-11-05', 'min_cost': 149.0, 'seats_available': 40, 'flights': 2},
+            {'date': '2024-11-07', 'min_cost': None, 'seats_available': 0, 'flights': 1},
+        ])
+        with app.app_context():
+            calendar_cache = get_calendar_cache()
+        hits = calendar_cache.hits
+        self.app.get(url)
+        self.assertEqual(calendar_cache.hits, hits + 1)
+
+        # Booking a seat and changing a fare both refresh the calendar
+        with app.app_context():
+            flight = db.session.get(Flight, self.test_flight.id)
+            self.assertIs(book_seat(flight, self.test_email, 0, 0).outcome, BookingOutcome.BOOKED)
+        self.assertEqual(self.app.get(url).get_json()['calendar'][0]['seats_available'], 39)
+        with app.app_context():
+            Flight.query.filter_by(flight_number="PC2").first().seats_available = 3
+            db.session.commit()
+        self.assertEqual(self.app.get(url).get_json()['calendar'][1]['min_cost'], 99.0)
+
+        # A booking on another route keeps the calendar; a new flight in its
+        # window refreshes it
+        with app.app_context():
+            other = Flight(flight_number="PC9", departure_airport="BOS", arrival_location="SFO",
+                           departure_time=datetime(2024, 11, 5, 7, 0),
+                           arrival_time=datetime(2024, 11, 5, 13, 0), cost=180.0)
+            db.session.add(other)
+            db.session.commit()
+            self.app.get(url)
+            hits = calendar_cache.hits
+            self.assertIs(book_seat(other, self.test_email, 0, 0).outcome, BookingOutcome.BOOKED)
+        self.app.get(url)
+        self.assertEqual(calendar_cache.hits, hits + 1)
+        with app.app_context():
+            db.session.add(Flight(flight_number="PC10", departure_airport="JFK",
+                                  arrival_location="LAX",
+                                  departure_time=datetime(2024, 11, 20, 7, 0),
+                                  arrival_time=datetime(2024, 11, 20, 10, 0), cost=120.0))
+            db.session.commit()
+        self.assertEqual([day['date'] for day in self.app.get(url).get_json()['calendar']],
+                         ['2024-11-05', '2024-11-07', '2024-11-20'])
+
+        self.assertEqual(self.app.get(url.replace('2024-11-01', 'soon')).status_code, 400)
+        self.assertEqual(self.app.get(url + '&days=365').status_code, 400)
+        self.assertEqual(self.app.get('/price_calendar?start=2024-11-01').status_code, 400)
+        print("Price calendar test completed successfully")
+
+    def test_51_flexible_date_search(self):
+        """Test that a flexible search shows the route's price calendar."""
+        print("Running flexible date search test")
+        response = self.app.post('/search_flights', data={
+            'departure_airport': 'JFK', 'arrival_location': 'LAX',
+            'departure_date': '2024-11-01', 'flexible': '1'
+        })
+        self.assertIn(b'Price Calendar', response.data)
+        self.assertIn(b'2024-11-05', response.data)
+        self.assertIn(b'$299.99', response.data)
+
+        response = self.app.post('/search_flights', data={
+            'departure_airport': 'JFK', 'arrival_location': 'LAX',
+            'departure_date': '2024-12-01', 'flexible': '1'
+        }, follow_redirects=True)
+        self.assertIn(b'No flights match your search criteria', response.data)
+        print("Flexible date search test completed successfully")
+
+    def test_52_live_seat_events(self):
+        """Test that bookings and cancellations are pushed to open seat maps."""
+        print("Running live seat events test")
+        url = f'/select_seat/{self.test_flight.id}/events'
+        self.assertEqual(self.app.get(url).status_code, 401)
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+        # Event ids are never negative, so a negative Last-Event-ID is rejected
+        self.assertEqual(self.app.get(url, headers={'Last-Event-ID': '-5'}).status_code, 400)
+
+        def next_event(chunks):
+            message = next(chunks)
+            while message.startswith((b':', b'retry')):
+                message = next(chunks)
+            lines = message.decode().strip().split('\n')
+            return lines[1], json.loads(lines[2][len('data: '):])
+
+        app.config['SEAT_EVENTS_KEEPALIVE'] = 0.05
+        try:
+            response = self.app.get(url, buffered=False)
+            self.assertEqual(response.mimetype, 'text/event-stream')
+            chunks = iter(response.response)
+            self.assertEqual(next(chunks), b'retry: 3000\n\n')
+            with app.app_context():
+                self.assertEqual(get_seat_event_broker().subscriber_count(self.test_flight.id), 1)
+
+            with self.app.session_transaction() as session:
+                session['seat_row'] = 1
+                session['seat_col'] = 2
+            self.app.post(f'/payment_method/{self.test_flight.id}')
+            self.assertEqual(next_event(chunks), ('event: seat', {
+                'seat': '2C', 'row': 1, 'col': 2, 'status': 'booked'}))
+
+            with app.app_context():
+                booking_id = Booking.query.one().id
+            self.app.post(f'/cancel_booking/{booking_id}')
+            self.assertEqual(next_event(chunks)[1]['status'], 'available')
+            response.close()
+
+            # A seat booked between rendering the page and connecting is replayed
+            page = self.app.get(f'/select_seat/{self.test_flight.id}').get_data(as_text=True)
+            events_url = re.search(r'new EventSource\("([^"]+)"\)', page).group(1)
+            self.assertIn('last_event_id=', events_url)
+            with self.app.session_transaction() as session:
+                session['seat_row'] = 0
+                session['seat_col'] = 1
+            self.app.post(f'/payment_method/{self.test_flight.id}')
+            response = self.app.get(events_url.replace('&amp;', '&'), buffered=False)
+            self.assertEqual(next_event(iter(response.response)), ('event: seat', {
+                'seat': '1B', 'row': 0, 'col': 1, 'status': 'booked'}))
+            response.close()
+        finally:
+            app.config['SEAT_EVENTS_KEEPALIVE'] = 15
+        with app.app_context():
+            self.assertEqual(get_seat_event_broker().subscriber_count(self.test_flight.id), 0)
+        print("Live seat events test completed successfully")
+
+    def test_53_occupied_seats_projected(self):
+        """Test that seat occupancy is read as coordinates from the covering index."""
+        print("Running occupied seats projection test")
+        with app.app_context():
+            for row, col in ((0, 1), (2, 3), (4, 0)):
+                db.session.add(Booking(user_email=self.test_email, flight_id=self.test_flight.id,
+                                       seat_row=row, seat_col=col, seats=f'{row + 1}{"ABCD"[col]}'))
+            db.session.commit()
+            db.session.expunge_all()
+
+            self.assertEqual(get_occupied_seats(self.test_flight.id), {(0, 1), (2, 3), (4, 0)})
+            self.assertEqual(len(db.session.identity_map), 0)
+
+            compiled = occupied_seats_statement(self.test_flight.id).compile(
+                db.engine, compile_kwargs={'literal_binds': True})
+            plan = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+            self.assertIn('USING COVERING INDEX', plan[0][-1])
+        print("Occupied seats projection test completed successfully")
+
+    def test_54_search_seats_left(self):
+        """Test that results show seats left and can leave out sold-out flights."""
+        print("Running seats left search test")
+        with app.app_context():
+            db.session.add(Flight(flight_number="SO999", departure_airport="JFK",
+                                  arrival_location="LAX",
+                                  departure_time=datetime(2024, 11, 5, 18, 0),
+                                  arrival_time=datetime(2024, 11, 5, 21, 0), cost=99.0,
+                                  seats_available=1))
+            db.session.commit()
+            sold_out_id = Flight.query.filter_by(flight_number="SO999").one().id
+
+        search = {'departure_airport': 'JFK', 'arrival_location': 'LAX',
+                  'departure_date': '2024-11-05'}
+        response = self.app.post('/search_flights', data=search)
+        self.assertIn(b'Seats left: 20', response.data)
+        self.assertIn(b'Seats left: 1', response.data)
+        connecting = self.app.post('/search_flights', data=dict(search, max_stops='1'))
+        self.assertIn(b'SO999', connecting.data)
+
+        # Booking the last seat updates the counter read by both searches
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+            session['seat_row'] = 0
+            session['seat_col'] = 0
+        self.app.post(f'/payment_method/{sold_out_id}')
+        with app.app_context():
+            self.assertEqual(db.session.get(Flight, sold_out_id).seats_available, 0)
+
+        for options in ({}, {'max_stops': '1'}):
+            response = self.app.post('/search_flights', data=dict(search, **options))
+            self.assertIn(b'SO999', response.data)
+            response = self.app.post('/search_flights',
+                                     data=dict(search, seats_left='1', **options))
+            self.assertNotIn(b'SO999', response.data)
+            self.assertIn(b'AB123', response.data)
+        print("Seats left search test completed successfully")
+
+    def test_55_search_cache(self):
+        """Test that direct searches are cached and dropped exactly when their flights change."""
+        print("Running search cache test")
+        with app.app_context():
+            cache = get_search_cache()
+            db.session.add(Flight(flight_number="SF100", departure_airport="JFK",
+                                  arrival_location="SFO",
+                                  departure_time=datetime(2024, 11, 5, 9, 0),
+                                  arrival_time=datetime(2024, 11, 5, 12, 0), cost=199.0))
+            db.session.commit()
+            other_id = Flight.query.filter_by(flight_number="SF100").one().id
+
+        lax = {'departure_airport': 'jfk', 'arrival_location': 'LAX',
+               'departure_date': '2024-11-05'}
+        sfo = dict(lax, arrival_location='SFO')
+
+        def search(form):
+            stats = cache.stats()
+            response = self.app.post('/search_flights', data=form, follow_redirects=True)
+            return response.data, cache.stats()['hits'] - stats['hits'] == 1
+
+        self.assertFalse(search(lax)[1])
+        self.assertTrue(search(lax)[1])
+        self.assertTrue(search(dict(lax, departure_airport=' JFK ', seats_left='1'))[1])
+        self.assertFalse(search(sfo)[1])
+
+        # A fare change on another route leaves this one cached
+        with app.app_context():
+            db.session.get(Flight, other_id).cost = 149.0
+            db.session.commit()
+        self.assertTrue(search(lax)[1])
+        data, hit = search(sfo)
+        self.assertFalse(hit)
+        self.assertIn(b'$149.0', data)
+
+        # A new flight on the route and day, a booking and a cancellation all
+        # refresh it
+        with app.app_context():
+            db.session.add(Flight(flight_number="NL200", departure_airport="JFK",
+                                  arrival_location="LAX",
+                                  departure_time=datetime(2024, 11, 5, 20, 0),
+                                  arrival_time=datetime(2024, 11, 5, 23, 0), cost=99.0))
+            db.session.commit()
+        data, hit = search(lax)
+        self.assertFalse(hit)
+        self.assertIn(b'NL200', data)
+
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+            session['seat_row'] = 0
+            session['seat_col'] = 0
+        self.app.post(f'/payment_method/{self.test_flight.id}')
+        data, hit = search(lax)
+        self.assertFalse(hit)
+        self.assertIn(b'Seats left: 19', data)
+        self.assertTrue(search(sfo)[1])
+
+        # Moving a flight to another day drops the searches of both days
+        search(dict(lax, departure_date='2024-11-06'))
+        with app.app_context():
+            flight = Flight.query.filter_by(flight_number="NL200").one()
+            flight.departure_time = datetime(2024, 11, 6, 20, 0)
+            flight.arrival_time = datetime(2024, 11, 6, 23, 0)
+            db.session.commit()
+        self.assertNotIn(b'NL200', search(lax)[0])
+        data, hit = search(dict(lax, departure_date='2024-11-06'))
+        self.assertFalse(hit)
+        self.assertIn(b'NL200', data)
+
+        text = self.app.get('/metrics').data.decode()
+        self.assertRegex(text, r'cache_hits_total\{cache="flight_search"\} [1-9]')
+        self.assertIn('cache_evictions_total{cache="flight_search"} 0', text)
+        self.assertIn('cache_hit_ratio{cache="flight_search"}', text)
+        print("Search cache test completed successfully")
+
+    def test_56_read_models(self):
+        """Test that display pages read immutable rows instead of tracked ORM objects."""
+        print("Running read models test")
+        with app.app_context():
+            a320 = AircraftConfig(name="A320-RM", rows=30, seat_letters="ABC DEF",
+                                  blocked_seats="1A", premium_rows=4)
+            db.session.add(Flight(flight_number="RM1", departure_airport="JFK",
+                                  arrival_location="SFO", aircraft_config=a320,
+                                  departure_time=datetime(2024, 11, 6, 9, 0),
+                                  arrival_time=datetime(2024, 11, 6, 12, 0), cost=250.0))
+            db.session.add(Booking(user_email=self.test_email, flight_id=self.test_flight.id,
+                                   seat_row=1, seat_col=1, seats='2B'))
+            db.session.commit()
+            rm1_id = Flight.query.filter_by(flight_number="RM1").one().id
+            db.session.expunge_all()
+
+            bookings, cursor = get_booking_history(self.test_email)
+            self.assertIsNone(cursor)
+            self.assertEqual(bookings[0].seats, '2B')
+            self.assertEqual(bookings[0].flight.flight_number, 'AB123')
+            with self.assertRaises(AttributeError):
+                bookings[0].seats = '3C'
+
+            seating = get_flight_seating(rm1_id)
+            self.assertEqual((seating.flight_number, seating.layout.capacity), ('RM1', 179))
+            self.assertEqual(get_flight_seating(self.test_flight.id).layout.capacity, 20)
+            self.assertIsNone(get_flight_seating(rm1_id + 100))
+            self.assertEqual(len(db.session.identity_map), 0)
+
+        with self.app.session_transaction() as session:
+            session['email'] = self.test_email
+        response = self.app.get(f'/select_seat/{rm1_id}')
+        self.assertIn(b'Select Your Seat for Flight RM1', response.data)
+        self.assertEqual(self.app.get(f'/select_seat/{rm1_id + 100}').status_code, 404)
+        self.assertIn(b'AB123', self.app.get('/booking_history').data)
+        print("Read models test completed successfully")
+
+    def test_57_paginated_results(self):
+        """Test sorted, keyset-paginated and streamed direct flight results."""
+        print("Running paginated results test")
+        with app.app_context():
+            for day, cost in [(1, 150.0), (12, 99.0), (20, 450.0), (30, 99.0)]:
+                db.session.add(Flight(flight_number=f"PG{day}", departure_airport="JFK",
+                                      arrival_location="LAX",
+                                      departure_time=datetime(2024, 11, day, 8, 0),
+                                      arrival_time=datetime(2024, 11, day, 11, 0), cost=cost))
+            db.session.commit()
+
+        search = {'departure_airport': 'jfk', 'arrival_location': 'LAX',
+                  'departure_date': '2024-11-05', 'span': 'month'}
+
+        def flight_numbers(response):
+            return re.findall(r'Flight (\w+)</h3>', response.get_data(as_text=True))
+
+        def next_link(response):
+            match = re.search(r'href="([^"]*after=[^"]*)" class="btn">Next page',
+                              response.get_data(as_text=True))
+            return match and match.group(1).replace('&amp;', '&')
+
+        with patch('app.RESULTS_PAGE_SIZE', 2):
+            # A streamed page is sent without knowing its length up front
+            response = self.app.post('/search_flights', data=search)
+            self.assertEqual(flight_numbers(response), ['PG1', 'AB123'])
+            response = self.app.get(next_link(response))
+            self.assertEqual(flight_numbers(response), ['PG12', 'PG20'])
+            self.assertIn(b'First page', response.data)
+            response = self.app.get(next_link(response))
+            self.assertEqual(flight_numbers(response), ['PG30'])
+            self.assertIsNone(next_link(response))
+
+            # Equal fares are ordered by flight id, so no row is skipped or repeated
+            pages, url = [], '/search_flights?' + urlencode(dict(search, order='cost'))
+            while url:
+                response = self.app.get(url)
+                pages.append(flight_numbers(response))
+                url = next_link(response)
+            self.assertEqual(pages, [['PG12', 'PG30'], ['PG1', 'AB123'], ['PG20']])
+
+        # A single day comes from the search cache, in either order
+        response = self.app.post('/search_flights', data=dict(search, span='day', order='cost'))
+        self.assertEqual(flight_numbers(response), ['AB123'])
+
+        for cursor in ('garbage', '2024-11-05T14:00:00+00:00_1'):
+            response = self.app.get('/search_flights?' + urlencode(dict(search, after=cursor)))
+            self.assertEqual(response.status_code, 302)
+        response = self.app.get('/search_flights?' + urlencode(dict(search, order='seats')),
+                                follow_redirects=True)
+        self.assertIn(b'Invalid search options', response.data)
+
+        def renders():
+            text = self.app.get('/metrics').get_data(as_text=True)
+            return int(re.search(r'template_render_seconds_count'
+                                 r'\{template="flight_results.html"\} (\d+)', text).group(1))
+
+        # A streamed page is sent without knowing its length up front, and its
+        # render time is still recorded once the template finishes
+        rendered = renders()
+        app.config['SEARCH_STREAM_RESULTS'] = True
+        try:
+            response = self.app.post('/search_flights', data=search)
+            self.assertNotIn('Content-Length', response.headers)
+            self.assertEqual(len(flight_numbers(response)), 5)
+        finally:
+            app.config['SEARCH_STREAM_RESULTS'] = False
+        self.assertEqual(renders(), rendered + 1)
+        print("Paginated results test completed successfully")
+
+    def test_58_results_page_compressed_and_timed(self):
+        """Test that the results page is gzip-compressed and its render time recorded."""
+        print("Running results page compression test")
+        with app.app_context():
+            for number in range(60):
+                db.session.add(Flight(flight_number=f"GZ{number}", departure_airport="JFK",
+                                      arrival_location="LAX",
+                                      departure_time=datetime(2024, 11, 5, 6, number % 60),
+                                      arrival_time=datetime(2024, 11, 5, 9, 0), cost=120.0))
+            db.session.commit()
+
+        search = {'departure_airport': 'JFK', 'arrival_location': 'LAX',
+                  'departure_date': '2024-11-05'}
+        plain = self.app.post('/search_flights', data=search)
+        self.assertIn(b'Next page', plain.data)
+        response = self.app.post('/search_flights', data=search,
+                                 headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertNotRegex(response.headers['Server-Timing'], r'render;dur=0\.0,')
+
+        metrics = self.app.get('/metrics').get_data(as_text=True)
+        self.assertRegex(metrics,
+                         r'template_render_seconds_count\{template="flight_results.html"\} [1-9]')
+        print("Results page compression test completed successfully")
+
+    def test_59_catalogue_caches_bounded_per_app(self):
+        """Test that the airport and calendar caches are per app and size-bounded."""
+        print("Running bounded catalogue caches test")
+        small_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+                                'CALENDAR_CACHE_SIZE': 2})
+        with small_app.app_context():
+            db.create_all()
+            for start in (date(2024, 11, 1), date(2024, 11, 2), date(2024, 11, 3)):
+                get_price_calendar('JFK', 'LAX', start, 30)
+            cache = get_calendar_cache()
+            self.assertEqual((cache.stats()['size'], cache.evictions), (2, 1))
+            self.assertEqual(get_airport_cache().maxsize, 1)
+        with app.app_context():
+            self.assertIsNot(get_calendar_cache(), cache)
+            self.assertEqual(get_calendar_cache().maxsize, app.config['CALENDAR_CACHE_SIZE'])
+        print("Bounded catalogue caches test completed successfully")
+
+    def test_60_upgrade_schema(self):
+        """Test that init_db upgrades a database created before seat inventories."""
+        print("Running schema upgrade test")
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'old.db')
+            with sqlite3.connect(path) as conn:
+                conn.executescript("""
+                    CREATE TABLE user (id INTEGER PRIMARY KEY, email VARCHAR(255) NOT NULL UNIQUE,
+                                       password VARCHAR(255) NOT NULL, created_at DATETIME);
+                    CREATE TABLE flight (id INTEGER PRIMARY KEY,
+                                         flight_number VARCHAR(50) NOT NULL UNIQUE,
+                                         departure_airport VARCHAR(255) NOT NULL,
+                                         arrival_location VARCHAR(255) NOT NULL,
+                                         departure_time DATETIME NOT NULL,
+                                         arrival_time DATETIME NOT NULL,
+                                         cost FLOAT NOT NULL, seats JSON NOT NULL);
+                    CREATE TABLE booking (id INTEGER PRIMARY KEY, user_email VARCHAR(255) NOT NULL,
+                                          flight_id INTEGER NOT NULL REFERENCES flight (id),
+                                          seat_row INTEGER NOT NULL, seat_col INTEGER NOT NULL,
+                                          booked_at DATETIME, seats VARCHAR(10) NOT NULL,
+                                          CONSTRAINT unique_seat_booking
+                                              UNIQUE (flight_id, seat_row, seat_col));
+                    INSERT INTO flight VALUES (1, 'OLD1', 'JFK', 'LAX', '2024-11-05 14:00:00.000000',
+                                               '2024-11-05 17:30:00.000000', 299.99, '[]');
+                    INSERT INTO booking VALUES (1, 'old@example.com', 1, 0, 0, NULL, '1A'),
+                                               (2, 'old@example.com', 1, 0, 1, NULL, '1B');
+                """)
+            old_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+            with old_app.app_context():
+                init_db()
+                init_db()  # a second run leaves the upgraded schema alone
+                inspector = db.inspect(db.engine)
+                columns = {column['name'] for column in inspector.get_columns('flight')}
+                self.assertIn('seats_available', columns)
+                self.assertNotIn('seats', columns)
+                self.assertIn('ix_booking_user_email_id',
+                              {index['name'] for index in inspector.get_indexes('booking')})
+                flight = Flight.query.filter_by(flight_number='OLD1').one()
+                self.assertEqual(flight.seats_available, 18)
+                self.assertIs(book_seat(flight, 'old@example.com', 1, 0).outcome,
+                              BookingOutcome.BOOKED)
+                self.assertEqual(db.session.get(Flight, flight.id).seats_available, 17)
+                db.session.remove()
+                db.engine.dispose()
+        print("Schema upgrade test completed successfully")
   
 
 if __name__ == '__main__':
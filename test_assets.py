@@ -0,0 +1,150 @@
+import gzip
+import os
+import re
+import tempfile
+import unittest
+
+from app import create_app, db
+from assets import StaticAssets, brotli
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+
+class StaticAssetTests(unittest.TestCase):
+    """Unit tests for fingerprinted static assets and response compression."""
+
+    def setUp(self):
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def stylesheets(self, html):
+        return re.findall(r'<link rel="stylesheet" href="([^"]+)">', html.decode())
+
+    def test_pages_link_fingerprinted_stylesheets(self):
+        """Test that pages link their CSS instead of inlining it."""
+        response = self.client.get('/')
+        self.assertNotIn(b'<style>', response.data)
+        links = self.stylesheets(response.data)
+        self.assertEqual(len(links), 2)
+        for link in links:
+            self.assertRegex(link, r'^/static/css/\w+\.css\?v=[0-9a-f]{12}$')
+
+    def test_fingerprinted_assets_cached_for_a_year(self):
+        """Test the Cache-Control headers of static files with and without a fingerprint."""
+        link = self.stylesheets(self.client.get('/').data)[0]
+        response = self.client.get(link)
+        self.assertEqual(response.status_code, 200)
+        cache_control = response.headers['Cache-Control']
+        self.assertIn('max-age=31536000', cache_control)
+        self.assertIn('immutable', cache_control)
+        self.assertIn('public', cache_control)
+        self.assertNotIn('no-cache', cache_control)
+        response.close()
+
+        # A stale or missing fingerprint must be revalidated
+        for url in (link.split('?')[0], link.split('?')[0] + '?v=000000000000'):
+            response = self.client.get(url)
+            self.assertIn('no-cache', response.headers['Cache-Control'])
+            response.close()
+
+    def test_stylesheet_images_fingerprinted(self):
+        """Test that images linked from CSS get fingerprinted, long-lived URLs."""
+        link = self.stylesheets(self.client.get('/').data)[0]
+        self.assertIn('/css/base.css', link)
+        response = self.client.get(link)
+        image = re.search(r'url\("(\.\./background\.png\?v=[0-9a-f]{12})"\)',
+                          response.get_data(as_text=True)).group(1)
+        self.assertEqual(response.headers['ETag'], f'"{link.split("v=")[1]}"')
+        response = self.client.get(link, headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/static/' + image[len('../'):])
+        self.assertEqual(response.mimetype, 'image/png')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        response.close()
+
+    def test_stylesheet_fingerprint_follows_images(self):
+        """Test that changing an image changes the fingerprint of the CSS using it."""
+        with tempfile.TemporaryDirectory() as folder:
+            os.mkdir(os.path.join(folder, 'css'))
+            with open(os.path.join(folder, 'css', 'site.css'), 'w') as f:
+                f.write('body { background: url(../bg.png); }\n'
+                        'a { background: url("data:image/gif;base64,R0lG"); }')
+            image = os.path.join(folder, 'bg.png')
+            with open(image, 'wb') as f:
+                f.write(b'first')
+            assets = StaticAssets(folder)
+            first = assets.fingerprint('css/site.css')
+            self.assertIn(f'url(../bg.png?v={assets.fingerprint("bg.png")})'.encode(),
+                          assets.rewritten('css/site.css'))
+            self.assertIn(b'url("data:image/gif;base64,R0lG")', assets.rewritten('css/site.css'))
+            self.assertIsNone(assets.rewritten('bg.png'))
+
+            with open(image, 'wb') as f:
+                f.write(b'second')
+            os.utime(image, ns=(0, 1))
+            self.assertNotEqual(assets.fingerprint('css/site.css'), first)
+
+    def test_fingerprint_follows_content(self):
+        """Test that editing a file changes its fingerprint."""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'site.css')
+            with open(path, 'w') as f:
+                f.write('body { color: black; }')
+            assets = StaticAssets(folder)
+            first = assets.fingerprint('site.css')
+            self.assertEqual(assets.fingerprint('site.css'), first)
+            with open(path, 'w') as f:
+                f.write('body { color: white; }')
+            os.utime(path, ns=(0, 1))
+            self.assertNotEqual(assets.fingerprint('site.css'), first)
+            self.assertIsNone(assets.fingerprint('../site.css'))
+            self.assertIsNone(assets.fingerprint('missing.css'))
+
+    def test_gzip_reduces_page_and_asset_size(self):
+        """Test that HTML, CSS and JSON are sent gzip-compressed and much smaller."""
+        plain = self.client.get('/signup')
+        response = self.client.get('/signup', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertLess(len(response.data), len(plain.data) / 2)
+        # Once the stylesheets are cached, a page view costs well under 1 KB
+        self.assertLess(len(response.data), 1024)
+
+        link = self.stylesheets(plain.data)[0]
+        plain_css = self.client.get(link)
+        css = self.client.get(link, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(css.data), plain_css.data)
+        self.assertLess(len(css.data), len(plain_css.data) / 2)
+        self.assertEqual(int(css.headers['Content-Length']), len(css.data))
+        plain_css.close()
+
+        # Revalidating with the weak ETag of a compressed copy still gets a 304
+        self.assertTrue(css.headers['ETag'].startswith('W/'))
+        response = self.client.get(link, headers={'Accept-Encoding': 'gzip',
+                                                  'If-None-Match': css.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        url = '/api/v1/flights?departure_airport=JFK&arrival_location=LAX&date=2024-11-05'
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)  # too small to bother
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test that brotli is used when the client accepts it."""
+        plain = self.client.get('/')
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip, deflate, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.data), plain.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from caching import TTLCache
+
+
+class FakeClock:
+    """Manually advanced clock for expiry tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTests(unittest.TestCase):
+    """Unit tests for the in-process TTL cache."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(ttl=60, clock=self.clock)
+        self.loads = 0
+
+    def loader(self):
+        self.loads += 1
+        return self.loads
+
+    def test_hits_and_misses(self):
+        """Test that a cached value is reused and counted as a hit."""
+        self.assertEqual(self.cache.get_or_load('key', self.loader), 1)
+        self.assertEqual(self.cache.get_or_load('key', self.loader), 1)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0,
+                                              'hit_ratio': 0.5, 'size': 1})
+
+    def test_entries_expire(self):
+        """Test that an entry is reloaded once its TTL has passed."""
+        self.cache.get_or_load('key', self.loader)
+        self.clock.now = 61
+        self.assertEqual(self.cache.get_or_load('key', self.loader), 2)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_invalidate(self):
+        """Test that invalidation forces a reload."""
+        self.cache.get_or_load('key', self.loader)
+        self.cache.invalidate('key')
+        self.assertEqual(self.cache.get_or_load('key', self.loader), 2)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_invalidate_during_load(self):
+        """Test that a value loaded before an invalidation is not stored."""
+        def stale_loader():
+            self.cache.invalidate()
+            return 'stale'
+        self.assertEqual(self.cache.get_or_load('key', stale_loader), 'stale')
+        self.assertEqual(self.cache.get_or_load('key', self.loader), 1)
+
+    def test_least_recently_used_evicted(self):
+        """Test that a full cache evicts the entry used longest ago."""
+        cache = TTLCache(ttl=60, maxsize=2, clock=self.clock)
+        cache.get_or_load('a', lambda: 'A')
+        cache.get_or_load('b', lambda: 'B')
+        cache.get_or_load('a', self.loader)
+        cache.get_or_load('c', lambda: 'C')
+        self.assertEqual(cache.get_or_load('a', self.loader), 'A')
+        self.assertEqual(cache.get_or_load('b', self.loader), 1)
+        self.assertEqual(cache.evictions, 2)
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_invalidate_tags(self):
+        """Test that invalidating a tag drops only the entries filed under it."""
+        self.cache.get_or_load('ab', lambda: [1, 2], tags=iter)
+        self.cache.get_or_load('bc', lambda: [2, 3], tags=iter)
+        self.cache.get_or_load('c', lambda: [3], tags=iter)
+        self.cache.invalidate_tags([1])
+        self.assertEqual(self.cache.stats()['size'], 2)
+        self.cache.invalidate_tags([3, 4])
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(self.cache._tagged, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
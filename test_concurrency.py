@@ -0,0 +1,103 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import create_app, db
+from models import Flight, Booking, AircraftConfig
+
+ATTEMPTS = 300
+THREADS = 16
+CONTESTED_SEATS = 60
+P99_LIMIT_SECONDS = 2.0
+
+
+class ConcurrentBookingTests(unittest.TestCase):
+    """
+    Stress test for the atomic booking path.
+
+    Fires hundreds of parallel payment requests at a single flight, most of
+    them competing for the same few seats, and checks that no seat is ever
+    sold twice, the seat counter matches the bookings, and latency stays
+    bounded.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Threads need real connections, so use an on-disk database
+        cls.workdir = tempfile.TemporaryDirectory()
+        database = os.path.join(cls.workdir.name, 'stress.db')
+        cls.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}'})
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.engine.dispose()
+        cls.workdir.cleanup()
+
+    def setUp(self):
+        with self.app.app_context():
+            db.create_all()
+            config = AircraftConfig(name="Stress-180", rows=30, seat_letters="ABC DEF")
+            flight = Flight(
+                flight_number="ST001",
+                departure_airport="JFK",
+                arrival_location="LAX",
+                departure_time=datetime(2024, 11, 5, 14, 0),
+                arrival_time=datetime(2024, 11, 5, 17, 30),
+                cost=299.99,
+                aircraft_config=config
+            )
+            db.session.add(flight)
+            db.session.commit()
+            self.flight_id = flight.id
+            self.capacity = flight.seats_available
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def attempt_booking(self, attempt, seat):
+        """Books one seat through the payment route; returns (booked, seconds)."""
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['email'] = f'user{attempt}@example.com'
+            session['seat_row'], session['seat_col'] = seat
+        started = time.perf_counter()
+        response = client.post(f'/payment_method/{self.flight_id}')
+        elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, 302)
+        return '/booking_history' in response.location, elapsed
+
+    def test_parallel_bookings_never_double_book(self):
+        """Test that parallel bookings of contested seats never double-book."""
+        print("Running concurrent booking stress test")
+        rng = random.Random(327)
+        seats = [divmod(rng.randrange(CONTESTED_SEATS), 6) for _ in range(ATTEMPTS)]
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            results = list(pool.map(self.attempt_booking, range(ATTEMPTS), seats))
+
+        booked = sum(1 for success, _ in results if success)
+        latencies = sorted(elapsed for _, elapsed in results)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+        with self.app.app_context():
+            bookings = Booking.query.filter_by(flight_id=self.flight_id).all()
+            positions = [(booking.seat_row, booking.seat_col) for booking in bookings]
+            flight = db.session.get(Flight, self.flight_id)
+
+            self.assertEqual(len(positions), len(set(positions)))
+            self.assertEqual(len(bookings), booked)
+            self.assertEqual(set(positions), set(seats))
+            self.assertEqual(flight.seats_available, self.capacity - booked)
+        self.assertLess(p99, P99_LIMIT_SECONDS)
+        print(f"{booked} of {ATTEMPTS} attempts booked, p99 {p99 * 1000:.1f} ms")
+        print("Concurrent booking stress test completed successfully")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from config import engine_options, sqlite_pragmas, is_sqlite_memory
+
+
+class ConfigTests(unittest.TestCase):
+    """Unit tests for the environment-driven database configuration."""
+
+    def test_pool_options_from_environment(self):
+        """Test that pool settings are read from the environment."""
+        environ = {'DB_POOL_SIZE': '4', 'DB_MAX_OVERFLOW': '2',
+                   'DB_POOL_PRE_PING': 'off', 'DB_POOL_RECYCLE': '1800'}
+        options = engine_options('postgresql://db.example.com/flights', environ)
+        self.assertEqual(options, {'pool_pre_ping': False, 'pool_size': 4,
+                                   'max_overflow': 2, 'pool_recycle': 1800})
+
+    def test_pool_defaults(self):
+        """Test the default pool settings for a file database."""
+        options = engine_options('sqlite:///users.db', {})
+        self.assertEqual(options, {'pool_pre_ping': True, 'pool_size': 10, 'max_overflow': 20})
+
+    def test_memory_database_has_no_pool_sizing(self):
+        """Test that in-memory SQLite gets no pool sizing options."""
+        self.assertTrue(is_sqlite_memory('sqlite:///:memory:'))
+        self.assertTrue(is_sqlite_memory('sqlite://'))
+        self.assertFalse(is_sqlite_memory('sqlite:///users.db'))
+        self.assertEqual(engine_options('sqlite://', {'DB_POOL_SIZE': '4'}),
+                         {'pool_pre_ping': True})
+
+    def test_sqlite_pragmas(self):
+        """Test the pragmas generated for SQLite connections."""
+        pragmas = sqlite_pragmas({'SQLITE_BUSY_TIMEOUT_MS': 2500, 'SQLITE_WAL': True,
+                                  'SQLITE_SYNCHRONOUS': 'NORMAL'})
+        self.assertEqual(pragmas, ['PRAGMA busy_timeout = 2500', 'PRAGMA journal_mode = WAL',
+                                   'PRAGMA synchronous = NORMAL'])
+        pragmas = sqlite_pragmas({'SQLITE_BUSY_TIMEOUT_MS': 0, 'SQLITE_WAL': False,
+                                  'SQLITE_SYNCHRONOUS': 'FULL'})
+        self.assertNotIn('PRAGMA journal_mode = WAL', pragmas)
+
+    def test_app_connections_use_pragmas(self):
+        """Test that the application's SQLite connections are configured on connect."""
+        with tempfile.TemporaryDirectory() as workdir:
+            database = os.path.join(workdir, 'config.db')
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}'})
+            with app.app_context():
+                self.assertEqual(app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'], 10)
+                with db.engine.connect() as conn:
+                    self.assertEqual(conn.exec_driver_sql('PRAGMA journal_mode').scalar(), 'wal')
+                    self.assertEqual(conn.exec_driver_sql('PRAGMA busy_timeout').scalar(), 5000)
+                    # 1 is NORMAL
+                    self.assertEqual(conn.exec_driver_sql('PRAGMA synchronous').scalar(), 1)
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from hashing import PasswordHasher, HashingBusy
+
+# Cheap parameters keep these tests fast
+METHOD = 'pbkdf2:sha256:1000'
+
+
+class PasswordHasherTests(unittest.TestCase):
+    """Unit tests for the inline and process-pool password hashing service."""
+
+    def test_inline_hashing(self):
+        """Test that an inline hasher generates and verifies hashes."""
+        hasher = PasswordHasher()
+        pwhash = hasher.generate('password123', METHOD)
+        self.assertTrue(pwhash.startswith(METHOD + '$'))
+        self.assertTrue(hasher.check(pwhash, 'password123'))
+        self.assertFalse(hasher.check(pwhash, 'wrongpassword'))
+
+    def test_pool_hashing(self):
+        """Test that a process-pool hasher produces interchangeable hashes."""
+        hasher = PasswordHasher(workers=2, queue_size=2)
+        try:
+            pwhash = hasher.generate('password123', METHOD)
+            self.assertTrue(hasher.check(pwhash, 'password123'))
+            self.assertFalse(hasher.check(pwhash, 'wrongpassword'))
+            self.assertTrue(PasswordHasher().check(pwhash, 'password123'))
+        finally:
+            hasher.shutdown()
+
+    def test_full_queue_raises_busy(self):
+        """Test that a saturated hasher rejects work after the queue timeout."""
+        hasher = PasswordHasher(workers=1, queue_size=0, queue_timeout=0.01)
+        # Simulate a hash already occupying the only slot
+        hasher._slots.acquire()
+        with self.assertRaises(HashingBusy):
+            hasher.generate('password123', METHOD)
+        hasher._slots.release()
+        try:
+            self.assertTrue(hasher.check(hasher.generate('password123', METHOD), 'password123'))
+        finally:
+            hasher.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
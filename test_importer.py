@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from app import create_app, db
+from models import AircraftConfig, Booking, Flight, get_airport_codes
+from importer import FlightImportError, import_flights
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+CSV_SCHEDULE = """flight_number,departure_airport,arrival_location,departure_time,arrival_time,cost,aircraft
+IM100,jfk,LAX,2025-03-01T08:00,2025-03-01T11:30,199.00,
+IM101,JFK,SFO,2025-03-01T09:00,2025-03-01T12:45,249.50,A320
+IM102,YYZ,JFK,2025-03-02T07:15,2025-03-02T09:00,149.99,
+"""
+
+
+class FlightImportTests(unittest.TestCase):
+    """Unit tests for the streaming flight schedule importer."""
+
+    def setUp(self):
+        with app.app_context():
+            db.create_all()
+            db.session.add(AircraftConfig(name="A320", rows=30, seat_letters="ABC DEF"))
+            db.session.commit()
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_import_csv_in_chunks(self):
+        """Test that a CSV schedule is inserted chunk by chunk."""
+        with app.app_context():
+            stats = import_flights(io.StringIO(CSV_SCHEDULE), 'csv', chunk_size=2)
+            self.assertEqual((stats.rows, stats.skipped), (3, 0))
+            flight = Flight.query.filter_by(flight_number='IM100').one()
+            self.assertEqual(flight.departure_airport, 'JFK')
+            self.assertEqual(flight.departure_time, datetime(2025, 3, 1, 8, 0))
+            self.assertEqual(flight.seats_available, 20)
+            a320 = Flight.query.filter_by(flight_number='IM101').one()
+            self.assertEqual(a320.aircraft_config.name, 'A320')
+            self.assertEqual(a320.seats_available, 180)
+
+    def test_upsert_keeps_inventory(self):
+        """Test that re-importing updates a flight without resetting its seats."""
+        with app.app_context():
+            import_flights(io.StringIO(CSV_SCHEDULE), 'csv')
+            flight = Flight.query.filter_by(flight_number='IM100').one()
+            db.session.add(Booking(user_email='test@example.com', flight=flight,
+                                   seats='1A', seat_row=0, seat_col=0))
+            flight.seats_available = 19
+            db.session.commit()
+
+            update = {'flight_number': 'IM100', 'departure_airport': 'JFK',
+                      'arrival_location': 'LAX', 'departure_time': '2025-03-01T10:00',
+                      'arrival_time': '2025-03-01T13:30', 'cost': 179}
+            stats = import_flights(io.StringIO(json.dumps(update) + '\n'), 'jsonl')
+            self.assertEqual(stats.rows, 1)
+            db.session.expire_all()
+            self.assertEqual(Flight.query.count(), 3)
+            flight = Flight.query.filter_by(flight_number='IM100').one()
+            self.assertEqual(flight.cost, 179)
+            self.assertEqual(flight.departure_time, datetime(2025, 3, 1, 10, 0))
+            self.assertEqual(flight.seats_available, 19)
+
+    def test_invalid_records(self):
+        """Test that invalid records stop the import unless skipped."""
+        schedule = CSV_SCHEDULE + "IM103,JFK,LAX,not-a-date,2025-03-01T11:30,99,\n"
+        schedule += "IM104,JFK,LAX,2025-03-01T08:00,2025-03-01T11:30,99,B747\n"
+        with app.app_context():
+            with self.assertRaises(FlightImportError) as raised:
+                import_flights(io.StringIO(schedule), 'csv', chunk_size=10)
+            self.assertEqual(raised.exception.line, 5)
+            self.assertEqual(Flight.query.count(), 0)
+
+            stats = import_flights(io.StringIO(schedule + '{"flight_number": \n'), 'csv',
+                                   skip_invalid=True)
+            self.assertEqual((stats.rows, stats.skipped), (3, 3))
+
+    def test_import_invalidates_airport_codes(self):
+        """Test that imported airports show up in the cached catalogue."""
+        with app.app_context():
+            get_airport_codes()
+            import_flights(io.StringIO(CSV_SCHEDULE), 'csv')
+            self.assertIn('YYZ', get_airport_codes())
+
+    def test_cli_command(self):
+        """Test the flask import-flights command end to end."""
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'schedule.jsonl')
+            with open(path, 'w') as schedule:
+                for line in CSV_SCHEDULE.splitlines()[1:]:
+                    values = dict(zip(CSV_SCHEDULE.splitlines()[0].split(','), line.split(',')))
+                    schedule.write(json.dumps(values) + '\n')
+            result = app.test_cli_runner().invoke(args=['import-flights', path])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Imported 3 flights', result.output)
+        with app.app_context():
+            self.assertEqual(Flight.query.count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
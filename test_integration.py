@@ -1,15 +1,16 @@
 import unittest
 from unittest.mock import patch
 from flask import Flask
-from app import app, db, User, Flight, Booking, generate_seat_map
+from app import create_app, db
+from models import User, Flight, Booking
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
 class IntegrationTestCase1(unittest.TestCase):
     def setUp(self):
         """Set up the test environment before each test."""
-        app.config['TESTING'] = True
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.app = app.test_client()
         with app.app_context():
             db.create_all()
@@ -51,8 +52,6 @@ class IntegrationTestCase1(unittest.TestCase):
 class IntegrationTestCase2(unittest.TestCase):
     def setUp(self):
         """Set up the test environment before each test."""
-        app.config['TESTING'] = True
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.app = app.test_client()
         with app.app_context():
             db.create_all()
@@ -62,8 +61,7 @@ class IntegrationTestCase2(unittest.TestCase):
                 arrival_location="LAX",
                 departure_time=datetime(2024, 11, 5, 14, 0),
                 arrival_time=datetime(2024, 11, 5, 17, 30),
-                cost=299.99,
-                seats=generate_seat_map()
+                cost=299.99
             )
             db.session.add(test_flight)
             db.session.commit()
@@ -126,8 +124,6 @@ class IntegrationTestCase2(unittest.TestCase):
 class IntegrationTestCase3(unittest.TestCase):
     def setUp(self):
         """Set up the test environment before each test."""
-        app.config['TESTING'] = True
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.app = app.test_client()
         with app.app_context():
             db.create_all()
@@ -0,0 +1,99 @@
+import re
+import unittest
+from datetime import datetime
+
+from app import create_app, db
+from metrics import Histogram, MetricsRegistry
+from models import Booking, Flight
+
+app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+
+def sample(text, name, **labels):
+    """Returns the value of one sample in a Prometheus text exposition."""
+    # Bucket bounds are rendered after the other labels
+    pairs = sorted(labels.items(), key=lambda pair: (pair[0] == 'le', pair[0]))
+    label_text = ','.join(f'{key}="{value}"' for key, value in pairs)
+    match = re.search(rf'^{re.escape(name)}{{{re.escape(label_text)}}} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else None
+
+
+class HistogramTests(unittest.TestCase):
+    """Unit tests for the histogram and its text format."""
+
+    def test_cumulative_buckets(self):
+        """Test that observations fall into cumulative buckets."""
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 7):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.cumulative()), [(1, 2), (5, 3), (float('inf'), 4)])
+        self.assertEqual((histogram.sum, histogram.count), (11, 4))
+
+    def test_render(self):
+        """Test the Prometheus text rendering and label escaping."""
+        registry = MetricsRegistry()
+        registry.observe('db_statements_per_request', {'endpoint': 'a"b'}, 4)
+        registry.increment('http_requests_total', {'endpoint': 'x', 'status': 200})
+        text = registry.render()
+        self.assertIn('# TYPE db_statements_per_request histogram', text)
+        self.assertIn('db_statements_per_request_bucket{endpoint="a\\"b",le="3"} 0', text)
+        self.assertIn('db_statements_per_request_bucket{endpoint="a\\"b",le="5"} 1', text)
+        self.assertIn('http_requests_total{endpoint="x",status="200"} 1', text)
+
+
+class RequestMetricsTests(unittest.TestCase):
+    """Tests for the request, SQL and template instrumentation."""
+
+    def setUp(self):
+        self.client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            flight = Flight(flight_number="MX1", departure_airport="JFK", arrival_location="LAX",
+                            departure_time=datetime(2025, 3, 1, 8, 0),
+                            arrival_time=datetime(2025, 3, 1, 11, 0), cost=100.0)
+            db.session.add(flight)
+            db.session.flush()
+            for col in range(3):
+                db.session.add(Booking(user_email='mx@example.com', flight_id=flight.id,
+                                       seat_row=0, seat_col=col, seats=f'1{"ABC"[col]}'))
+            db.session.commit()
+        with self.client.session_transaction() as session:
+            session['email'] = 'mx@example.com'
+
+    def tearDown(self):
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_request_metrics(self):
+        """Test that latency, SQL statements and render time are recorded per endpoint."""
+        response = self.client.get('/booking_history')
+        self.assertRegex(response.headers['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="1 statements", render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.client.get('/booking_history')
+        self.client.get('/no_such_page')
+
+        text = self.client.get('/metrics').data.decode()
+        history = {'endpoint': 'main.booking_history', 'method': 'GET'}
+        self.assertEqual(sample(text, 'http_request_duration_seconds_count', **history), 2)
+        self.assertEqual(sample(text, 'http_requests_total', status=200, **history), 2)
+        self.assertEqual(sample(text, 'http_requests_total', endpoint='unmatched',
+                                method='GET', status=404), 1)
+        # The history page loads bookings and flights in one statement
+        self.assertEqual(sample(text, 'db_statements_per_request_bucket', le='1', **history), 2)
+        self.assertEqual(sample(text, 'db_statements_per_request_sum', **history), 2)
+        self.assertGreater(sample(text, 'db_duration_seconds_per_request_sum', **history), 0)
+        self.assertEqual(sample(text, 'template_render_seconds_count',
+                                template='booking_history.html'), 2)
+
+    def test_metrics_can_be_disabled(self):
+        """Test that METRICS_ENABLED turns the instrumentation off."""
+        quiet_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+                                'METRICS_ENABLED': False})
+        client = quiet_app.test_client()
+        self.assertEqual(client.get('/metrics').status_code, 404)
+        self.assertNotIn('Server-Timing', client.get('/').headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+from datetime import datetime, timedelta
+from routing import Leg, RouteGraph
+
+DAY = datetime(2024, 11, 5)
+
+
+def leg(flight_id, origin, destination, depart_hour, hours, cost):
+    """Builds a leg departing on DAY at depart_hour and flying for hours."""
+    departure = DAY + timedelta(hours=depart_hour)
+    return Leg(flight_id, f'F{flight_id}', origin, destination,
+               departure, departure + timedelta(hours=hours), cost)
+
+
+class RouteGraphTests(unittest.TestCase):
+    """Unit tests for the connecting-flight route graph."""
+
+    def setUp(self):
+        self.legs = [
+            leg(1, 'JFK', 'LAX', 8, 6, 500),    # direct, expensive
+            leg(2, 'JFK', 'ORD', 7, 2, 100),    # ORD connection
+            leg(3, 'ORD', 'LAX', 10, 4, 150),   # 1h layover
+            leg(4, 'ORD', 'LAX', 9.25, 4, 90),  # only 15 minutes after landing
+            leg(5, 'JFK', 'ATL', 6, 2, 60),
+            leg(6, 'ATL', 'DEN', 9, 3, 60),
+            leg(7, 'DEN', 'LAX', 13, 2, 60),    # 2-stop, cheapest
+            leg(8, 'ORD', 'JFK', 10, 2, 10),    # back to the origin
+        ]
+        self.graph = RouteGraph(self.legs)
+
+    def search(self, **options):
+        return self.graph.search('JFK', 'LAX', DAY, DAY + timedelta(days=1), **options)
+
+    def test_ranked_by_cost(self):
+        """Test that itineraries come back cheapest first, within the stop limit."""
+        results = self.search(max_stops=2)
+        self.assertEqual([i.cost for i in results], [180, 250, 500])
+        self.assertEqual([i.stops for i in results], [2, 1, 0])
+        self.assertEqual([l.flight_id for l in results[0].legs], [5, 6, 7])
+
+    def test_ranked_by_duration(self):
+        """Test that itineraries can be ranked by total travel time."""
+        results = self.search(max_stops=2, sort='duration')
+        self.assertEqual(results[0].duration, timedelta(hours=6))
+        self.assertEqual([i.duration for i in results],
+                         sorted(i.duration for i in results))
+
+    def test_max_stops(self):
+        """Test that the stop limit bounds the search."""
+        self.assertEqual([i.stops for i in self.search(max_stops=0)], [0])
+        self.assertEqual([i.stops for i in self.search(max_stops=1)], [1, 0])
+
+    def test_minimum_layover(self):
+        """Test that connections shorter than the minimum layover are skipped."""
+        flight_ids = {l.flight_id for i in self.search() for l in i.legs}
+        self.assertNotIn(4, flight_ids)
+        results = self.search(max_stops=1, min_layover=timedelta(minutes=10))
+        self.assertEqual(results[0].cost, 190)
+        self.assertEqual(results[0].layovers, [timedelta(minutes=15)])
+
+    def test_limit(self):
+        """Test that only the best itineraries are returned."""
+        results = self.search(limit=2)
+        self.assertEqual([i.cost for i in results], [180, 250])
+
+    def test_departure_window(self):
+        """Test that the first leg must depart inside the requested window."""
+        results = self.graph.search('JFK', 'LAX', DAY + timedelta(hours=7, minutes=30),
+                                    DAY + timedelta(days=1))
+        self.assertEqual([i.cost for i in results], [500])
+
+    def test_seats_left(self):
+        """Test that sold-out legs can be left out of the search."""
+        graph = RouteGraph([l._replace(seats_available=0) if l.flight_id == 6 else l
+                            for l in self.legs])
+        results = graph.search('JFK', 'LAX', DAY, DAY + timedelta(days=1), seats_left=True)
+        self.assertEqual([i.cost for i in results], [250, 500])
+        results = graph.search('JFK', 'LAX', DAY, DAY + timedelta(days=1))
+        self.assertEqual(results[0].cost, 180)
+
+    def test_incremental_refresh(self):
+        """Test that changed flights are reloaded without rebuilding the graph."""
+        schedule = {l.flight_id: l for l in self.legs}
+        loads = []
+
+        def loader(flight_ids):
+            loads.append(flight_ids)
+            ids = schedule if flight_ids is None else flight_ids
+            return [schedule[i] for i in ids if i in schedule]
+
+        graph = RouteGraph()
+        graph.refresh(loader)
+        self.assertEqual(len(graph), len(self.legs))
+
+        del schedule[7]
+        schedule[1] = schedule[1]._replace(cost=150)
+        graph.mark_changed({1, 7})
+        graph.refresh(loader)
+        self.assertEqual(loads, [None, {1, 7}])
+        results = graph.search('JFK', 'LAX', DAY, DAY + timedelta(days=1))
+        self.assertEqual([i.cost for i in results], [150, 250])
+
+        graph.refresh(loader)
+        self.assertEqual(len(loads), 2)
+        graph.mark_changed()
+        graph.refresh(loader)
+        self.assertEqual(loads[-1], None)
+
+    def test_max_age(self):
+        """Test that the graph is rebuilt once it reaches its max age."""
+        now = [0.0]
+        loads = []
+
+        def loader(flight_ids):
+            loads.append(flight_ids)
+            return self.legs
+
+        graph = RouteGraph(max_age=60, clock=lambda: now[0])
+        graph.refresh(loader)
+        now[0] = 30
+        graph.refresh(loader)
+        self.assertEqual(loads, [None])
+        now[0] = 61
+        graph.refresh(loader)
+        self.assertEqual(loads, [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
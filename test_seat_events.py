@@ -0,0 +1,100 @@
+import json
+import threading
+import unittest
+from seat_events import RESET, SeatEventBroker, SeatUpdate, event_stream
+
+
+def update(flight_id=1, seat='1A', status='booked'):
+    return SeatUpdate(flight_id, 0, 0, seat, status)
+
+
+class SeatEventBrokerTests(unittest.TestCase):
+    """Unit tests for the live seat update fan-out."""
+
+    def setUp(self):
+        self.broker = SeatEventBroker(history=3, queue_size=4)
+
+    def test_fan_out_per_flight(self):
+        """Test that an update reaches every watcher of its flight only."""
+        watchers = [self.broker.subscribe(1) for _ in range(100)]
+        other = self.broker.subscribe(2)
+        self.broker.publish(update())
+        for watcher in watchers:
+            self.assertEqual(watcher.get(timeout=0), (1, update()))
+        self.assertIsNone(other.get(timeout=0))
+        self.assertEqual(self.broker.subscriber_count(1), 100)
+        for watcher in watchers:
+            self.broker.unsubscribe(watcher)
+        self.assertEqual(self.broker.subscriber_count(1), 0)
+
+    def test_reconnect_replays_missed_updates(self):
+        """Test that Last-Event-ID resumes from the recent history."""
+        for seat in ('1A', '1B', '1C'):
+            self.broker.publish(update(seat=seat))
+        watcher = self.broker.subscribe(1, last_event_id=1)
+        self.assertEqual([watcher.get(timeout=0)[1].seat for _ in range(2)], ['1B', '1C'])
+        self.assertIsNone(watcher.get(timeout=0))
+
+        self.assertIsNone(self.broker.subscribe(1, last_event_id=3).get(timeout=0))
+
+    def test_reset_when_history_is_gone(self):
+        """Test that a client that missed too much is told to reload."""
+        for seat in ('1A', '1B', '1C', '1D', '2A'):
+            self.broker.publish(update(seat=seat))
+        self.assertIs(self.broker.subscribe(1, last_event_id=1).get(timeout=0), RESET)
+        # An id from before a server restart is unknown as well
+        self.assertIs(self.broker.subscribe(2, last_event_id=7).get(timeout=0), RESET)
+
+    def test_reset_on_invalid_event_id(self):
+        """Test that a negative Last-Event-ID resets the client instead of failing."""
+        self.assertIs(self.broker.subscribe(1, last_event_id=-5).get(timeout=0), RESET)
+        for seat in ('1A', '1B', '1C', '1D', '2A'):
+            self.broker.publish(update(seat=seat))
+        self.assertIs(self.broker.subscribe(1, last_event_id=-5).get(timeout=0), RESET)
+        self.assertIs(self.broker.subscribe(1, last_event_id=0).get(timeout=0), RESET)
+        self.assertEqual(self.broker.subscriber_count(1), 3)
+
+    def test_reset_after_history_evicted(self):
+        """Test that a flight whose history was evicted resets older clients."""
+        broker = SeatEventBroker(history=3, max_flights=1)
+        broker.publish(update(seat='1A'))
+        broker.publish(update(seat='1B'))
+        self.assertEqual(broker.last_event_id(), 2)
+        broker.publish(update(seat='1C'))
+        broker.publish(update(flight_id=2, seat='9A'))  # evicts flight 1's history
+        broker.publish(update(seat='1D'))
+        self.assertIs(broker.subscribe(1, last_event_id=2).get(timeout=0), RESET)
+        self.assertIs(broker.subscribe(3, last_event_id=2).get(timeout=0), RESET)
+        watcher = broker.subscribe(1, last_event_id=4)
+        self.assertEqual(watcher.get(timeout=0), (5, update(seat='1D')))
+        self.assertIsNone(broker.subscribe(3, last_event_id=5).get(timeout=0))
+
+    def test_slow_subscriber_reset(self):
+        """Test that a subscriber whose queue overflows is reset."""
+        watcher = self.broker.subscribe(1)
+        for _ in range(5):
+            self.broker.publish(update())
+        self.assertIs(watcher.get(timeout=0), RESET)
+
+    def test_event_stream(self):
+        """Test the Server-Sent Events framing, keepalives and unsubscribing."""
+        watcher = self.broker.subscribe(1)
+        stream = event_stream(self.broker, watcher, keepalive=0.01, max_age=60)
+        self.assertEqual(next(stream), 'retry: 3000\n\n')
+        self.assertEqual(next(stream), ': keepalive\n\n')
+
+        threading.Timer(0.01, self.broker.publish, [update(seat='2B', status='available')]).start()
+        message = next(stream)
+        while message.startswith(':'):
+            message = next(stream)
+        lines = message.strip().split('\n')
+        self.assertEqual(lines[:2], ['id: 1', 'event: seat'])
+        self.assertEqual(json.loads(lines[2][len('data: '):]),
+                         {'seat': '2B', 'row': 0, 'col': 0, 'status': 'available'})
+
+        stream.close()
+        self.assertEqual(self.broker.subscriber_count(1), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
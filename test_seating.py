@@ -0,0 +1,47 @@
+import unittest
+from seating import SeatLayout, get_layout
+
+
+class SeatLayoutTests(unittest.TestCase):
+    """Unit tests for the precomputed aircraft seat layouts."""
+
+    def test_labels_and_positions(self):
+        """Test that labels and positions map to each other both ways."""
+        layout = get_layout(30, 'ABC DEF')
+        self.assertEqual(layout.columns, 6)
+        self.assertEqual(layout.capacity, 180)
+        self.assertEqual(layout.label(0, 0), '1A')
+        self.assertEqual(layout.label(29, 5), '30F')
+        self.assertEqual(layout.position('12c'), (11, 2))
+        self.assertIsNone(layout.label(30, 0))
+        self.assertIsNone(layout.label(0, -1))
+        self.assertIsNone(layout.position('31A'))
+
+    def test_blocked_and_premium_seats(self):
+        """Test that blocked seats are excluded and premium rows are flagged."""
+        layout = get_layout(5, 'AB CD', '1A, 1D', 2)
+        self.assertEqual(layout.capacity, 18)
+        self.assertFalse(layout.is_bookable(0, 0))
+        self.assertTrue(layout.is_bookable(0, 1))
+        self.assertTrue(layout.seat_rows[1][0].premium)
+        self.assertFalse(layout.seat_rows[2][0].premium)
+        # The aisle falls between columns B and C
+        self.assertEqual([seat.aisle_before for seat in layout.seat_rows[0]],
+                         [False, False, True, False])
+
+    def test_layouts_are_shared(self):
+        """Test that a configuration always yields the same cached layout."""
+        self.assertIs(get_layout(5, 'AB CD'), get_layout(5, 'AB CD'))
+
+    def test_invalid_layouts(self):
+        """Test that malformed configurations are rejected."""
+        with self.assertRaises(ValueError):
+            SeatLayout(0, 'AB CD')
+        with self.assertRaises(ValueError):
+            SeatLayout(5, 'AA')
+        with self.assertRaises(ValueError):
+            SeatLayout(5, 'AB CD', ['9A'])
+
+
+if __name__ == '__main__':
+    unittest.main()